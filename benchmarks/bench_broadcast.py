@@ -0,0 +1,141 @@
+"""
+Benchmark tick-to-client latency of a websocket broadcast as the number of
+subscribers grows, with one slow subscriber among them.
+
+The sequential path awaits ``send_json`` per socket, as the connection
+manager used to; the queued path is ``ConnectionManager.broadcast``. Each
+run measures, from the moment the tick is handed over, the time until the
+last fast subscriber has received it and until every subscriber (the slow
+one included) has; for the queued path also the cost of the ``broadcast``
+call itself. Runs are repeated and reported as median and min-max range.
+
+Run with ``python -m benchmarks.bench_broadcast``.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List, Sequence
+
+from src.websockets.connection_manager import ConnectionManager
+
+TICK = {
+    "symbol": "BTC/USD",
+    "bid": 64000.1,
+    "ask": 64000.2,
+    "last": 64000.15,
+    "baseVolume": 1234.5,
+    "datetime": "2024-01-01T00:00:00.000Z",
+}
+TOPIC = ("ticker", "kraken", "BTC/USD")
+SLOW_SEND_SECONDS = 0.005
+CLIENTS = (10, 100, 1_000)
+REPEAT = 20
+
+
+class Countdown:
+    def __init__(self, count: int):
+        self.count = count
+        self.event = asyncio.Event()
+
+    def tick(self):
+        self.count -= 1
+        if self.count == 0:
+            self.event.set()
+
+
+class FakeSocket:
+    client = None
+
+    def __init__(self, delay: float, fast_done: Countdown, all_done: Countdown):
+        self.delay = delay
+        self.fast_done = fast_done
+        self.all_done = all_done
+        self.received_at = None
+
+    async def _send(self):
+        await asyncio.sleep(self.delay)
+        self.received_at = time.perf_counter()
+        if not self.delay:
+            self.fast_done.tick()
+        self.all_done.tick()
+
+    async def send_json(self, data):
+        json.dumps(data)
+        await self._send()
+
+    async def send_text(self, payload):
+        await self._send()
+
+
+def make_sockets(clients: int):
+    fast_done, all_done = Countdown(clients), Countdown(clients + 1)
+    sockets = [FakeSocket(SLOW_SEND_SECONDS, fast_done, all_done)] + [
+        FakeSocket(0.0, fast_done, all_done) for _ in range(clients)
+    ]
+    return sockets, fast_done, all_done
+
+
+def latencies(sockets: List[FakeSocket], started: float) -> Dict[str, float]:
+    """Milliseconds until the last fast subscriber and every subscriber."""
+    fast = max(s.received_at for s in sockets if not s.delay)
+    last = max(s.received_at for s in sockets)
+    return {"fast": (fast - started) * 1000, "all": (last - started) * 1000}
+
+
+async def sequential(clients: int) -> Dict[str, float]:
+    sockets, _, _ = make_sockets(clients)
+    started = time.perf_counter()
+    for websocket in sockets:
+        await websocket.send_json(TICK)
+    return latencies(sockets, started)
+
+
+async def queued(clients: int) -> Dict[str, float]:
+    manager = ConnectionManager()
+    sockets, fast_done, all_done = make_sockets(clients)
+    for websocket in sockets:
+        manager.connect(websocket, TOPIC)
+    started = time.perf_counter()
+    manager.broadcast(TOPIC, TICK)
+    enqueued = time.perf_counter()
+    await fast_done.event.wait()
+    await all_done.event.wait()
+    result = latencies(sockets, started)
+    result["enqueue"] = (enqueued - started) * 1000
+    for websocket in sockets:
+        await manager.remove(websocket)
+    return result
+
+
+def summary(values: Sequence[float]) -> str:
+    return (
+        f"{statistics.median(values):7.2f} ms"
+        f" [{min(values):6.2f}-{max(values):6.2f}]"
+    )
+
+
+async def main():
+    print(
+        f"median [min-max] over {REPEAT} runs, one subscriber"
+        f" {SLOW_SEND_SECONDS * 1000:.0f} ms slow"
+    )
+    for clients in CLIENTS:
+        runs = {"sequential": [], "queued": []}
+        for _ in range(REPEAT):
+            runs["sequential"].append(await sequential(clients))
+            runs["queued"].append(await queued(clients))
+        for name, results in runs.items():
+            line = (
+                f"{clients:>5} subscribers  {name:<10}"
+                f"  last fast client {summary([r['fast'] for r in results])}"
+                f"  all clients {summary([r['all'] for r in results])}"
+            )
+            if name == "queued":
+                line += f"  broadcast() {summary([r['enqueue'] for r in results])}"
+            print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
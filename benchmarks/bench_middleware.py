@@ -0,0 +1,124 @@
+"""
+Benchmark per-request overhead of the auth and rate limiting middlewares.
+
+The legacy stack reproduces the previous ``BaseHTTPMiddleware`` versions
+(path exclusion by string replace and list scan, ``call_next`` per layer);
+the ASGI stack is ``JWTAuthMiddleware`` around ``RateLimiterMiddleware``.
+Both use the same in-memory rate limiter decision, so only middleware
+mechanics are measured, on a path excluded from authentication.
+
+Run with ``python -m benchmarks.bench_middleware``.
+"""
+
+import asyncio
+import time
+import timeit
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.middlewares.asgi import compile_path_matcher
+from src.middlewares.jwt_middleware import EXCLUDED_PATHS, JWTAuthMiddleware
+from src.middlewares.rate_limiter import (
+    RateLimiter,
+    RateLimiterMiddleware,
+    parse_policies,
+)
+
+REQUESTS = 5_000
+PATH = "/api/v1/auth/login"
+
+
+class InMemoryLimiter(RateLimiter):
+    async def _evaluate(self, policy, key, limit, now_ms, cost):
+        return [1, limit - cost, 0, policy.window * 1000]
+
+
+class LegacyAuth(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        url_path = request.url.path
+        if "/api/v1" in url_path:
+            url_path = url_path.replace("/api/v1", "")
+        if url_path in EXCLUDED_PATHS:
+            return await call_next(request)
+        raise RuntimeError("benchmark path must be excluded")
+
+
+class LegacyRateLimit(BaseHTTPMiddleware):
+    def __init__(self, app, limiter):
+        super().__init__(app)
+        self.limiter = limiter
+
+    async def dispatch(self, request, call_next):
+        decision = await self.limiter.hit(request)
+        response = await call_next(request)
+        response.headers.update(decision.headers())
+        return response
+
+
+async def endpoint(scope, receive, send):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+
+async def drive(app) -> float:
+    """Mean time per request in microseconds."""
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "POST",
+            "path": PATH,
+            "raw_path": PATH.encode(),
+            "root_path": "",
+            "scheme": "http",
+            "query_string": b"",
+            "headers": [(b"host", b"bench")],
+            "client": ("10.0.0.1", 1234),
+            "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / REQUESTS * 1_000_000
+
+
+def make_limiter() -> RateLimiter:
+    return InMemoryLimiter(parse_policies("default=/:1000000000/60:sliding_window"))
+
+
+async def main():
+    legacy = LegacyAuth(LegacyRateLimit(endpoint, make_limiter()))
+    asgi = JWTAuthMiddleware(RateLimiterMiddleware(endpoint, make_limiter()))
+    bare = await drive(endpoint)
+    before = await drive(legacy)
+    after = await drive(asgi)
+    print(f"endpoint only            {bare:8.1f} us/request")
+    print(f"BaseHTTPMiddleware stack {before:8.1f} us/request")
+    print(f"pure ASGI stack          {after:8.1f} us/request")
+
+    is_excluded = compile_path_matcher(EXCLUDED_PATHS, "/api/v1")
+    for path in (PATH, "/api/v1/quotes/ticker"):
+        scan = timeit.timeit(
+            lambda: path.replace("/api/v1", "") in EXCLUDED_PATHS, number=100_000
+        )
+        matcher = timeit.timeit(lambda: is_excluded(path), number=100_000)
+        print(
+            f"exclusion {path:<24} scan {scan * 10:6.3f} us"
+            f"  matcher {matcher * 10:6.3f} us"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
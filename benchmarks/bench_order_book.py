@@ -0,0 +1,86 @@
+"""
+Benchmark ``order_book_data``, the single-pass order book summary the service
+uses, against the previous implementation of ``get_order_book_model``.
+
+Run with ``python -m benchmarks.bench_order_book``.
+"""
+
+import random
+import timeit
+from typing import List, Union
+
+from src.models.OrderBookDataModel import OrderBookData, PriceVolumePair
+from src.services.order_book_analytics import order_book_data
+
+LEVELS = (20, 100, 250, 500, 1_000, 10_000)
+REPEAT = 15
+
+
+def legacy_vwap(order_book_side: List[List[Union[float, int]]]):
+    total_volume = 0
+    weighted_price_sum = 0
+    for entry in order_book_side:
+        price, volume = entry[0], entry[1]
+        total_volume += volume
+        weighted_price_sum += price * volume
+    return None if total_volume == 0 else weighted_price_sum / total_volume
+
+
+def legacy_order_book_data(order_book: dict) -> OrderBookData:
+    sorted_bids = sorted(order_book["bids"], key=lambda x: x[0], reverse=True)
+    sorted_asks = sorted(order_book["asks"], key=lambda x: x[0])
+    top_ask = sorted_asks[0] if len(sorted_asks) > 0 else [None, None]
+    top_bid = sorted_bids[0] if len(sorted_bids) > 0 else [None, None]
+    spread = round(top_ask[0] - top_bid[0], 5) if top_bid[0] and top_ask[0] else None
+    return OrderBookData(
+        top_bid=(
+            PriceVolumePair(price=top_bid[0], volume=top_bid[1]) if top_bid[0] else None
+        ),
+        top_ask=(
+            PriceVolumePair(price=top_ask[0], volume=top_ask[1]) if top_ask[0] else None
+        ),
+        spread=spread,
+        total_bid_volume=sum(bid[1] for bid in sorted_bids),
+        total_ask_volume=sum(ask[1] for ask in sorted_asks),
+        vwap_bid=legacy_vwap(sorted_bids),
+        vwap_ask=legacy_vwap(sorted_asks),
+        bid_count=len(sorted_bids),
+        ask_count=len(sorted_asks),
+        depth_of_book={"bids": sorted_bids, "asks": sorted_asks},
+    )
+
+
+def make_book(levels: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    mid = 60_000.0
+    bids = [
+        [round(mid - 0.5 * (i + 1), 1), round(rng.uniform(0.001, 5), 6)]
+        for i in range(levels)
+    ]
+    asks = [
+        [round(mid + 0.5 * (i + 1), 1), round(rng.uniform(0.001, 5), 6)]
+        for i in range(levels)
+    ]
+    return {"bids": bids, "asks": asks}
+
+
+def _timed(function, number: int) -> float:
+    return min(timeit.repeat(function, number=number, repeat=REPEAT)) / number
+
+
+def bench(levels: int):
+    book = make_book(levels)
+    expected = legacy_order_book_data(book)
+    assert expected == order_book_data(book)
+    number = max(1, 20_000 // levels)
+    legacy = _timed(lambda: legacy_order_book_data(book), number)
+    lists = _timed(lambda: order_book_data(book), number)
+    print(
+        f"{levels:>6} levels  legacy {legacy * 1e6:8.1f} us"
+        f"  order_book_data {lists * 1e6:8.1f} us ({legacy / lists:4.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    for levels in LEVELS:
+        bench(levels)
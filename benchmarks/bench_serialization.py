@@ -0,0 +1,100 @@
+"""
+Benchmark the fast response path (``FastJSONResponse``) against FastAPI's
+default ``response_model`` validation and JSON encoding.
+
+Run with ``python -m benchmarks.bench_serialization``.
+"""
+
+import timeit
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from benchmarks.bench_order_book import make_book
+from src.models.OHLCVDataModel import OHLCVData
+from src.models.OrderBookDataModel import OrderBookData
+from src.models.TickerDataModel import TickerData
+from src.services.order_book_analytics import order_book_data
+from src.utils.responses import FastJSONResponse, encoded_cache
+
+REPEAT = 5
+
+
+def make_tickers(count: int) -> List[TickerData]:
+    return [
+        TickerData(
+            symbol=f"C{i}/USD",
+            high=1.1 * i,
+            low=0.9 * i,
+            bid=i - 0.01,
+            bidVolume=1.0,
+            ask=i + 0.01,
+            askVolume=None,
+            vwap=float(i),
+            open=float(i),
+            close=float(i),
+            last=float(i),
+            previousClose=None,
+            change=0.0,
+            percentage=0.0,
+            average=float(i),
+            baseVolume=10.0,
+            quoteVolume=10.0 * i,
+            datetime="2024-01-01T00:00:00.000Z",
+        )
+        for i in range(count)
+    ]
+
+
+def make_candles(count: int) -> List[OHLCVData]:
+    return [
+        OHLCVData(60_000 * i, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0)
+        for i in range(count)
+    ]
+
+
+def run_sync(coroutine):
+    # serialize_response only awaits when validating in a threadpool
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("serialize_response suspended")
+
+
+def default_path(field, content) -> bytes:
+    serialized = run_sync(serialize_response(field=field, response_content=content))
+    return JSONResponse(serialized).body
+
+
+def fast_path(content) -> bytes:
+    return FastJSONResponse(content).body
+
+
+def best(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+
+
+def bench(name: str, annotation, content, number: int):
+    field = create_model_field("response", annotation, mode="serialization")
+    default = best(lambda: default_path(field, content), number)
+    fast = best(lambda: fast_path(content), number)
+    encoded_cache.mark(content)
+    fast_path(content)
+    cached = best(lambda: fast_path(content), number)
+    print(
+        f"{name:<22} default {default * 1e6:9.1f} us"
+        f"  fast {fast * 1e6:9.1f} us ({default / fast:5.1f}x)"
+        f"  pre-encoded {cached * 1e6:6.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    bench("ticker", TickerData, make_tickers(1)[0], 2_000)
+    bench("tickers x1000", List[TickerData], make_tickers(1_000), 20)
+    bench("candles x720", List[OHLCVData], make_candles(720), 20)
+    for levels in (100, 1_000):
+        book = order_book_data(make_book(levels))
+        bench(f"order book {levels}", OrderBookData, book, 200_000 // levels)
@@ -0,0 +1,242 @@
+"""
+Historical candle backfill into the local candle store.
+
+Run with ``python -m src.data.backfill --exchange Kraken --symbols BTC/USD
+--timeframe 1m --start 2023-01-01``.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ccxt.base.exchange import Exchange
+
+from src.data.candle_store import CandleSeries, align, candle_store, timeframe_ms
+from src.services.connect_exchange_service import (
+    PRIORITY_BACKGROUND,
+    exchange_registry,
+    request_priority,
+)
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger("backfill", "logs/backfill.log")
+
+Window = Tuple[int, int]
+
+
+def split_windows(ranges: Iterable[Window], width: int) -> List[Window]:
+    """Split ``[start, end)`` ranges into consecutive windows of ``width`` ms."""
+    windows = []
+    for start, end in ranges:
+        for window_start in range(start, end, width):
+            windows.append((window_start, min(window_start + width, end)))
+    return windows
+
+
+def clean_page(
+    rows: Sequence[Sequence[float]], start: int, end: int, step: int
+) -> List[Sequence[float]]:
+    """
+    Return the rows of a page that fall in ``[start, end)`` sorted by time,
+    deduplicated (last row wins) and aligned to the timeframe.
+    """
+    timestamps = [row[0] for row in rows]
+    if any(a >= b for a, b in zip(timestamps, timestamps[1:])):
+        logger.warning(f"Non-monotonic page starting at {start}; reordering")
+    by_timestamp = {}
+    for row in rows:
+        timestamp = int(row[0])
+        if start <= timestamp < end and align(timestamp, step) == timestamp:
+            by_timestamp[timestamp] = row
+    return [by_timestamp[timestamp] for timestamp in sorted(by_timestamp)]
+
+
+class BackfillEngine:
+    """
+    Fills gaps in the candle store with concurrent, paginated ``fetch_ohlcv``
+    calls.
+
+    Missing ranges are split into windows of one page each and fetched with at
+    most ``concurrency`` requests in flight per exchange. Requests go through
+    the ``RequestScheduler`` at the caller's priority (background for bulk
+    jobs), which spaces them by the exchange's ``rateLimit``. Completed
+    windows are written and marked covered strictly in time order, so an
+    interrupted backfill resumes from the first window that was not
+    committed. An empty page ends a window and the rest of it is marked
+    covered too, so ranges without candles (before a listing, beyond an
+    exchange's history limit) are not requested again. Nothing is fetched or
+    covered past the candle still forming.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = Config.BACKFILL_CONCURRENCY,
+        page_limit: int = Config.CANDLE_PAGE_LIMIT,
+    ):
+        self.concurrency = concurrency
+        self.page_limit = page_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.pages = 0
+        self.candles = 0
+
+    def _semaphore(self, exchange: Exchange) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(exchange.id)
+        if semaphore is None:
+            semaphore = self._semaphores[exchange.id] = asyncio.Semaphore(
+                self.concurrency
+            )
+        return semaphore
+
+    async def _fetch_window(
+        self,
+        exchange: Exchange,
+        series: CandleSeries,
+        symbol: str,
+        window: Window,
+        priority: int,
+    ) -> List[Sequence[float]]:
+        start, end = window
+        rows: List[Sequence[float]] = []
+        cursor = start
+        # Exchanges with smaller pages than requested need several calls
+        while cursor < end:
+            async with self._semaphore(exchange):
+                with request_priority(priority):
+                    page = await exchange.fetch_ohlcv(
+                        symbol, series.timeframe, since=cursor, limit=self.page_limit
+                    )
+            self.pages += 1
+            page = clean_page(page, cursor, end, series.step)
+            if not page:
+                break
+            rows.extend(page)
+            cursor = int(page[-1][0]) + series.step
+        return rows
+
+    async def backfill_series(
+        self,
+        exchange: Exchange,
+        series: CandleSeries,
+        symbol: str,
+        start: int,
+        end: int,
+        priority: int = PRIORITY_BACKGROUND,
+    ) -> int:
+        """Fetch the parts of ``[start, end)`` missing from ``series``."""
+        # The candle still forming changes until it closes
+        end = min(end, align(int(time.time() * 1000), series.step))
+        windows = split_windows(
+            series.missing_ranges(start, end), self.page_limit * series.step
+        )
+        if not windows:
+            return 0
+        tasks = [
+            asyncio.create_task(
+                self._fetch_window(exchange, series, symbol, window, priority)
+            )
+            for window in windows
+        ]
+        fetched = 0
+        try:
+            for window, task in zip(windows, tasks):
+                rows = await task
+                await series.commit(rows, *window)
+                fetched += len(rows)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.candles += fetched
+        return fetched
+
+    async def backfill(
+        self,
+        exchange: Exchange,
+        symbols: Sequence[str],
+        timeframe: str,
+        start: int,
+        end: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """Backfill several symbols on one exchange concurrently."""
+        step = timeframe_ms(timeframe)
+        current = align(int(time.time() * 1000), step)
+        end = min(end, current) if end is not None else current
+        start = align(start, step)
+        results = await asyncio.gather(
+            *(
+                self.backfill_series(
+                    exchange,
+                    candle_store.series(exchange.id, symbol, timeframe),
+                    symbol,
+                    start,
+                    end,
+                )
+                for symbol in symbols
+            ),
+            return_exceptions=True,
+        )
+        counts = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.error(f"Backfill failed for {exchange.id} {symbol}: {result}")
+                counts[symbol] = 0
+            else:
+                counts[symbol] = result
+        return counts
+
+    def stats(self) -> dict:
+        return {"pages": self.pages, "candles": self.candles}
+
+
+backfill_engine = BackfillEngine()
+
+
+def _parse_time(value: str) -> int:
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+async def _main(args: argparse.Namespace):
+    engine = BackfillEngine(concurrency=args.concurrency)
+    started = time.monotonic()
+    try:
+        async with exchange_registry.lease_by_exchange_name(args.exchange) as exchange:
+            await exchange.load_markets()
+            counts = await engine.backfill(
+                exchange,
+                args.symbols,
+                args.timeframe,
+                _parse_time(args.start),
+                _parse_time(args.end) if args.end else None,
+            )
+    finally:
+        await exchange_registry.close()
+    for symbol, count in counts.items():
+        print(f"{symbol}: {count} candles")
+    print(
+        f"{engine.pages} pages, {engine.candles} candles"
+        f" in {time.monotonic() - started:.1f}s"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--exchange", default="Kraken")
+    parser.add_argument("--symbols", nargs="+", default=["BTC/USD"])
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument(
+        "--start", required=True, help="ISO date/time or epoch milliseconds"
+    )
+    parser.add_argument("--end", help="ISO date/time or epoch milliseconds")
+    parser.add_argument("--concurrency", type=int, default=Config.BACKFILL_CONCURRENCY)
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
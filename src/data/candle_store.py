@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from ccxt.base.exchange import Exchange
+
+from src.models.OHLCVDataModel import OHLCVData
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger("candle_store", "logs/candle_store.log")
+
+CANDLE_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+
+Interval = Tuple[int, int]
+
+WEEK_MS = 7 * 86_400_000
+# The epoch was a Thursday; weekly candles open on Monday 00:00 UTC
+WEEK_OFFSET_MS = 4 * 86_400_000
+
+
+def align(timestamps, step: int):
+    """
+    Open time of the ``step`` ms bucket containing ``timestamps`` (an int or
+    an array): aligned to the epoch, or to Mondays for whole weeks.
+    """
+    offset = WEEK_OFFSET_MS if step % WEEK_MS == 0 else 0
+    return (timestamps - offset) // step * step + offset
+
+
+def timeframe_ms(timeframe: str) -> int:
+    return Exchange.parse_timeframe(timeframe) * 1000
+
+
+def _path_part(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", value)
+
+
+def _add_interval(intervals: List[Interval], start: int, end: int) -> List[Interval]:
+    """Insert ``[start, end)`` into sorted intervals, merging touching ones."""
+    merged: List[Interval] = []
+    for current_start, current_end in sorted(intervals + [(start, end)]):
+        if merged and current_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], current_end))
+        else:
+            merged.append((current_start, current_end))
+    return merged
+
+
+def _subtract_intervals(
+    start: int, end: int, intervals: Sequence[Interval]
+) -> List[Interval]:
+    """Return the parts of ``[start, end)`` not covered by ``intervals``."""
+    missing: List[Interval] = []
+    cursor = start
+    for covered_start, covered_end in intervals:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+def to_ohlcv_list(candles: np.ndarray) -> List[OHLCVData]:
+    return [OHLCVData(*row) for row in candles.tolist()]
+
+
+class CandleSeries:
+    """
+    Candles for one (exchange, symbol, timeframe) in an append-only file.
+
+    Rows are fixed-width ``CANDLE_DTYPE`` records sorted by timestamp, so the
+    file can be memory-mapped and range queries are a binary search plus a
+    slice. A JSON sidecar records the time ranges already fetched from the
+    exchange (including ranges where it had no candles), which is what gap
+    detection works from. Async callers store through ``commit``, which does
+    the file I/O in a worker thread so it never blocks the event loop.
+    """
+
+    def __init__(self, directory: str, timeframe: str):
+        self.directory = directory
+        self.timeframe = timeframe
+        self.step = timeframe_ms(timeframe)
+        self.data_path = os.path.join(directory, "candles.bin")
+        self.meta_path = os.path.join(directory, "coverage.json")
+        self.lock = threading.Lock()
+        self._mmap: Optional[np.ndarray] = None
+        self._mmap_size = -1
+        self.coverage: List[Interval] = self._load_coverage()
+
+    def _load_coverage(self) -> List[Interval]:
+        try:
+            with open(self.meta_path) as meta:
+                return [tuple(interval) for interval in json.load(meta)["coverage"]]
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"Error reading coverage {self.meta_path}: {e}")
+            return []
+
+    def _save_coverage(self):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as meta:
+            json.dump({"timeframe": self.timeframe, "coverage": self.coverage}, meta)
+        os.replace(tmp_path, self.meta_path)
+
+    def candles(self) -> np.ndarray:
+        """Memory-mapped view of every stored candle."""
+        try:
+            size = os.path.getsize(self.data_path)
+        except FileNotFoundError:
+            size = 0
+        if size != self._mmap_size:
+            count = size // CANDLE_DTYPE.itemsize
+            self._mmap = (
+                np.memmap(self.data_path, dtype=CANDLE_DTYPE, mode="r", shape=count)
+                if count
+                else np.empty(0, dtype=CANDLE_DTYPE)
+            )
+            self._mmap_size = size
+        return self._mmap
+
+    def __len__(self) -> int:
+        return len(self.candles())
+
+    def read(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> np.ndarray:
+        """Return candles with ``start <= timestamp < end`` (a view, no copy)."""
+        candles = self.candles()
+        timestamps = candles["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, "left"))
+        hi = (
+            len(candles)
+            if end is None
+            else int(np.searchsorted(timestamps, end, "left"))
+        )
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return candles[lo:hi]
+
+    def missing_ranges(self, start: int, end: int) -> List[Interval]:
+        return _subtract_intervals(start, end, self.coverage)
+
+    def write(self, rows: Sequence[Sequence[float]]):
+        """
+        Store ccxt OHLCV rows. Rows after the last stored candle are appended;
+        anything older is merged and the file rewritten, which only happens
+        when backfilling before the stored range.
+        """
+        if not len(rows):
+            return
+        new = np.array([tuple(row[:6]) for row in rows], dtype=CANDLE_DTYPE)
+        new = new[np.argsort(new["timestamp"], kind="stable")]
+        with self.lock:
+            existing = self.candles()
+            os.makedirs(self.directory, exist_ok=True)
+            if not len(existing) or new["timestamp"][0] > existing["timestamp"][-1]:
+                _, last = np.unique(new["timestamp"][::-1], return_index=True)
+                new = new[len(new) - 1 - last]
+                with open(self.data_path, "ab") as data:
+                    data.write(new.tobytes())
+                return
+            combined = np.concatenate((np.asarray(existing), new))
+            # Keep the newest value for duplicated timestamps
+            _, last = np.unique(combined["timestamp"][::-1], return_index=True)
+            combined = combined[len(combined) - 1 - last]
+            tmp_path = f"{self.data_path}.tmp"
+            with open(tmp_path, "wb") as data:
+                data.write(combined.tobytes())
+            self._mmap, self._mmap_size = None, -1
+            os.replace(tmp_path, self.data_path)
+
+    def mark_covered(self, start: int, end: int):
+        if end <= start:
+            return
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self.coverage = _add_interval(self.coverage, start, end)
+            self._save_coverage()
+
+    def _commit(self, rows: Sequence[Sequence[float]], start: int, end: int):
+        self.write(rows)
+        self.mark_covered(start, end)
+
+    async def commit(self, rows: Sequence[Sequence[float]], start: int, end: int):
+        """Store ``rows`` and mark ``[start, end)`` covered off the event loop."""
+        await asyncio.to_thread(self._commit, rows, start, end)
+
+
+class CandleStore:
+    """Registry of ``CandleSeries`` rooted at ``Config.CANDLE_STORE_DIR``."""
+
+    def __init__(self, root: str = Config.CANDLE_STORE_DIR):
+        self.root = root
+        self._series: Dict[Tuple[str, str, str], CandleSeries] = {}
+
+    def series(self, exchange: str, symbol: str, timeframe: str) -> CandleSeries:
+        key = (exchange.lower(), symbol, timeframe)
+        series = self._series.get(key)
+        if series is None:
+            directory = os.path.join(
+                self.root, _path_part(key[0]), _path_part(symbol), timeframe
+            )
+            series = self._series[key] = CandleSeries(directory, timeframe)
+        return series
+
+    def stats(self) -> dict:
+        return {
+            "root": self.root,
+            "series": {
+                "/".join(key): {"candles": len(series), "coverage": series.coverage}
+                for key, series in self._series.items()
+            },
+        }
+
+
+candle_store = CandleStore()
@@ -0,0 +1,45 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from src.data.candle_store import CANDLE_DTYPE, align, timeframe_ms
+from src.utils.config import Config
+
+
+def resample(candles: np.ndarray, step: int) -> np.ndarray:
+    """
+    Aggregate time-sorted ``CANDLE_DTYPE`` candles into ``step`` ms buckets
+    aligned with ``align``. Buckets without candles are omitted.
+    """
+    if not len(candles):
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    buckets = align(candles["timestamp"], step)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(candles)] - 1
+    result = np.empty(len(starts), dtype=CANDLE_DTYPE)
+    result["timestamp"] = buckets[starts]
+    result["open"] = candles["open"][starts]
+    result["high"] = np.maximum.reduceat(candles["high"], starts)
+    result["low"] = np.minimum.reduceat(candles["low"], starts)
+    result["close"] = candles["close"][ends]
+    result["volume"] = np.add.reduceat(candles["volume"], starts)
+    return result
+
+
+def resample_source(
+    timeframe: str, base_timeframes: Optional[Sequence[str]] = None
+) -> Optional[str]:
+    """
+    Return the stored base timeframe ``timeframe`` is derived from: the
+    coarsest base that divides it evenly, or None for calendar timeframes
+    (months, years) which are not fixed-width.
+    """
+    if timeframe[-1] in ("M", "y"):
+        return None
+    step = timeframe_ms(timeframe)
+    sources = [
+        (timeframe_ms(base), base)
+        for base in base_timeframes or Config.CANDLE_BASE_TIMEFRAMES
+        if timeframe_ms(base) <= step and step % timeframe_ms(base) == 0
+    ]
+    return max(sources)[1] if sources else None
@@ -6,21 +6,47 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from src.middlewares.jwt_middleware import JWTAuthMiddleware
-from src.middlewares.rate_limiter import RateLimiterMiddleware
-from src.routes.v1 import auth, documents, exchange, orders, quotes
+from src.middlewares.rate_limiter import RateLimiterMiddleware, rate_limiter
+from src.routes.v1 import auth, documents, exchange, metrics, orders, quotes
+from src.services.auth_sessions import auth_sessions
+from src.services.connect_exchange_service import exchange_registry, request_scheduler
+from src.services.fee_service import fee_service
+from src.services.markets_catalog import markets_catalog
+from src.services.order_book_engine import order_book_engine
+from src.services.ticker_table import ticker_tables
+from src.utils.mongo_utils import mongo_pool
+from src.websockets.book_stream import book_streams
+from src.websockets.subscription_hub import subscription_hub
 from src.websockets.websocket_routes import router as websocket_quote_router
 
 
 # Define lifespan for handling the app's lifecycle
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Instantiate the RateLimiterMiddleware
-    rate_limiter = RateLimiterMiddleware(app, rate_limit=60, window=60)
-    app.state.rate_limiter = rate_limiter  # Store it in app state for global access
+    # One MongoDB client and connection pool shared by the whole process
+    mongo_pool.connect()
+    # Warm exchange clients are pooled for the app lifetime
+    await exchange_registry.start()
+    await order_book_engine.start()
+    await ticker_tables.start()
+    # Fees and the markets of the configured exchanges are loaded before
+    # serving requests
+    await fee_service.start()
+    await markets_catalog.start()
     yield  # This starts the app
 
     # Clean up Redis connection when the app shuts down
     await rate_limiter.close()
+    await auth_sessions.close()
+    await subscription_hub.close()
+    await book_streams.close()
+    await markets_catalog.close()
+    await fee_service.close()
+    await ticker_tables.close()
+    await order_book_engine.close()
+    await exchange_registry.close()
+    request_scheduler.close()
+    mongo_pool.close()
 
 
 # FastAPI app instance with lifespan
@@ -47,13 +73,16 @@ app.add_middleware(
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
 )
-app.add_middleware(JWTAuthMiddleware)
+# The last middleware added runs first: authenticate before rate limiting so
+# limits apply per user and tier
 app.add_middleware(RateLimiterMiddleware)
+app.add_middleware(JWTAuthMiddleware)
 app.include_router(quotes.router, prefix="/api/v1/quotes", tags=["Quotes"])
 app.include_router(orders.router, prefix="/api/v1/orders", tags=["Orders"])
 app.include_router(documents.router, prefix="/api/v1/documents", tags=["Documents"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(exchange.router, prefix="/api/v1/exchange", tags=["Exchange"])
+app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["Metrics"])
 app.include_router(websocket_quote_router)
 
 
@@ -0,0 +1,44 @@
+from typing import Callable, Dict, Iterable, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.types import Receive, Scope, Send
+
+# Close code sent to a websocket rejected during the handshake
+WS_POLICY_VIOLATION = 1008
+
+
+def compile_path_matcher(
+    paths: Iterable[str], optional_prefix: str = ""
+) -> Callable[[str], bool]:
+    """
+    Return a function telling whether a request path is one of ``paths``,
+    with or without ``optional_prefix`` (e.g. "/api/v1"), as a single set
+    lookup.
+    """
+    paths = list(paths)
+    exact = frozenset(paths + [optional_prefix + path for path in paths])
+    return exact.__contains__
+
+
+async def reject(
+    scope: Scope,
+    receive: Receive,
+    send: Send,
+    status_code: int,
+    message: str,
+    headers: Optional[Dict[str, str]] = None,
+):
+    """
+    Refuse a request before it reaches the app: a JSON error for HTTP, a
+    close during the handshake (seen by the client as HTTP 403) for
+    websockets.
+    """
+    if scope["type"] == "websocket":
+        await send(
+            {"type": "websocket.close", "code": WS_POLICY_VIOLATION, "reason": message}
+        )
+        return
+    response = JSONResponse(
+        status_code=status_code, content={"message": message}, headers=headers
+    )
+    await response(scope, receive, send)
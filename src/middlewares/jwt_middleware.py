@@ -1,14 +1,16 @@
 from datetime import datetime, timezone
+from typing import List
 
 import jwt
-from fastapi import HTTPException, Request
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from src.middlewares.asgi import compile_path_matcher, reject
 from src.services.auth_service import get_user_by_id
+from src.services.auth_sessions import auth_sessions
 from src.utils.config import Config
-from src.utils.logger import setup_logger
-from src.utils.mongo_utils import get_db
+from src.utils.logger import log_throttle, setup_logger
+from src.utils.mongo_utils import get_database
 
 logger = setup_logger("jwt_middleware", "logs/jwt_middleware.log")
 
@@ -29,66 +31,78 @@ SECRET_KEY = Config.AUTH_SECURITY_KEY
 ALGORITHM = Config.ALGORITHM
 
 
-class JWTAuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint):
-        # Log the incoming request path
-        logger.info(f"Processing request path: {request.url.path}")
-        url_path = request.url.path
-        if "/api/v1" in url_path:
-            url_path = url_path.replace("/api/v1", "")
-        print(url_path)
-        if url_path in EXCLUDED_PATHS:
-            logger.info(f"Skipping JWT authentication for {request.url.path}")
-            return await call_next(request)
-
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            logger.warning("Authorization header missing or invalid")
-            return JSONResponse(
-                status_code=401,
-                content={"message": "Authorization header missing or invalid"},
+async def load_user(user_id: str):
+    return await get_user_by_id(user_id, db=get_database())
+
+
+class JWTAuthMiddleware:
+    """
+    Pure ASGI middleware authenticating HTTP requests and websocket
+    handshakes with a bearer JWT (websocket clients that cannot set headers
+    may pass it as the ``token`` query parameter). The authenticated user is
+    stored as ``request.state.user`` and the verified token claims (roles,
+    tier) as ``request.state.claims``; streaming responses pass through
+    untouched. Users come from ``auth_sessions``, which checks revocation
+    and only reads the database on a cache miss.
+    """
+
+    def __init__(self, app: ASGIApp, excluded_paths: List[str] = EXCLUDED_PATHS):
+        self.app = app
+        self.is_excluded = compile_path_matcher(excluded_paths, "/api/v1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        if self.is_excluded(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        connection = HTTPConnection(scope)
+        auth_header = connection.headers.get("Authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            token = auth_header.split(" ")[1]
+        elif scope["type"] == "websocket" and connection.query_params.get("token"):
+            token = connection.query_params["token"]
+        else:
+            log_throttle.warning(
+                logger, "missing_token", "Authorization header missing or invalid"
+            )
+            return await reject(
+                scope, receive, send, 401, "Authorization header missing or invalid"
             )
 
-        token = auth_header.split(" ")[1]
-        print(token)
+        payload = {}
         try:
             # Decode JWT token
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            print(payload)
-            logger.info("JWT token decoded successfully")
 
             # Check if token has expired
             if payload.get("exp") < datetime.now(timezone.utc).timestamp():
                 logger.warning(f"Token expired for user: {payload.get('sub')}")
-                raise HTTPException(status_code=401, detail="Token expired")
+                return await reject(scope, receive, send, 401, "Token expired")
 
             user_id = payload.get("sub")
             if not user_id:
                 logger.error("Token payload missing user ID")
-                raise HTTPException(
-                    status_code=401, detail="Token payload missing user ID"
+                return await reject(
+                    scope, receive, send, 401, "Token payload missing user ID"
                 )
-            print(user_id)
-            # Fetch the user from the database
-            async for db in get_db():
-                user = await get_user_by_id(user_id, db=db)
-                if not user:
-                    logger.error(f"User with ID {user_id} not found")
-                    raise HTTPException(status_code=401, detail="Invalid user")
-
-            # Log successful authentication
-            logger.info(f"User {user_id} authenticated successfully")
-            request.state.user = user
+            # The user is read from the database only on a cache miss
+            user = await auth_sessions.principal(payload, load_user)
+            if not user:
+                logger.error(f"User with ID {user_id} not found or token revoked")
+                return await reject(scope, receive, send, 401, "Invalid user")
         except jwt.ExpiredSignatureError:
             logger.warning(f"Expired token used by user: {payload.get('sub')}")
-            return JSONResponse(
-                status_code=401, content={"message": "Token has expired"}
-            )
+            return await reject(scope, receive, send, 401, "Token has expired")
         except jwt.InvalidTokenError:
-            logger.warning("Invalid token provided")
-            return JSONResponse(status_code=401, content={"message": "Invalid token"})
+            log_throttle.warning(logger, "invalid_token", "Invalid token provided")
+            return await reject(scope, receive, send, 401, "Invalid token")
         except Exception as e:
             logger.error(f"Error in JWT middleware: {str(e)}")
-            return JSONResponse(status_code=500, content={"message": str(e)})
+            return await reject(scope, receive, send, 500, str(e))
 
-        return await call_next(request)
+        state = scope.setdefault("state", {})
+        state["user"] = user
+        state["claims"] = payload
+        await self.app(scope, receive, send)
@@ -1,47 +1,306 @@
-from fastapi import HTTPException, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import math
+import time
+from typing import Dict, List, Optional, Tuple
 
-from src.utils.logger import setup_logger
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.middlewares.asgi import reject
+from src.utils.config import Config
+from src.utils.local_cache import LocalCache
+from src.utils.logger import log_throttle, setup_logger
 from src.utils.redis_utils import RedisCache
 
 logger = setup_logger("rate_limiter", "logs/rate_limiter.log")
 
+SLIDING_WINDOW = "sliding_window"
+TOKEN_BUCKET = "token_bucket"
+
+# Sliding window counter: the previous window's count weighted by how much of
+# it still overlaps the sliding window, plus the current window's count.
+# KEYS: current window, previous window. ARGV: limit, window_ms, elapsed_ms,
+# cost. Returns {allowed, remaining, retry_after_ms, reset_ms}.
+_SLIDING_WINDOW = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local current = tonumber(redis.call('get', KEYS[1]) or '0')
+local previous = tonumber(redis.call('get', KEYS[2]) or '0')
+local used = previous * (window - elapsed) / window + current
+if used + cost > limit then
+    local retry = window - elapsed
+    if previous > 0 and current + cost <= limit then
+        retry = math.ceil((used + cost - limit) * window / previous)
+    end
+    return {0, math.max(0, math.floor(limit - used)), retry, window - elapsed}
+end
+if redis.call('incrby', KEYS[1], cost) == cost then
+    redis.call('pexpire', KEYS[1], window * 2)
+end
+return {1, math.floor(limit - used - cost), 0, window - elapsed}
+"""
+
+# Token bucket holding up to ``limit`` tokens, refilled at limit/window.
+# KEYS: bucket. ARGV: limit, window_ms, now_ms, cost.
+# Returns {allowed, remaining, retry_after_ms, reset_ms}.
+_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = capacity / tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('hmget', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry = math.ceil((cost - tokens) / rate)
+end
+redis.call('hset', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('pexpire', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), retry, math.ceil((capacity - tokens) / rate)}
+"""
+
+
+class RateLimitPolicy:
+    def __init__(
+        self,
+        name: str,
+        prefix: str,
+        limit: int,
+        window: int,
+        algorithm: str = SLIDING_WINDOW,
+    ):
+        if algorithm not in (SLIDING_WINDOW, TOKEN_BUCKET):
+            raise ValueError(f"Unknown rate limit algorithm {algorithm}")
+        self.name = name
+        self.prefix = prefix
+        self.limit = limit
+        self.window = window
+        self.algorithm = algorithm
+
+
+def parse_policies(spec: str) -> List[RateLimitPolicy]:
+    """Parse ``name=prefix:limit/window:algorithm`` items separated by commas."""
+    policies = []
+    for item in spec.split(","):
+        if not item:
+            continue
+        name, rule = item.split("=", 1)
+        prefix, rate, algorithm = rule.rsplit(":", 2)
+        limit, window = rate.split("/", 1)
+        policies.append(
+            RateLimitPolicy(name, prefix, int(limit), int(window), algorithm)
+        )
+    return policies
+
+
+class RateDecision:
+    def __init__(
+        self,
+        policy: RateLimitPolicy,
+        limit: int,
+        allowed: bool,
+        remaining: int,
+        retry_after: float,
+        reset: float,
+    ):
+        self.policy = policy
+        self.limit = limit
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+        self.reset = reset
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(self.remaining, 0)),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+            "RateLimit-Policy": f"{self.limit};w={self.policy.window}",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return headers
+
+
+class RateLimiter:
+    """
+    Per route group and per client request limits enforced in Redis.
+
+    Every request is checked with one Lua script call, so counting and
+    deciding happen atomically in a single round trip: a sliding window
+    counter for most routes, a token bucket where bursts are acceptable.
+    Authenticated users are limited per user id, with the policy limit
+    scaled by their tier; anonymous clients per address (the
+    ``trusted_hops``-th X-Forwarded-For entry from the right when behind
+    proxies). Once a client is rejected it is remembered in-process until
+    its retry time, so a client hammering the API is turned away without
+    touching Redis. If Redis is unavailable requests are let through.
+    """
+
+    def __init__(
+        self,
+        policies: List[RateLimitPolicy],
+        tiers: Optional[Dict[str, float]] = None,
+        trusted_hops: int = 0,
+        prefix: str = "rate_limit",
+        blocked_size: int = 10_000,
+    ):
+        # Longest prefix first so the most specific route group wins
+        self.policies = sorted(policies, key=lambda p: len(p.prefix), reverse=True)
+        self.tiers = tiers or {}
+        self.trusted_hops = trusted_hops
+        self.prefix = prefix
+        self.redis = RedisCache(local_size=0)
+        self.blocked = LocalCache(max_size=blocked_size)
+        self.allowed = 0
+        self.rejected = 0
+        self.rejected_locally = 0
+        self.errors = 0
 
-class RateLimiterMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, rate_limit: int = 60, window: int = 60):  # 60 sec
-        super().__init__(app)
-        self.rate_limit = rate_limit  # Max number of requests allowed per window
-        self.window = window  # Time window in seconds
-        self.redis = RedisCache(window)
+    def policy_for(self, path: str) -> Optional[RateLimitPolicy]:
+        for policy in self.policies:
+            if path.startswith(policy.prefix):
+                return policy
+        return None
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        # Initialize Redis connection pool
-        client_ip = request.client.host
-        redis_key = f"rate_limit:{client_ip}"
+    def client_ip(self, request: HTTPConnection) -> str:
+        forwarded = request.headers.get("x-forwarded-for")
+        if self.trusted_hops and forwarded:
+            hops = [hop.strip() for hop in forwarded.split(",")]
+            if len(hops) >= self.trusted_hops:
+                return hops[-self.trusted_hops]
+        return request.client.host if request.client else "unknown"
+
+    def identity(self, request: HTTPConnection) -> Tuple[str, float]:
+        """Return the key a request is counted under and its limit multiplier."""
+        user = getattr(request.state, "user", None)
+        if user and user.get("_id"):
+            tier = user.get("user_tier") or "basic"
+            return f"user:{user['_id']}", self.tiers.get(tier, 1.0)
+        return f"ip:{self.client_ip(request)}", 1.0
+
+    async def hit(
+        self, request: HTTPConnection, cost: int = 1
+    ) -> Optional[RateDecision]:
+        policy = self.policy_for(request.scope["path"])
+        if policy is None:
+            return None
+        identity, multiplier = self.identity(request)
+        limit = max(int(policy.limit * multiplier), 1)
+        key = f"{self.prefix}:{policy.name}:{identity}"
+
+        now = time.time()
+        blocked_until = self.blocked.get(key)
+        if blocked_until is not None and blocked_until > now:
+            self.rejected_locally += 1
+            return RateDecision(
+                policy, limit, False, 0, blocked_until - now, blocked_until - now
+            )
 
         try:
-            # Get current request count from Redis
-            current_count = await self.redis.get(redis_key)
-
-            if current_count is None:
-                # First request, set the initial count to 1 and set the expiration time
-                await self.redis.set(redis_key, 1)
-            else:
-                current_count = int(current_count)
-                if current_count >= self.rate_limit:
-                    # Exceeded rate limit
-                    raise HTTPException(
-                        status_code=429,
-                        detail="Too many requests, please slow down.",
-                    )
-                else:
-                    await self.redis.incr(redis_key)
-            return await call_next(request)
+            allowed, remaining, retry_ms, reset_ms = await self._evaluate(
+                policy, key, limit, int(now * 1000), cost
+            )
         except Exception as e:
-            logger.error(f"Error during rate limiting: {e}")
-            return Response(status_code=500, content="Internal server error")
+            self.errors += 1
+            log_throttle.error(
+                logger, "rate_limit_check", f"Rate limit check failed, allowing: {e}"
+            )
+            return None
+
+        if not allowed:
+            self.rejected += 1
+            self.blocked.set(key, now + retry_ms / 1000, retry_ms / 1000)
+        else:
+            self.allowed += 1
+        return RateDecision(
+            policy, limit, bool(allowed), remaining, retry_ms / 1000, reset_ms / 1000
+        )
+
+    async def _evaluate(
+        self, policy: RateLimitPolicy, key: str, limit: int, now_ms: int, cost: int
+    ) -> List[int]:
+        window_ms = policy.window * 1000
+        if policy.algorithm == TOKEN_BUCKET:
+            return await self.redis.run_script(
+                _TOKEN_BUCKET, [key], [limit, window_ms, now_ms, cost]
+            )
+        index, elapsed = divmod(now_ms, window_ms)
+        # The hash tag keeps both windows in one cluster slot
+        keys = [f"{{{key}}}:{index}", f"{{{key}}}:{index - 1}"]
+        return await self.redis.run_script(
+            _SLIDING_WINDOW, keys, [limit, window_ms, elapsed, cost]
+        )
+
+    def stats(self) -> dict:
+        return {
+            "policies": {
+                policy.name: {
+                    "prefix": policy.prefix,
+                    "limit": policy.limit,
+                    "window": policy.window,
+                    "algorithm": policy.algorithm,
+                }
+                for policy in self.policies
+            },
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "rejected_locally": self.rejected_locally,
+            "errors": self.errors,
+            "blocked_clients": len(self.blocked),
+        }
 
     async def close(self):
-        """Close Redis connection pool gracefully when shutting down."""
-        if self.redis is not None:
-            await self.redis.close()
+        await self.redis.close()
+
+
+rate_limiter = RateLimiter(
+    parse_policies(Config.RATE_LIMIT_POLICIES),
+    tiers=Config.RATE_LIMIT_TIERS,
+    trusted_hops=Config.RATE_LIMIT_TRUSTED_HOPS,
+)
+
+
+class RateLimiterMiddleware:
+    """
+    Pure ASGI middleware applying ``RateLimiter`` to HTTP requests and
+    websocket handshakes, adding the ``RateLimit-*`` headers to HTTP
+    responses without buffering them.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        decision = await self.limiter.hit(HTTPConnection(scope))
+        if decision is None:
+            return await self.app(scope, receive, send)
+        if not decision.allowed:
+            return await reject(
+                scope,
+                receive,
+                send,
+                429,
+                "Too many requests, please slow down.",
+                decision.headers(),
+            )
+        if scope["type"] == "websocket":
+            return await self.app(scope, receive, send)
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(decision.headers())
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,12 +1,26 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src.models.BestPriceModel import BestPriceData
 from src.models.OrderBookDataModel import OrderBookData
 
 
+class VenueStatus(BaseModel):
+    exchange: str = Field(..., description="The exchange that was queried.")
+    status: Literal["ok", "timeout", "error"] = Field(
+        ..., description="Outcome of the order book request for this exchange."
+    )
+    latency_ms: float = Field(
+        ..., description="Time spent waiting on this exchange in milliseconds."
+    )
+    error: Optional[str] = Field(None, description="Error detail when not ok.")
+
+
 class PriceEngineData(BaseModel):
     best_bid: BestPriceData
     best_ask: BestPriceData
     exchange_data: Optional[List[OrderBookData]]
+    venues: Optional[List[VenueStatus]] = Field(
+        None, description="Per-exchange status of the aggregated request."
+    )
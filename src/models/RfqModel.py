@@ -0,0 +1,47 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from src.models.PriceEngineDataModel import VenueStatus
+
+
+class VenueFill(BaseModel):
+    exchange: str = Field(..., description="The exchange providing this fill.")
+    base_amount: float = Field(..., description="Base amount filled on the exchange.")
+    quote_amount: float = Field(
+        ..., description="Quote notional at exchange prices, before fees."
+    )
+    average_price: float = Field(..., description="Average exchange price.")
+    fee_rate: float = Field(..., description="Taker fee rate applied on the exchange.")
+
+
+class RfqQuote(BaseModel):
+    symbol: str
+    side: Literal["buy", "sell"] = Field(
+        ..., description="Client side: buy lifts consolidated asks, sell hits bids."
+    )
+    amount: float = Field(..., description="Requested amount.")
+    amount_type: Literal["base", "quote"] = Field(
+        ..., description="Whether the amount is in base or quote currency."
+    )
+    price: Optional[float] = Field(
+        None, description="All-in price including exchange fees and markup."
+    )
+    base_amount: float = Field(..., description="Base amount that can be filled.")
+    quote_amount: float = Field(
+        ..., description="All-in quote notional for the filled base amount."
+    )
+    fully_filled: bool = Field(
+        ..., description="False when consolidated depth cannot cover the amount."
+    )
+    reference_price: Optional[float] = Field(
+        None, description="Best consolidated exchange price before fees."
+    )
+    slippage_bps: Optional[float] = Field(
+        None, description="Cost of walking the book versus the reference price."
+    )
+    markup_rate: float = Field(..., description="Desk markup applied on the price.")
+    fills: List[VenueFill] = Field(default=[], description="Per-exchange breakdown.")
+    venues: Optional[List[VenueStatus]] = Field(
+        None, description="Per-exchange status of the order book requests."
+    )
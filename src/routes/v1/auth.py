@@ -20,16 +20,17 @@ from src.services.auth_service import (
     add_user_collection,
     authenticate_email,
     authenticate_otp,
-    create_access_token,
     disable_two_factor,
     enable_two_factor,
     get_user_by_id,
+    issue_token,
     send_otp,
     update_kyc_data,
 )
+from src.services.auth_sessions import auth_sessions
 from src.services.email_service import send_email
-from src.utils import has_role
 from src.utils.config import Config
+from src.utils.has_role import has_role
 from src.utils.logger import setup_logger
 from src.utils.mongo_utils import get_db
 
@@ -70,7 +71,7 @@ async def register(
         send_register_email(request, background_tasks, user)
         return response
     except ValueError as e:
-        print(e)
+        logger.error(f"register: {e}")
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
@@ -99,14 +100,42 @@ async def refresh_token_router(request: Request):
         user = request.state.user
         if not user:
             raise HTTPException(status_code=401, detail="Invalid user")
-        token_data = {"sub": str(user["_id"]), "email": user["email"]}
-        new_access_token = await create_access_token(data=token_data)
+        new_access_token = await issue_token(user)
         return {"access_token": new_access_token, "token_type": "bearer"}
 
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e)) from e
 
 
+@router.post("/logout")
+async def logout(request: Request, all_sessions: bool = False):
+    """
+    Revokes the access token used for this request.
+
+    The token is added to the revocation set until it expires. With
+    ``all_sessions`` every token issued to the user so far is revoked.
+
+    Args:
+        request (Request): The HTTP request object containing the token claims.
+        all_sessions (bool): Whether to revoke all of the user's tokens.
+
+    Returns:
+        dict: A message confirming the logout.
+
+    Raises:
+        HTTPException: If the request is not authenticated.
+    """
+
+    claims = getattr(request.state, "claims", None)
+    if not claims:
+        raise HTTPException(status_code=401, detail="Invalid user")
+    if all_sessions:
+        await auth_sessions.bump(claims["sub"])
+    else:
+        await auth_sessions.revoke(claims)
+    return {"message": "Logged out"}
+
+
 @router.post("/login", status_code=status.HTTP_200_OK)
 async def login(
     request: Request,
@@ -156,7 +185,7 @@ async def login(
         send_login_email(request, background_tasks, user["profile"])
         return user
     except Exception as e:
-        print(e)
+        logger.error(f"login: {e}")
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
@@ -468,7 +497,6 @@ def send_login_email(request, background_tasks, user):
             )
             background_tasks.add_task(send_email, email)
     except Exception as e:
-        print(e)
         logger.error(f"send_login_email {e}")
 
 
@@ -498,5 +526,4 @@ def send_register_email(request, background_tasks, user):
             )
             background_tasks.add_task(send_email, email)
     except Exception as e:
-        print(e)
         logger.error(f"send_register_email {e}")
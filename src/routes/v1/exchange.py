@@ -8,18 +8,19 @@ from src.services.connect_exchange_service import (
     bulk_add_exchange_key,
     get_user_exchange_keys,
 )
+from src.utils.logger import setup_logger
 from src.utils.mongo_utils import get_db
 
 router = APIRouter()
+logger = setup_logger("exchange_router", "logs/exchange_router.log")
 
 
 @router.get("/user-exchange-keys")
 async def load_user_exchange_keys(request: Request, db=Depends(get_db)):
     try:
-        print(request.state.user)
         return await get_user_exchange_keys(request.state.user._id, db)
     except Exception as e:
-        print(e)
+        logger.error(f"load_user_exchange_keys: {e}")
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
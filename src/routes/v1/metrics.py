@@ -0,0 +1,73 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from src.data.backfill import backfill_engine
+from src.data.candle_store import candle_store
+from src.middlewares.rate_limiter import rate_limiter
+from src.services.auth_sessions import auth_sessions
+from src.services.connect_exchange_service import exchange_registry, request_scheduler
+from src.services.fee_service import fee_service
+from src.services.markets_catalog import markets_catalog
+from src.services.order_book_engine import order_book_engine
+from src.services.quote_service import cache
+from src.services.ticker_table import ticker_tables
+from src.utils.has_role import has_role
+from src.utils.logger import logging_stats
+from src.utils.mongo_utils import mongo_pool
+from src.utils.responses import encoded_cache
+from src.utils.single_flight import single_flight_stats
+from src.websockets.book_stream import book_streams
+from src.websockets.connection_manager import connection_manager
+from src.websockets.subscription_hub import subscription_hub
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_metrics(request: Request):
+    """
+    Returns runtime metrics for the market data path.
+
+    Metrics include client addresses and API key prefixes, so they are only
+    served to users with the 'admin' role.
+
+    Args:
+        request (Request): The HTTP request object containing user information and roles.
+
+    Returns:
+        dict: State and counters of each subsystem: exchange client pool,
+        request scheduler, order book engine, ticker tables, markets
+        catalog, fee table, websocket upstream watchers, Redis fan-out, book
+        streams and clients, single-flight coalescing, caches, candle store,
+        backfill, rate limiting, authentication, the logging queue and the
+        MongoDB connection pool.
+
+    Raises:
+        HTTPException: If the requester does not have the 'admin' role, a 403 status code is raised.
+    """
+
+    user = getattr(request.state, "user", None)
+    if not user or not has_role(user, ["admin"]):
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return {
+        "exchange_registry": exchange_registry.stats(),
+        "request_scheduler": request_scheduler.stats(),
+        "order_book_engine": order_book_engine.stats(),
+        "ticker_tables": ticker_tables.stats(),
+        "markets_catalog": markets_catalog.stats(),
+        "fees": fee_service.stats(),
+        "websocket_upstreams": subscription_hub.stats(),
+        "websocket_fanout": (
+            subscription_hub.fanout.stats() if subscription_hub.fanout else None
+        ),
+        "websocket_book_streams": book_streams.stats(),
+        "websocket_clients": connection_manager.stats(),
+        "single_flight": single_flight_stats(),
+        "cache": cache.stats(),
+        "encoded_responses": encoded_cache.stats(),
+        "candle_store": candle_store.stats(),
+        "backfill": backfill_engine.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "auth_sessions": auth_sessions.stats(),
+        "logging": logging_stats(),
+        "mongo_pool": mongo_pool.stats(),
+    }
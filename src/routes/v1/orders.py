@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 
 from src.models.OrderBookDataModel import OrderBookData
 from src.services.quote_service import fetch_order_book
+from src.utils.responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -15,6 +16,6 @@ async def get_order_book(exchange_name: str = "Kraken", symbol: str = "BTCUSD"):
                 status_code=404,
                 detail=f"Order book not found for symbol {symbol}",
             )
-        return order_book
+        return FastJSONResponse(order_book)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
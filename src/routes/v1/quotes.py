@@ -1,17 +1,21 @@
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from src.models.OHLCVDataModel import OHLCVData
 from src.models.PriceEngineDataModel import PriceEngineData
+from src.models.RfqModel import RfqQuote
 from src.models.TickerDataModel import TickerData
+from src.services.markets_catalog import markets_catalog
 from src.services.quote_service import (
     aggregated_market_data,
     fetch_historical_data,
     fetch_ticker,
-    fetch_tickers,
-    load_markets,
 )
+from src.services.rfq_service import quote_rfq
+from src.services.ticker_table import ticker_tables
+from src.utils.config import Config
+from src.utils.responses import FastJSONResponse, etag_matches
 
 router = APIRouter()
 
@@ -46,14 +50,18 @@ async def get_ticker(symbol: str = "BTCUSD"):
             raise HTTPException(
                 status_code=404, detail=f"Ticker data not found for {symbol}"
             )
-        return ticker_data
+        return FastJSONResponse(ticker_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
 @router.get("/historical/{symbol}", response_model=List[OHLCVData])
 async def get_historical_data(
-    symbol: str = "BTCUSD", time_frame: str = "1h", since: int = None
+    symbol: str = "BTCUSD",
+    time_frame: str = "1h",
+    since: int = None,
+    until: int = None,
+    limit: Optional[int] = Query(None, gt=0, le=Config.CANDLE_MAX_LIMIT),
 ):
     """
     Retrieves historical data for a specified cryptocurrency symbol over a given time frame.
@@ -69,7 +77,13 @@ async def get_historical_data(
         symbol (str): The cryptocurrency symbol for which to fetch
         historical data. Defaults to 'BTCUSD'.
         time_frame (str): The time frame for the historical data. Defaults to '1h'.
+        Any fixed-width timeframe (e.g. '2h', '3d') is resampled from stored candles.
         since (int): An optional parameter to specify the starting point for the historical data.
+        until (int): Optional end of the range in milliseconds (exclusive).
+        Defaults to the latest closed candle.
+        limit (int): Optional maximum number of candles to return, at most
+        CANDLE_MAX_LIMIT. Without it a request still returns at most
+        CANDLE_MAX_LIMIT candles from ``since``.
 
     Returns:
         HistoricalData: The historical data for the specified cryptocurrency symbol.
@@ -80,19 +94,26 @@ async def get_historical_data(
     """
 
     try:
-        historical_data = await fetch_historical_data(symbol, time_frame, since)
+        historical_data = await fetch_historical_data(
+            symbol, time_frame, since, until, limit
+        )
         if historical_data is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Historical data not found for {symbol}",
             )
-        return historical_data
+        return FastJSONResponse(historical_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
 @router.get("/aggregated/{symbol}", response_model=PriceEngineData)
-async def get_aggregated_market_data(symbol: str = "BTCUSD"):
+async def get_aggregated_market_data(
+    symbol: str = "BTCUSD",
+    timeout: Optional[float] = Query(
+        None, gt=0, le=Config.AGGREGATION_MAX_TIMEOUT_SECONDS
+    ),
+):
     """
     Retrieves historical data for a specified cryptocurrency symbol over a given time frame.
     If the historical data is not found, it raises a 404 HTTP exception.
@@ -106,11 +127,12 @@ async def get_aggregated_market_data(symbol: str = "BTCUSD"):
     Args:
         symbol (str): The cryptocurrency symbol for which to fetch
         historical data. Defaults to 'BTCUSD'.
-        time_frame (str): The time frame for the historical data. Defaults to '1h'.
-        since (int): An optional parameter to specify the starting point for the historical data.
+        timeout (float): Optional deadline in seconds shared by all exchanges,
+        at most AGGREGATION_MAX_TIMEOUT_SECONDS. Exchanges that miss it are
+        reported with a timeout status in `venues`.
 
     Returns:
-        HistoricalData: The historical data for the specified cryptocurrency symbol.
+        PriceEngineData: Best bid/ask across exchanges with per-exchange status.
 
     Raises:
         HTTPException: If the historical data is not found, a 404 status code is raised.
@@ -118,49 +140,79 @@ async def get_aggregated_market_data(symbol: str = "BTCUSD"):
     """
 
     try:
-        aggregate_data = await aggregated_market_data(symbol)
+        aggregate_data = await aggregated_market_data(symbol, timeout)
         if aggregate_data is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Aggregate Market data is not found for {symbol}",
             )
-        return aggregate_data
+        return FastJSONResponse(aggregate_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
 @router.get("/exchange_tickers/{exchange_name}", response_model=List[TickerData])
-async def get_exchange_tickers(exchange_name: str = "Kraken"):
+async def get_exchange_tickers(
+    request: Request,
+    exchange_name: str = "Kraken",
+    quote: Optional[str] = None,
+    min_volume: Optional[float] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=0),
+):
     """
     Retrieves the ticker data for all cryptocurrencies available on a specified exchange.
     If no tickers are found for the given exchange, it raises a 404 HTTP exception.
 
-    This asynchronous function fetches the ticker information
-    for the specified exchange and returns it in the response.
-    If an error occurs during the fetching process or if no
-    tickers are available, it raises an appropriate
-    HTTP exception with a relevant status code and message.
+    Tickers are served from an in-memory table that is refreshed in the
+    background, so the response does not wait on the exchange. The encoded
+    body carries an ETag; a request whose If-None-Match header lists it
+    (weak or strong, or ``*``) gets an empty 304 response.
 
     Args:
         exchange_name (str): The name of the exchange for
         which to fetch ticker data. Defaults to "Kraken".
+        quote (str): Only return symbols quoted in this currency, e.g. 'USD'.
+        min_volume (float): Only return tickers with at least this quote volume.
+        sort (str): Field to sort by, prefixed with '-' for descending order,
+        e.g. '-quoteVolume'.
+        fields (str): Comma-separated fields to include, e.g. 'symbol,last'.
+        limit (int): Maximum number of tickers to return.
 
     Returns:
         List[TickerData]: A list of ticker data for the specified exchange.
 
     Raises:
-        HTTPException: If no tickers are found for
-        the specified exchange, a 404 status code is raised.
+        HTTPException: If the exchange is not configured or no tickers are
+        found for it, a 404 status code is raised.
+        If a filter, sort or field is invalid, a 400 status code is raised.
         If any other error occurs, a 500 status code is raised.
     """
     try:
-        tickers = await fetch_tickers(exchange_name)
-        if tickers is None:
+        table = await ticker_tables.get_table(exchange_name)
+        if table is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"No tickers found for {exchange_name}",
             )
-        return tickers
+        rendered = table.render(
+            quote=quote,
+            min_volume=min_volume,
+            sort=sort,
+            fields=fields.split(",") if fields else None,
+            limit=limit,
+        )
+        headers = {"ETag": rendered.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), rendered.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=rendered.body, media_type="application/json", headers=headers
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -170,10 +222,9 @@ async def get_markets(exchange_name: str = "Kraken"):
     """
     Retrieves market data for a specified exchange.
 
-    This asynchronous function fetches the available
-    markets from the given exchange name, defaulting
-    to "Kraken" if no exchange name is provided.
-    It returns the market data or raises an error if the markets cannot be loaded.
+    Markets are served from the in-memory catalog, which is loaded at
+    startup, refreshed in the background and keeps fee-adjusted taker/maker
+    rates precomputed. Exchanges not loaded yet are loaded on first request.
 
     Args:
         exchange_name (str): The name of the exchange
@@ -188,11 +239,52 @@ async def get_markets(exchange_name: str = "Kraken"):
     """
 
     try:
-        markets = await load_markets(exchange_name)
-        if markets is None:
+        entry = await markets_catalog.get(exchange_name)
+        return FastJSONResponse(entry.body)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@router.get("/rfq/{symbol}", response_model=RfqQuote)
+async def get_rfq_quote(
+    symbol: str = "BTCUSD",
+    side: Literal["buy", "sell"] = "buy",
+    amount: float = 1.0,
+    amount_type: Literal["base", "quote"] = "base",
+):
+    """
+    Prices a request for quote of a given size against the consolidated book.
+
+    This asynchronous function walks the consolidated asks (for a buy) or bids
+    (for a sell) across all configured exchanges, applying each exchange's
+    taker fee adjusted by its fee record plus the desk markup
+    (RFQ_MARKUP_RATE), and returns the all-in price together with the
+    per-exchange fill breakdown and the expected slippage.
+
+    Args:
+        symbol (str): The cryptocurrency symbol to quote. Defaults to 'BTCUSD'.
+        side (str): The client side, 'buy' or 'sell'. Defaults to 'buy'.
+        amount (float): The requested amount. Defaults to 1.0.
+        amount_type (str): Whether `amount` is in 'base' or 'quote' currency.
+
+    Returns:
+        RfqQuote: The all-in quote with per-exchange fills.
+
+    Raises:
+        HTTPException: If no consolidated depth is available, a 404 status code is raised.
+        If any other error occurs, a 500 status code is raised.
+    """
+
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
+    try:
+        rfq_quote = await quote_rfq(symbol, side, amount, amount_type)
+        if rfq_quote is None:
             raise HTTPException(
-                f"Notable to load markets for the exchange {exchange_name} "
+                status_code=404, detail=f"Unable to price {amount} {symbol}"
             )
-        return markets
+        return FastJSONResponse(rfq_quote)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
@@ -10,6 +10,7 @@ from pymongo.errors import BulkWriteError
 
 from src.models.AuthModel import CryptoWallet, KycData, Transaction, User
 from src.models.EmailModel import EmailModel
+from src.services.auth_sessions import CLAIM_FIELDS, auth_sessions, token_claims
 from src.services.email_service import send_email
 from src.services.sms_service import send_sms
 from src.utils.config import Config
@@ -22,7 +23,6 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password, hashed_password):
-    print(hashed_password)
     return pwd_context.verify(plain_password, hashed_password)
 
 
@@ -38,6 +38,16 @@ async def create_access_token(data: dict):
     return jwt.encode(to_encode, Config.AUTH_SECURITY_KEY, algorithm=Config.ALGORITHM)
 
 
+async def issue_token(user: dict):
+    """
+    Sign an access token for ``user`` carrying its roles, tier and current
+    token version, so requests can be authorized without a database read.
+    """
+    user_id = str(user.get("_id") or user.get("id"))
+    version = await auth_sessions.version(user_id)
+    return await create_access_token(data=token_claims(user, version))
+
+
 async def find_user(email: str, phone_number: str, db):
     user_collection = get_users_collection(db=db)
     return await user_collection.find_one(
@@ -75,7 +85,9 @@ def get_user_vm(user: User):
 
 async def delete_user(user_id: str, db):
     user_collection = get_users_collection(db=db)
-    return await user_collection.delete_one({"_id": ObjectId(user_id)})
+    result = await user_collection.delete_one({"_id": ObjectId(user_id)})
+    await auth_sessions.bump(user_id)
+    return result
 
 
 async def add_user(user: User, db):
@@ -91,11 +103,9 @@ async def add_user(user: User, db):
         response = await user_collection.insert_one(user_data)
         user.id = str(response.inserted_id)
         profile = get_user_vm(user)
-        token_data = {"sub": profile["id"], "email": profile["email"]}
-        token = await create_access_token(data=token_data)
+        token = await issue_token(profile)
         return {"token": token, "profile": profile}
     except Exception as e:
-        print(e)
         logger.error(f"add_user: {str(e)}")
         raise ValueError(e) from e
 
@@ -136,18 +146,25 @@ async def add_user_collection(users: List[User], db):
 
 async def update_user(user_id: str, update_data: dict, db) -> User:
     user_collection: Collection = get_users_collection(db)
-    return await user_collection.update_one(
+    result = await user_collection.update_one(
         {"_id": ObjectId(user_id)}, {"$set": update_data}
     )
+    if CLAIM_FIELDS & update_data.keys():
+        await auth_sessions.bump(user_id)
+    else:
+        await auth_sessions.refresh(user_id)
+    return result
 
 
 async def add_crypto_wallet(user_id: str, wallet_data: CryptoWallet, db) -> User:
     try:
         user_collection: Collection = get_users_collection(db)
-        return await user_collection.update_one(
+        result = await user_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$push": {"crypto_wallets": wallet_data.model_dump()}},
         )
+        await auth_sessions.refresh(user_id)
+        return result
     except Exception as e:
         logger.error(f"Failed to add crypto wallet: {e}")
         raise ValueError(e) from e
@@ -156,10 +173,12 @@ async def add_crypto_wallet(user_id: str, wallet_data: CryptoWallet, db) -> User
 async def add_transaction(user_id: str, transaction_data: Transaction, db) -> User:
     try:
         user_collection: Collection = get_users_collection(db)
-        return await user_collection.update_one(
+        result = await user_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$push": {"transaction_history": transaction_data.model_dump()}},
         )
+        await auth_sessions.refresh(user_id)
+        return result
     except Exception as e:
         logger.error(f"Failed to add transaction: {e}")
         raise ValueError(e) from e
@@ -168,10 +187,12 @@ async def add_transaction(user_id: str, transaction_data: Transaction, db) -> Us
 async def update_kyc_data(user_id: str, kyc_data: KycData, db) -> User:
     try:
         user_collection: Collection = get_users_collection(db)
-        return await user_collection.update_one(
+        result = await user_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$push": {"kyc_data": kyc_data.model_dump()}},
         )
+        await auth_sessions.refresh(user_id)
+        return result
     except Exception as e:
         logger.error(f"Failed to add transaction: {e}")
         raise ValueError(e) from e
@@ -180,10 +201,12 @@ async def update_kyc_data(user_id: str, kyc_data: KycData, db) -> User:
 async def enable_two_factor(user_id: str, method: str, db) -> User:
     try:
         user_collection: Collection = get_users_collection(db)
-        return await user_collection.update_one(
+        result = await user_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"two_factor_enabled": True, "two_factor_method": method}},
         )
+        await auth_sessions.bump(user_id)
+        return result
     except Exception as e:
         logger.error(f"Failed to add transaction: {e}")
         raise ValueError(e) from e
@@ -192,10 +215,12 @@ async def enable_two_factor(user_id: str, method: str, db) -> User:
 async def disable_two_factor(user_id: str, db) -> User:
     try:
         user_collection: Collection = get_users_collection(db)
-        return await user_collection.update_one(
+        result = await user_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"two_factor_enabled": True, "two_factor_method": None}},
         )
+        await auth_sessions.bump(user_id)
+        return result
     except Exception as e:
         logger.error(f"Failed to add transaction: {e}")
         raise ValueError(e) from e
@@ -213,11 +238,9 @@ async def authenticate_email(email: str, password: str, db) -> Union[dict, None]
             raise ValueError("Invalid Password")
         response["id"] = str(response["_id"])
         profile = get_user_vm(User(**response))
-        token_data = {"sub": profile["id"], "email": profile["email"]}
-        token = await create_access_token(data=token_data)
+        token = await issue_token(profile)
         return {"token": token, "profile": profile}
     except Exception as e:
-        print(e)
         logger.error(f"Error during authentication: {e}")
         raise ValueError(e) from e
 
@@ -241,8 +264,7 @@ async def authenticate_otp(phone_number: str, otp: str, db) -> Union[dict, None]
         if otp_record["expires_at"] < datetime.now(timezone.utc):
             raise ValueError("OTP has expired.")
         user.pop("password", None)
-        token_data = {"sub": str(user["_id"]), "email": user["email"]}
-        token = await create_access_token(data=token_data)
+        token = await issue_token(user)
         await otp_collection.delete_one({"_id": otp_record["_id"]})
         return {"token": token, "profile": user}
     except Exception as e:
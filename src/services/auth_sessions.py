@@ -0,0 +1,179 @@
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aioredis
+
+from src.utils.config import Config
+from src.utils.local_cache import LocalCache
+from src.utils.logger import log_throttle, setup_logger
+
+logger = setup_logger("auth_sessions", "logs/auth_sessions.log")
+
+# Changes to these user fields invalidate the claims of issued tokens
+CLAIM_FIELDS = {"roles", "user_tier", "password", "two_factor_enabled"}
+
+
+def token_claims(user: Dict[str, Any], version: int = 0) -> dict:
+    """Claims signed into an access token for ``user`` (a user document)."""
+    user_id = str(user.get("_id") or user.get("id"))
+    return {
+        "sub": user_id,
+        "email": user.get("email"),
+        "roles": [
+            role["role_name"] if isinstance(role, dict) else role.role_name
+            for role in user.get("roles") or []
+        ],
+        "tier": user.get("user_tier") or "basic",
+        "ver": version,
+        "jti": uuid.uuid4().hex,
+    }
+
+
+class AuthSessions:
+    """
+    Keeps authentication off the database on the request path.
+
+    Every user has a version number in Redis, signed into the tokens issued
+    to them. Bumping it (on a role, tier, password or 2FA change) rejects
+    all earlier tokens; a single token is revoked by its ``jti``. Updates
+    that leave the claims valid (wallets, transactions, KYC data) bump a
+    separate data version instead. Each request reads all three with one
+    MGET. The user document (the principal) is cached in-process with the
+    versions it was loaded at, so the database is only read on a cache miss
+    or after either version changed, in any worker. If Redis is unavailable
+    tokens are accepted on their signature and expiry alone, and cached
+    principals may be up to ``principal_ttl`` seconds old.
+    """
+
+    def __init__(
+        self,
+        redis_uri: Optional[str] = None,
+        principal_size: int = 10_000,
+        principal_ttl: float = 60.0,
+        prefix: str = "auth",
+    ):
+        self.redis_uri = redis_uri
+        self.prefix = prefix
+        self.redis = None
+        self.principals = LocalCache(max_size=principal_size, ttl=principal_ttl)
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def _connect(self):
+        if self.redis is None:
+            self.redis = aioredis.from_url(self.redis_uri)
+
+    def _version_key(self, user_id: str) -> str:
+        return f"{self.prefix}:version:{user_id}"
+
+    def _data_version_key(self, user_id: str) -> str:
+        return f"{self.prefix}:data:{user_id}"
+
+    def _revoked_key(self, jti: str) -> str:
+        return f"{self.prefix}:revoked:{jti}"
+
+    async def version(self, user_id: str) -> int:
+        """Current version for ``user_id``, to sign into a new token."""
+        try:
+            self._connect()
+            return int(await self.redis.get(self._version_key(user_id)) or 0)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Failed to read token version of {user_id}: {e}")
+            return 0
+
+    async def principal(
+        self, claims: dict, load: Callable[[str], Awaitable[Optional[dict]]]
+    ) -> Optional[dict]:
+        """
+        Return the user for verified token ``claims``, loading it with
+        ``load(user_id)`` when not cached, or None if the token was revoked
+        or the user does not exist.
+        """
+        user_id = claims["sub"]
+        keys = [self._version_key(user_id), self._data_version_key(user_id)]
+        if claims.get("jti"):
+            keys.append(self._revoked_key(claims["jti"]))
+        versions = None
+        try:
+            self._connect()
+            values = await self.redis.mget(keys)
+            versions = (int(values[0] or 0), int(values[1] or 0))
+            if claims.get("ver", 0) < versions[0] or (len(values) > 2 and values[2]):
+                self.rejected += 1
+                logger.warning(f"Rejected revoked token of user {user_id}")
+                return None
+        except Exception as e:
+            self.errors += 1
+            log_throttle.error(logger, "revocation", f"Revocation check failed: {e}")
+
+        cached = self.principals.get(user_id)
+        if cached is not None and (versions is None or cached[0] == versions):
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        user = await load(user_id)
+        if user:
+            self.principals.set(user_id, (versions or (0, 0), user))
+        return user
+
+    async def bump(self, user_id: str):
+        """Invalidate all tokens issued to ``user_id`` and its cached principal."""
+        self.principals.delete(user_id)
+        try:
+            self._connect()
+            await self.redis.incr(self._version_key(user_id))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Failed to bump token version of {user_id}: {e}")
+
+    async def refresh(self, user_id: str):
+        """Reload the principal of ``user_id`` in every worker, keeping tokens."""
+        self.principals.delete(user_id)
+        try:
+            self._connect()
+            await self.redis.incr(self._data_version_key(user_id))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Failed to bump data version of {user_id}: {e}")
+
+    async def revoke(self, claims: dict):
+        """Revoke a single token until it would have expired anyway."""
+        if not claims.get("jti"):
+            return
+        ttl = max(int(claims.get("exp", 0) - time.time()), 1)
+        try:
+            self._connect()
+            await self.redis.set(self._revoked_key(claims["jti"]), 1, ex=ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Failed to revoke token of {claims.get('sub')}: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "principals": len(self.principals),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+    async def close(self):
+        if self.redis is not None:
+            try:
+                await self.redis.close()
+            except Exception as e:
+                logger.error(f"Failed to close auth sessions Redis: {e}")
+            self.redis = None
+
+
+auth_sessions = AuthSessions(
+    Config.REDIS_URI,
+    principal_size=Config.AUTH_PRINCIPAL_CACHE_SIZE,
+    principal_ttl=Config.AUTH_PRINCIPAL_TTL,
+)
@@ -1,4 +1,11 @@
-from typing import List, Union
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
 import ccxt.async_support as ccxt
 import ccxt.pro as ccxtpro
@@ -8,11 +15,187 @@ from pymongo.errors import ConnectionFailure, PyMongoError
 
 from src.models.ExchangeKeyModel import ExchangeKey
 from src.utils.config import Config
+from src.utils.local_cache import LocalCache
 from src.utils.logger import setup_logger
-from src.utils.mongo_utils import get_api_keys_collection, get_db
+from src.utils.mongo_utils import get_api_keys_collection, get_database
 
 logger = setup_logger("connect_exchange_service", "logs/connect_exchange_service.log")
 
+# Request priority classes, lower is served first
+PRIORITY_EXECUTION = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {
+    PRIORITY_EXECUTION: "execution",
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+}
+
+_request_priority: ContextVar[int] = ContextVar(
+    "request_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run the exchange calls made inside the block at ``priority``."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Rate limit shared by every client of one (exchange, api key).
+
+    Tokens refill at ``refill_rate`` per millisecond up to ``capacity`` and a
+    request of weight ``cost`` is granted once that many tokens are available.
+    Requests heavier than the whole bucket wait for a full bucket and take the
+    balance negative. Waiting requests are granted strictly by priority, then
+    arrival order.
+    """
+
+    def __init__(self, refill_rate: float, capacity: float, max_queue: int = 2000):
+        self.refill_rate = refill_rate
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+        self.granted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.waited = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self.max_depth = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed_ms = (now - self._updated) * 1000
+        self._updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed_ms * self.refill_rate)
+
+    async def acquire(self, cost: float = 1.0, priority: int = PRIORITY_INTERACTIVE):
+        self._refill()
+        if not self._waiters and self.tokens >= min(cost, self.capacity):
+            self.tokens -= cost
+            self.granted[PRIORITY_NAMES[priority]] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise RuntimeError(f"Request queue is full ({self.max_queue})")
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), cost, future)
+        heapq.heappush(self._waiters, entry)
+        self.max_depth = max(self.max_depth, len(self._waiters))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run())
+        started = time.monotonic()
+        try:
+            await future
+        finally:
+            self.waited[PRIORITY_NAMES[priority]] += time.monotonic() - started
+
+    async def _run(self):
+        while self._waiters:
+            priority, _, cost, future = self._waiters[0]
+            if future.done():  # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            self._refill()
+            shortfall = min(cost, self.capacity) - self.tokens
+            if shortfall > 0:
+                await asyncio.sleep(shortfall / self.refill_rate / 1000)
+                continue
+            heapq.heappop(self._waiters)
+            self.tokens -= cost
+            self.granted[PRIORITY_NAMES[priority]] += 1
+            future.set_result(None)
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                depth[PRIORITY_NAMES[priority]] += 1
+        return depth
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "tokens": self.tokens,
+            "capacity": self.capacity,
+            "requests_per_second": self.refill_rate * 1000,
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_depth,
+            "granted": dict(self.granted),
+            "avg_wait_ms": {
+                name: self.waited[name] / count * 1000 if count else 0.0
+                for name, count in self.granted.items()
+            },
+        }
+
+    def cancel(self):
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+
+
+class RequestScheduler:
+    """
+    Central rate limiter for every REST call made with a given api key.
+
+    Each ccxt client built by ``initialize_exchange`` has its throttle replaced
+    by the ``TokenBucket`` of its (exchange, api key), so pooled, websocket and
+    ad-hoc clients sharing a key draw from one budget. Endpoint weights come
+    from ccxt and the refill rate from the exchange's ``rateLimit``. The
+    priority of a call is taken from the ``request_priority`` context, so
+    order execution is served before quotes and quotes before background
+    refreshes.
+    """
+
+    def __init__(self, capacity: Optional[float] = None, max_queue: int = 2000):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def bucket(self, exchange: Exchange, api_key: Optional[str]) -> TokenBucket:
+        key = (exchange.id, api_key or "")
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            token_bucket = exchange.tokenBucket
+            bucket = self._buckets[key] = TokenBucket(
+                refill_rate=token_bucket["refillRate"],
+                capacity=self.capacity or token_bucket["capacity"],
+                max_queue=self.max_queue,
+            )
+        return bucket
+
+    def attach(self, exchange: Exchange, api_key: Optional[str]) -> Exchange:
+        bucket = self.bucket(exchange, api_key)
+
+        def throttle(cost: Optional[float] = None):
+            return bucket.acquire(
+                1.0 if cost is None else cost, _request_priority.get()
+            )
+
+        exchange.throttle = throttle
+        return exchange
+
+    def stats(self) -> dict:
+        return {
+            f"{exchange_id}:{api_key[:6]}": bucket.stats()
+            for (exchange_id, api_key), bucket in self._buckets.items()
+        }
+
+    def close(self):
+        for bucket in self._buckets.values():
+            bucket.cancel()
+
+
+request_scheduler = RequestScheduler(
+    capacity=Config.SCHEDULER_BURST, max_queue=Config.SCHEDULER_MAX_QUEUE
+)
+
 
 def initialize_exchange(api: ExchangeKey, ws: bool = False) -> Union[Exchange, None]:
     if api is None or api.exchange_name.lower() not in ccxt.exchanges:
@@ -21,12 +204,13 @@ def initialize_exchange(api: ExchangeKey, ws: bool = False) -> Union[Exchange, N
     if exchange_class := getattr(
         ccxtpro if ws else ccxt, api.exchange_name.lower(), None
     ):
-        return exchange_class(
+        exchange = exchange_class(
             {
                 "apiKey": api.api_key,
                 "secret": api.api_secret,
             }
         )
+        return request_scheduler.attach(exchange, api.api_key)
     return None
 
 
@@ -49,18 +233,39 @@ async def initialize_all_exchanges(
                 if load_markets:
                     await exchange.load_markets()  # Load markets as part of initialization
                 initialized_exchanges.append(exchange)
-                print(f"Initialized exchange: {key.exchange_name}")
+                logger.info(f"Initialized exchange: {key.exchange_name}")
             except Exception as e:
-                print(f"Failed to initialize {key.exchange_name}: {e}")
+                logger.error(f"Failed to initialize {key.exchange_name}: {e}")
                 initialized_exchanges.append(None)
         else:
-            print(f"{key.exchange_name} not supported.")
+            logger.warning(f"{key.exchange_name} not supported.")
             initialized_exchanges.append(None)
 
     return initialized_exchanges
 
 
 async def get_exchange_by_exchange_name(exchange_name, ws: bool = False) -> Exchange:
+    selected_exchange_key = await get_exchange_key_by_exchange_name(exchange_name)
+    exchange = initialize_exchange(selected_exchange_key, ws=ws)
+    if exchange is None:
+        raise ValueError(f"Failed to initialize exchange {exchange_name}")
+    return exchange
+
+
+# Resolved keys per exchange name, so leasing a warm client does not read
+# every API key from Mongo. Writes through this module clear it; other
+# workers pick up changes within EXCHANGE_KEY_CACHE_TTL seconds.
+_exchange_key_cache = LocalCache(max_size=256, ttl=Config.EXCHANGE_KEY_CACHE_TTL)
+
+
+def invalidate_exchange_keys():
+    _exchange_key_cache.clear()
+
+
+async def get_exchange_key_by_exchange_name(exchange_name: str) -> ExchangeKey:
+    cached = _exchange_key_cache.get(exchange_name.lower())
+    if cached is not None:
+        return cached
     exchange_keys = await get_exchange_keys()
     selected_exchange_key = next(
         (
@@ -72,16 +277,211 @@ async def get_exchange_by_exchange_name(exchange_name, ws: bool = False) -> Exch
     )
     if not selected_exchange_key:
         raise ValueError(f"Exchange {exchange_name} not found")
-    exchange = initialize_exchange(selected_exchange_key, ws=ws)
-    if exchange is None:
-        raise ValueError(f"Failed to initialize exchange {exchange_name}")
-    return exchange
+    _exchange_key_cache.set(exchange_name.lower(), selected_exchange_key)
+    return selected_exchange_key
+
+
+RegistryKey = Tuple[str, str, bool]
+
+
+class _RegistryEntry:
+    def __init__(self, exchange: Exchange):
+        self.exchange = exchange
+        self.leases = 0
+        self.last_used = time.monotonic()
+        self.evicted = False
+
+
+class ExchangeRegistry:
+    """
+    App-lifespan pool of warm ccxt clients keyed by (exchange, api key, ws).
+
+    Clients are created on first use with their markets already loaded and are
+    reused by every later request, so the aiohttp session, TLS connection and
+    market metadata survive across calls. The pool is bounded: the least
+    recently used clients are evicted once ``max_size`` is exceeded and
+    clients idle for longer than ``idle_ttl`` seconds are closed by a
+    background reaper. A client is never closed while it is leased, except by
+    ``close`` once its drain timeout has passed.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 32,
+        idle_ttl: float = 600.0,
+        reap_interval: float = 60.0,
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.reap_interval = reap_interval
+        self._entries: "OrderedDict[RegistryKey, _RegistryEntry]" = OrderedDict()
+        self._locks: Dict[RegistryKey, asyncio.Lock] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(api: ExchangeKey, ws: bool = False) -> RegistryKey:
+        return api.exchange_name.lower(), api.api_key or "", ws
+
+    async def start(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    @asynccontextmanager
+    async def lease(
+        self, api: ExchangeKey, ws: bool = False
+    ) -> AsyncIterator[Exchange]:
+        entry = await self._checkout(api, ws)
+        try:
+            yield entry.exchange
+        finally:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            if entry.evicted and entry.leases == 0:
+                await self._close_exchange(entry.exchange)
+
+    @asynccontextmanager
+    async def lease_by_exchange_name(
+        self, exchange_name: str, ws: bool = False
+    ) -> AsyncIterator[Exchange]:
+        api = await get_exchange_key_by_exchange_name(exchange_name)
+        async with self.lease(api, ws=ws) as exchange:
+            yield exchange
+
+    async def _checkout(self, api: ExchangeKey, ws: bool) -> _RegistryEntry:
+        key = self.make_key(api, ws)
+        entry = self._entries.get(key)
+        if entry is None:
+            lock = self._locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                    entry = _RegistryEntry(await self._create_exchange(api, ws))
+                    self._entries[key] = entry
+                else:
+                    self.hits += 1
+        else:
+            self.hits += 1
+        # Lease the entry before awaiting anything else, so a concurrent
+        # checkout evicting it cannot close the client under this caller
+        self._entries.move_to_end(key)
+        entry.leases += 1
+        entry.last_used = time.monotonic()
+        await self._evict_overflow()
+        return entry
+
+    @staticmethod
+    async def _create_exchange(api: ExchangeKey, ws: bool) -> Exchange:
+        exchange = initialize_exchange(api, ws=ws)
+        if exchange is None:
+            raise ValueError(f"Failed to initialize exchange {api.exchange_name}")
+        try:
+            await exchange.load_markets()
+        except Exception:
+            await exchange.close()
+            raise
+        logger.info(f"Registered exchange client: {api.exchange_name} (ws={ws})")
+        return exchange
+
+    async def _evict_overflow(self):
+        while len(self._entries) > self.max_size:
+            key = next(iter(self._entries))
+            await self._evict(key)
+
+    async def discard(self, api: ExchangeKey, ws: bool = False):
+        """Retire a client; it is closed once its current leases end."""
+        await self._evict(self.make_key(api, ws))
+
+    async def evict_idle(self):
+        now = time.monotonic()
+        idle_keys = [
+            key
+            for key, entry in self._entries.items()
+            if entry.leases == 0 and now - entry.last_used > self.idle_ttl
+        ]
+        for key in idle_keys:
+            await self._evict(key)
+
+    async def _evict(self, key: RegistryKey):
+        entry = self._entries.pop(key, None)
+        self._locks.pop(key, None)
+        if entry is None:
+            return
+        self.evictions += 1
+        entry.evicted = True
+        logger.info(f"Evicting exchange client: {key[0]} (ws={key[2]})")
+        if entry.leases == 0:
+            await self._close_exchange(entry.exchange)
+
+    @staticmethod
+    async def _close_exchange(exchange: Exchange):
+        try:
+            await exchange.close()
+        except Exception as e:
+            logger.error(f"Error closing exchange {exchange.id}: {e}")
+
+    async def _reap_forever(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"Exchange registry reaper error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "leased": sum(entry.leases for entry in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    async def close(self, drain_timeout: float = 10.0):
+        """
+        Close every client. Leased clients are closed when their lease ends,
+        waiting up to ``drain_timeout`` seconds before closing them anyway.
+        """
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        entries = list(self._entries.values())
+        self._entries.clear()
+        self._locks.clear()
+        for entry in entries:
+            entry.evicted = True
+            if entry.leases == 0:
+                await self._close_exchange(entry.exchange)
+
+        deadline = time.monotonic() + drain_timeout
+        while any(entry.leases for entry in entries) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for entry in entries:
+            if entry.leases:
+                logger.warning(
+                    f"Closing exchange {entry.exchange.id} with {entry.leases} "
+                    "active leases"
+                )
+                await self._close_exchange(entry.exchange)
+        logger.info("Exchange registry closed")
+
+
+exchange_registry = ExchangeRegistry(
+    max_size=Config.EXCHANGE_REGISTRY_MAX_SIZE,
+    idle_ttl=Config.EXCHANGE_REGISTRY_IDLE_TTL,
+)
 
 
 async def add_exchange_key(exchange_key: dict, db):
     try:
         api_keys_collection = get_api_keys_collection(db=db)
-        return await api_keys_collection.insert_one(exchange_key)
+        result = await api_keys_collection.insert_one(exchange_key)
+        invalidate_exchange_keys()
+        return result
     except ConnectionFailure as conn_err:
         logger.error(f"Error: Unable to connect to the MongoDB server: {conn_err}")
         raise ValueError(conn_err) from conn_err
@@ -97,12 +497,13 @@ async def add_exchange_key(exchange_key: dict, db):
 
 async def update_exchange_key(exchange_id: str, update_data: dict):
     try:
-        async for db in get_db():
-            api_keys_collection = get_api_keys_collection(db=db)
+        api_keys_collection = get_api_keys_collection(db=get_database())
 
-            return await api_keys_collection.update_one(
-                {"_id": ObjectId(exchange_id)}, {"$set": update_data}
-            )
+        result = await api_keys_collection.update_one(
+            {"_id": ObjectId(exchange_id)}, {"$set": update_data}
+        )
+        invalidate_exchange_keys()
+        return result
     except ConnectionFailure as conn_err:
         logger.error(f"Error: Unable to connect to the MongoDB server: {conn_err}")
         raise ValueError(conn_err) from conn_err
@@ -119,7 +520,9 @@ async def update_exchange_key(exchange_id: str, update_data: dict):
 async def bulk_add_exchange_key(exchange_keys: List[dict], db):
     try:
         api_keys_collection = get_api_keys_collection(db=db)
-        return await api_keys_collection.insert_many(exchange_keys)
+        result = await api_keys_collection.insert_many(exchange_keys)
+        invalidate_exchange_keys()
+        return result
     except ConnectionFailure as conn_err:
         logger.error(f"Error: Unable to connect to the MongoDB server: {conn_err}")
         raise ValueError(conn_err) from conn_err
@@ -135,21 +538,17 @@ async def bulk_add_exchange_key(exchange_keys: List[dict], db):
 
 async def get_user_exchange_keys(user_id: str, db) -> List[ExchangeKey]:
     try:
-        print(user_id)
         api_keys_collection = get_api_keys_collection(db=db)
         return api_keys_collection.find({user_id: user_id})
     except ConnectionFailure as conn_err:
-        print(conn_err)
         logger.error(f"Error: Unable to connect to the MongoDB server: {conn_err}")
         raise ValueError(conn_err) from conn_err
 
     except PyMongoError as pymongo_err:
-        print(pymongo_err)
         logger.error(f"MongoDB error occurred: {pymongo_err}")
         raise ValueError(pymongo_err) from pymongo_err
 
     except Exception as general_err:
-        print(general_err)
         logger.error(f"An unexpected error occurred: {general_err}")
         raise ValueError(general_err) from general_err
 
@@ -170,16 +569,15 @@ async def get_exchange_keys() -> List[ExchangeKey]:
 
     try:
         exchange_keys = []
-        async for db in get_db():
-            api_keys_collection = get_api_keys_collection(db=db)
-            async for collect in api_keys_collection.find({}):
-                exchange_keys.append(
-                    ExchangeKey(
-                        api_key=collect["api_key"],
-                        api_secret=collect["api_secret"],
-                        exchange_name=collect["exchange_name"],
-                    )
+        api_keys_collection = get_api_keys_collection(db=get_database())
+        async for collect in api_keys_collection.find({}):
+            exchange_keys.append(
+                ExchangeKey(
+                    api_key=collect["api_key"],
+                    api_secret=collect["api_secret"],
+                    exchange_name=collect["exchange_name"],
                 )
+            )
         # Return collected exchange keys
         return exchange_keys or defaultCon
 
@@ -0,0 +1,214 @@
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from pymongo.errors import OperationFailure
+
+from src.data.fetch_fees import get_default_fees
+from src.models.FeesModel import Fees
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+from src.utils.mongo_utils import get_database, get_fees_collection
+
+logger = setup_logger("fee_service", "logs/fee_service.log")
+
+FeeKey = Tuple[str, Optional[str]]
+FeeListener = Callable[[Set[str]], None]
+
+
+class FeeTable:
+    """
+    Immutable snapshot of the ``fees`` collection indexed by
+    (exchange name, symbol).
+
+    Lookups try the symbol record, then the exchange-level record (one without
+    a symbol), then the configured default fees.
+    """
+
+    def __init__(self, records: Iterable[dict] = (), version: int = 0):
+        self.version = version
+        self.default = get_default_fees()
+        self._fees: Dict[FeeKey, Fees] = {}
+        for record in records:
+            exchange_name = record.get("exchange_name")
+            if not exchange_name:
+                continue
+            fees = Fees(
+                symbol=record.get("symbol"),
+                exchange_name=exchange_name,
+                taker_fee_percent=record.get(
+                    "taker_fee_percent", self.default.taker_fee_percent
+                ),
+                maker_fee_percent=record.get(
+                    "maker_fee_percent", self.default.maker_fee_percent
+                ),
+            )
+            self._fees[(exchange_name.lower(), fees.symbol)] = fees
+        self._extras: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._fees)
+
+    def get(self, exchange_name: str, symbol: Optional[str] = None) -> Fees:
+        exchange = exchange_name.lower()
+        if symbol is not None and (exchange, symbol) in self._fees:
+            return self._fees[(exchange, symbol)]
+        return self._fees.get((exchange, None), self.default)
+
+    def exchanges(self) -> Set[str]:
+        return {exchange for exchange, _ in self._fees}
+
+    def diff(self, other: "FeeTable") -> Set[str]:
+        """Exchange names (lower case) whose records differ from ``other``."""
+        changed = set()
+        for key in self._fees.keys() | other._fees.keys():
+            if self._fees.get(key) != other._fees.get(key):
+                changed.add(key[0])
+        return changed
+
+    def rates(
+        self,
+        exchange_name: str,
+        symbols: Sequence[str],
+        base_rates: Sequence[float],
+        kind: str = "taker",
+    ) -> np.ndarray:
+        """
+        Exchange fee rates ``base_rates`` (fractions, as in ccxt markets) for
+        ``symbols``, each adjusted by its fee record the way ``load_markets``
+        does: ``rate * (1 + fee_percent)``.
+        """
+        cache = self._extras.setdefault((exchange_name.lower(), kind), {})
+        field = f"{kind}_fee_percent"
+        extras = []
+        for symbol in symbols:
+            extra = cache.get(symbol)
+            if extra is None:
+                extra = cache[symbol] = float(
+                    getattr(self.get(exchange_name, symbol), field) or 0.0
+                )
+            extras.append(extra)
+        return np.asarray(base_rates, dtype=float) * (1 + np.array(extras))
+
+    def apply(
+        self,
+        exchange_name: str,
+        symbols: Sequence[str],
+        prices: Sequence[float],
+        base_rates: Sequence[float],
+        side: str = "buy",
+        kind: str = "taker",
+    ) -> np.ndarray:
+        """
+        Return ``prices`` with each symbol's adjusted fee rate (see ``rates``)
+        added (buy) or taken off (sell) in one vectorized operation.
+        """
+        sign = 1 if side == "buy" else -1
+        rates = self.rates(exchange_name, symbols, base_rates, kind)
+        return np.asarray(prices, dtype=float) * (1 + sign * rates)
+
+
+class FeeService:
+    """
+    Serves fees from an in-memory ``FeeTable`` instead of querying Mongo on
+    every call.
+
+    The whole collection is loaded at startup. Updates are picked up from a
+    Mongo change stream when the deployment supports it (replica set) and
+    otherwise by reloading every ``poll_interval`` seconds; in both cases a
+    new table is only published if the records changed, and listeners are
+    called with the names of the exchanges whose fees changed.
+    """
+
+    def __init__(self, poll_interval: float = 30.0):
+        self.poll_interval = poll_interval
+        self.table = FeeTable()
+        self.mode = "static"
+        self.reloads = 0
+        self._listeners: List[FeeListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, exchange_name: str, symbol: Optional[str] = None) -> Fees:
+        return self.table.get(exchange_name, symbol)
+
+    def add_listener(self, listener: FeeListener):
+        self._listeners.append(listener)
+
+    async def start(self):
+        if not Config.CONNECT_DB:
+            return
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.error(f"Failed to load fees, using defaults: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch_forever())
+
+    async def _load_records(self) -> List[dict]:
+        collection = get_fees_collection(get_database())
+        return await collection.find({}).to_list(length=None)
+
+    async def reload(self) -> Set[str]:
+        table = FeeTable(await self._load_records(), version=self.table.version + 1)
+        self.reloads += 1
+        return self.publish(table)
+
+    def publish(self, table: FeeTable) -> Set[str]:
+        changed = table.diff(self.table)
+        if not changed:
+            return changed
+        self.table = table
+        logger.info(f"Fees changed for {sorted(changed)} (version {table.version})")
+        for listener in self._listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"Fee listener failed: {e}")
+        return changed
+
+    async def _watch_forever(self):
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Change streams need a replica set; poll instead
+                logger.info(f"Fee change stream unavailable, polling: {e}")
+                await self._poll_forever()
+            except Exception as e:
+                logger.error(f"Fee change stream error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _watch(self):
+        async with get_fees_collection(get_database()).watch() as stream:
+            self.mode = "change_stream"
+            # Changes made before the stream opened
+            await self.reload()
+            async for _ in stream:
+                await self.reload()
+
+    async def _poll_forever(self):
+        self.mode = "poll"
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Fee reload failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "version": self.table.version,
+            "records": len(self.table),
+            "reloads": self.reloads,
+        }
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+fee_service = FeeService(poll_interval=Config.FEE_POLL_SECONDS)
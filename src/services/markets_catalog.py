@@ -0,0 +1,176 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.models.MarketDataModel import MarketData
+from src.services.connect_exchange_service import (
+    PRIORITY_BACKGROUND,
+    exchange_registry,
+    request_priority,
+)
+from src.services.fee_service import FeeTable, fee_service
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+from src.utils.responses import encode_json
+
+logger = setup_logger("markets_catalog", "logs/markets_catalog.log")
+
+
+class MarketsEntry:
+    """
+    Markets of one exchange with fee-adjusted taker/maker rates.
+
+    Raw rates are kept as arrays so a fee change only recomputes the adjusted
+    columns (per symbol, through ``FeeTable.rates``) and the encoded body,
+    not the markets themselves.
+    """
+
+    def __init__(self, exchange_name: str, markets: dict, fees: FeeTable):
+        self.exchange_name = exchange_name
+        self.raw_markets = list(markets.values())
+        self.symbols = [market.get("symbol") for market in self.raw_markets]
+        self.taker = np.array(
+            [market.get("taker") or 0.0 for market in self.raw_markets], dtype=float
+        )
+        self.maker = np.array(
+            [market.get("maker") or 0.0 for market in self.raw_markets], dtype=float
+        )
+        self.loaded_at = time.time()
+        self.apply_fees(fees)
+
+    def adjusted_rates(self, fees: FeeTable) -> Tuple[np.ndarray, np.ndarray]:
+        taker = fees.rates(self.exchange_name, self.symbols, self.taker, "taker")
+        maker = fees.rates(self.exchange_name, self.symbols, self.maker, "maker")
+        return np.round(taker, 5), np.round(maker, 5)
+
+    def apply_fees(self, fees: FeeTable):
+        self.adjusted = self.adjusted_rates(fees)
+        taker, maker = (rates.tolist() for rates in self.adjusted)
+        self.markets: List[MarketData] = [
+            MarketData.model_construct(**{**market, "taker": t, "maker": m})
+            for market, t, m in zip(self.raw_markets, taker, maker)
+        ]
+        self.body = encode_json(self.markets)
+        self.fees_applied_at = time.time()
+
+    def fees_changed(self, fees: FeeTable) -> bool:
+        return not all(
+            np.array_equal(current, new)
+            for current, new in zip(self.adjusted, self.adjusted_rates(fees))
+        )
+
+
+class MarketsCatalog:
+    """
+    In-memory markets per exchange, loaded at startup and refreshed in the
+    background.
+
+    Markets are reloaded from the exchange every ``refresh_interval`` seconds
+    at background priority. Fees come from the ``fee_service`` table; when it
+    reports a change, only the fee-adjusted rates of the affected exchanges
+    are recomputed. Exchanges requested but not configured are loaded on
+    first use and refreshed with the others from then on.
+    """
+
+    def __init__(self, exchanges: Sequence[str] = (), refresh_interval: float = 3600.0):
+        self.exchanges = list(exchanges)
+        self.refresh_interval = refresh_interval
+        self._entries: Dict[str, MarketsEntry] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.fee_updates = 0
+        fee_service.add_listener(self.on_fees_changed)
+
+    async def start(self):
+        await asyncio.gather(
+            *(self._load_logged(name) for name in self.exchanges),
+        )
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def _load_logged(self, exchange_name: str):
+        try:
+            await self.load(exchange_name)
+        except Exception as e:
+            logger.error(f"Failed to load markets for {exchange_name}: {e}")
+
+    async def load(self, exchange_name: str, reload: bool = False) -> MarketsEntry:
+        key = exchange_name.lower()
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry is not None and not reload:
+                return entry
+            fees = fee_service.table
+            async with exchange_registry.lease_by_exchange_name(
+                exchange_name
+            ) as exchange:
+                markets = await exchange.load_markets(reload)
+            entry = MarketsEntry(exchange_name, markets, fees)
+            self._entries[key] = entry
+            self.reloads += 1
+            logger.info(f"Loaded {len(entry.markets)} markets for {exchange_name}")
+            return entry
+
+    async def get(self, exchange_name: str, reload: bool = False) -> MarketsEntry:
+        entry = self._entries.get(exchange_name.lower())
+        if entry is None or reload:
+            entry = await self.load(exchange_name, reload=reload)
+        return entry
+
+    def update_fees(self, exchange_name: str, fees: FeeTable) -> bool:
+        """Re-apply ``fees`` to a loaded exchange; return True if they changed."""
+        entry = self._entries.get(exchange_name.lower())
+        if entry is None or not entry.fees_changed(fees):
+            return False
+        entry.apply_fees(fees)
+        self.fee_updates += 1
+        logger.info(f"Applied new fees to {exchange_name} markets")
+        return True
+
+    def on_fees_changed(self, exchange_names: Set[str]):
+        for key, entry in list(self._entries.items()):
+            if key in exchange_names:
+                self.update_fees(entry.exchange_name, fee_service.table)
+
+    async def _refresh_forever(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            with request_priority(PRIORITY_BACKGROUND):
+                for entry in list(self._entries.values()):
+                    await self._reload_logged(entry.exchange_name)
+
+    async def _reload_logged(self, exchange_name: str):
+        try:
+            await self.load(exchange_name, reload=True)
+        except Exception as e:
+            # Keep serving the previous markets until a reload succeeds
+            logger.error(f"Failed to reload markets for {exchange_name}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "reloads": self.reloads,
+            "fee_updates": self.fee_updates,
+            "exchanges": {
+                key: {
+                    "markets": len(entry.markets),
+                    "loaded_at": entry.loaded_at,
+                    "fees_applied_at": entry.fees_applied_at,
+                }
+                for key, entry in self._entries.items()
+            },
+        }
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+markets_catalog = MarketsCatalog(
+    exchanges=Config.MARKETS_CATALOG_EXCHANGES,
+    refresh_interval=Config.MARKETS_REFRESH_SECONDS,
+)
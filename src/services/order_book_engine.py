@@ -0,0 +1,310 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import ccxt.pro as ccxtpro
+from ccxt.base.errors import ChecksumError, InvalidNonce
+
+from src.services.connect_exchange_service import (
+    exchange_registry,
+    get_exchange_key_by_exchange_name,
+)
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger("order_book_engine", "logs/order_book_engine.log")
+
+BookKey = Tuple[str, str]
+Level = List[float]
+
+
+class BookSide:
+    """One side of a book kept sorted best-first."""
+
+    def __init__(self, descending: bool):
+        self._sign = -1 if descending else 1
+        self._keys: List[float] = []
+        self._sizes: Dict[float, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self):
+        self._keys.clear()
+        self._sizes.clear()
+
+    def levels(self, limit: Optional[int] = None) -> List[Level]:
+        keys = self._keys if limit is None else self._keys[:limit]
+        return [[self._sign * key, self._sizes[key]] for key in keys]
+
+    def sync(self, levels: List[Level]) -> List[Level]:
+        """
+        Replace the side with ``levels`` and return the changed levels. The
+        price keys are only re-sorted when levels were added or removed,
+        which is linear for ccxt's already sorted sides.
+        """
+        incoming = {self._sign * price: size for price, size in levels}
+        deltas = [[self._sign * key, 0.0] for key in self._keys if key not in incoming]
+        added = False
+        for key, size in incoming.items():
+            current = self._sizes.get(key)
+            if current != size:
+                deltas.append([self._sign * key, size])
+                added = added or current is None
+        if deltas:
+            if added or len(incoming) != len(self._keys):
+                self._keys = sorted(incoming)
+            self._sizes = incoming
+        return deltas
+
+
+class LocalOrderBook:
+    """
+    Sorted in-memory order book for one (exchange, symbol).
+
+    Updates are applied as the full books maintained by ccxt.pro, which
+    does not expose the venue deltas; the changed levels are returned. When
+    the venue provides a sequence number (ccxt ``nonce``) it must not go
+    backwards, otherwise ``InvalidNonce`` is raised and the book must be
+    resynced.
+    """
+
+    def __init__(self, exchange_name: str, symbol: str):
+        self.exchange_name = exchange_name
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.nonce: Optional[int] = None
+        self.timestamp: Optional[int] = None
+        self.version = 0
+        self._memo: Dict[str, Tuple[int, Any]] = {}
+
+    def _check_nonce(self, nonce: Optional[int]):
+        if nonce is None:
+            return
+        if self.nonce is not None and nonce < self.nonce:
+            raise InvalidNonce(
+                f"{self.exchange_name} {self.symbol} nonce {nonce} after {self.nonce}"
+            )
+        self.nonce = nonce
+
+    def memoize(self, name: str, builder: Callable[["LocalOrderBook"], Any]) -> Any:
+        """Return ``builder(self)``, recomputed only when the book has changed."""
+        cached = self._memo.get(name)
+        if cached is None or cached[0] != self.version:
+            cached = (self.version, builder(self))
+            self._memo[name] = cached
+        return cached[1]
+
+    def apply_snapshot(
+        self,
+        bids: List[Level],
+        asks: List[Level],
+        nonce: Optional[int] = None,
+        timestamp: Optional[int] = None,
+    ) -> Dict[str, List[Level]]:
+        self._check_nonce(nonce)
+        deltas = {"bids": self.bids.sync(bids), "asks": self.asks.sync(asks)}
+        self.timestamp = timestamp
+        self.version += 1
+        return deltas
+
+    def reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.nonce = None
+        self.version += 1
+
+    def to_dict(self, depth: Optional[int] = None) -> dict:
+        return {
+            "bids": self.bids.levels(depth),
+            "asks": self.asks.levels(depth),
+            "nonce": self.nonce,
+            "timestamp": self.timestamp,
+        }
+
+
+class _BookSubscription:
+    def __init__(self, exchange_name: str, symbol: str):
+        self.book = LocalOrderBook(exchange_name, symbol)
+        self.ready = asyncio.Event()
+        self.last_access = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+        self.resyncs = 0
+
+
+class OrderBookEngine:
+    """
+    Background order books fed by ``ccxt.pro`` ``watch_order_book``.
+
+    A subscription is started on the first request for an (exchange, symbol)
+    and every update is applied to a sorted ``LocalOrderBook``, so reads are
+    served from memory. Subscriptions that have not been read for
+    ``idle_ttl`` seconds are torn down by a background reaper.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 120.0,
+        snapshot_timeout: float = 5.0,
+        reap_interval: float = 15.0,
+        depth: Optional[int] = None,
+    ):
+        self.idle_ttl = idle_ttl
+        self.snapshot_timeout = snapshot_timeout
+        self.reap_interval = reap_interval
+        self.depth = depth
+        self._subscriptions: Dict[BookKey, _BookSubscription] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def supports(exchange_name: str) -> bool:
+        return exchange_name.lower() in ccxtpro.exchanges
+
+    async def start(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    async def lists(self, exchange_name: str, symbol: str) -> bool:
+        """Whether ``symbol`` is a market of ``exchange_name``."""
+        if not self.supports(exchange_name):
+            return False
+        if (exchange_name.lower(), symbol) in self._subscriptions:
+            return True
+        try:
+            async with exchange_registry.lease_by_exchange_name(
+                exchange_name, ws=True
+            ) as exchange:
+                return symbol in exchange.markets
+        except Exception as e:
+            logger.error(f"Failed to load markets of {exchange_name}: {e}")
+            return False
+
+    def subscribe(self, exchange_name: str, symbol: str) -> _BookSubscription:
+        key = (exchange_name.lower(), symbol)
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            subscription = _BookSubscription(exchange_name, symbol)
+            subscription.task = asyncio.create_task(self._run(subscription))
+            self._subscriptions[key] = subscription
+            logger.info(f"Started order book subscription {key}")
+        subscription.last_access = time.monotonic()
+        return subscription
+
+    async def get_book(
+        self, exchange_name: str, symbol: str
+    ) -> Union[LocalOrderBook, None]:
+        # Unknown symbols would start a feed retrying until the reaper runs
+        if not await self.lists(exchange_name, symbol):
+            return None
+        subscription = self.subscribe(exchange_name, symbol)
+        try:
+            await asyncio.wait_for(
+                subscription.ready.wait(), timeout=self.snapshot_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"No order book snapshot yet for {exchange_name} {symbol}")
+            return None
+        return subscription.book
+
+    async def _run(self, subscription: _BookSubscription):
+        book = subscription.book
+        backoff = 1.0
+        while True:
+            try:
+                api = await get_exchange_key_by_exchange_name(book.exchange_name)
+                async with exchange_registry.lease(api, ws=True) as exchange:
+                    exchange.options.setdefault("watchOrderBook", {})
+                    exchange.options["watchOrderBook"]["checksum"] = True
+                    try:
+                        while True:
+                            order_book = await exchange.watch_order_book(
+                                book.symbol, self.depth
+                            )
+                            book.apply_snapshot(
+                                [level[:2] for level in order_book["bids"]],
+                                [level[:2] for level in order_book["asks"]],
+                                nonce=order_book.get("nonce"),
+                                timestamp=order_book.get("timestamp"),
+                            )
+                            subscription.ready.set()
+                            backoff = 1.0
+                    except (ChecksumError, InvalidNonce) as e:
+                        subscription.resyncs += 1
+                        logger.warning(
+                            f"Resyncing {book.exchange_name} {book.symbol}: {e}"
+                        )
+                        await self._drop_venue_book(exchange, api, book.symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(
+                    f"Order book feed {book.exchange_name} {book.symbol} failed: {e}"
+                )
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            subscription.ready.clear()
+            book.reset()
+
+    @staticmethod
+    async def _drop_venue_book(exchange, api, symbol: str):
+        """
+        Discard the book ccxt keeps for ``symbol`` so the next watch starts
+        from a fresh venue snapshot: unsubscribe where ccxt supports it,
+        otherwise retire the client so the next lease opens a new connection.
+        """
+        if hasattr(exchange, "un_watch_order_book"):
+            try:
+                await exchange.un_watch_order_book(symbol)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to unwatch {exchange.id} {symbol}: {e}")
+        await exchange_registry.discard(api, ws=True)
+
+    async def unsubscribe(self, exchange_name: str, symbol: str):
+        subscription = self._subscriptions.pop((exchange_name.lower(), symbol), None)
+        if subscription and subscription.task:
+            subscription.task.cancel()
+            try:
+                await subscription.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            logger.info(f"Stopped order book subscription {exchange_name} {symbol}")
+
+    async def evict_idle(self):
+        now = time.monotonic()
+        for key, subscription in list(self._subscriptions.items()):
+            if now - subscription.last_access > self.idle_ttl:
+                await self.unsubscribe(*key)
+
+    async def _reap_forever(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"Order book engine reaper error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            f"{exchange}:{symbol}": {
+                "ready": subscription.ready.is_set(),
+                "version": subscription.book.version,
+                "nonce": subscription.book.nonce,
+                "resyncs": subscription.resyncs,
+            }
+            for (exchange, symbol), subscription in self._subscriptions.items()
+        }
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for key in list(self._subscriptions):
+            await self.unsubscribe(*key)
+
+
+order_book_engine = OrderBookEngine(
+    idle_ttl=Config.ORDER_BOOK_IDLE_TTL,
+    snapshot_timeout=Config.ORDER_BOOK_SNAPSHOT_TIMEOUT,
+)
@@ -1,85 +1,115 @@
 # quote_service.py
 import asyncio
-from typing import List, Union
+import time
+from typing import Dict, List, Optional, Tuple, Union
 
 import ccxt.async_support as ccxt
+import numpy as np
 from ccxt.base.exchange import Exchange
 
-from src.data.fetch_fees import fetch_fees
+from src.data.backfill import backfill_engine
+from src.data.candle_store import align, candle_store, timeframe_ms, to_ohlcv_list
+from src.data.resample import resample, resample_source
+from src.models.ExchangeKeyModel import ExchangeKey
 from src.models.MarketDataModel import MarketData
 from src.models.OHLCVDataModel import OHLCVData
-from src.models.OrderBookDataModel import OrderBookData, PriceVolumePair
-from src.models.PriceEngineDataModel import BestPriceData, PriceEngineData
+from src.models.OrderBookDataModel import OrderBookData
+from src.models.PriceEngineDataModel import BestPriceData, PriceEngineData, VenueStatus
 from src.models.TickerDataModel import TickerData
 from src.services.connect_exchange_service import (
-    get_exchange_by_exchange_name,
+    PRIORITY_INTERACTIVE,
+    exchange_registry,
     get_exchange_keys,
-    initialize_exchange,
 )
+from src.services.markets_catalog import markets_catalog
+from src.services.order_book_analytics import order_book_data, vwap
+from src.services.order_book_engine import LocalOrderBook, order_book_engine
+from src.services.ticker_table import ticker_tables
 from src.utils.app_utils import normalize_symbol
+from src.utils.config import Config
 from src.utils.logger import setup_logger
 from src.utils.redis_utils import RedisCache
+from src.utils.responses import encoded_cache
+from src.utils.single_flight import single_flight
 
 logger = setup_logger("quote_service", "logs/quote_service.log")
 cache = RedisCache()
 
 
 # Fetch historical data
+@single_flight()
 async def fetch_historical_data(
     symbol: str = "BTC/USD",
     timeframe: str = "1h",
     since: Union[int, None] = None,
+    until: Union[int, None] = None,
+    limit: Union[int, None] = None,
 ) -> Union[List[OHLCVData], None]:
+    """
+    Serve closed candles in ``[since, until)`` from the local candle store,
+    fetching only the ranges it has not seen yet from the exchange.
+
+    Timeframes are resampled from the coarsest base timeframe that divides
+    them (see ``resample_source``), so "5m", "2h" or "3d" need no exchange
+    traffic of their own. A request covers at most ``CANDLE_MAX_LIMIT``
+    candles from ``since``, with or without ``limit``.
+    """
     try:
-        cache_key = f"historical_data:{symbol}:{timeframe}:{since}"
-        cached_data = await cache.get(
-            cache_key,
-        )
-        if cached_data:
-            return cached_data
+        step = timeframe_ms(timeframe)
+        # Open time of the candle still forming; it is never returned
+        current = align(int(time.time() * 1000), step)
+        end = min(until, current) if until is not None else current
+        if since is None:
+            since = end - (limit or Config.CANDLE_DEFAULT_LIMIT) * step
+        start = align(since, step)
+        # Bound the backfill a single request can trigger
+        max_candles = min(limit or Config.CANDLE_MAX_LIMIT, Config.CANDLE_MAX_LIMIT)
+        end = min(end, start + max_candles * step)
+        # Whole target candles, so the last one is not built from a partial range
+        fetch_end = min(current, align(end + step - 1, step))
 
         exchanges = await get_exchange_keys()
-        exchange = initialize_exchange(exchanges[0])
-        if exchange is not None:
-            ex_symbol = normalize_symbol(symbol)
-            ohlcv_data = await exchange.fetch_ohlcv(ex_symbol, timeframe, since=since)
-            ohlcv_list: List[OHLCVData] = [
-                OHLCVData(
-                    timestamp=ohlcv[0],
-                    open=ohlcv[1],
-                    high=ohlcv[2],
-                    low=ohlcv[3],
-                    close=ohlcv[4],
-                    volume=ohlcv[5],
+        ex_symbol = normalize_symbol(symbol)
+        source = resample_source(timeframe) or timeframe
+        series = candle_store.series(exchanges[0].exchange_name, ex_symbol, source)
+        if series.missing_ranges(start, fetch_end):
+            async with exchange_registry.lease(exchanges[0]) as exchange:
+                await backfill_engine.backfill_series(
+                    exchange,
+                    series,
+                    ex_symbol,
+                    start,
+                    fetch_end,
+                    priority=PRIORITY_INTERACTIVE,
                 )
-                for ohlcv in ohlcv_data
-            ]
-        if timeframe.endswith("m"):
-            cache_expire_time = int(timeframe[:-1]) * 60  # minutes
-        elif timeframe.endswith("h"):
-            cache_expire_time = int(timeframe[:-1]) * 3600  # hours
-        elif timeframe.endswith("d"):
-            cache_expire_time = int(timeframe[:-1]) * 86400  # days
-        else:
-            cache_expire_time = 3600  # Default to 1 hour
-        await cache.set(cache_key, ohlcv_list, expire=cache_expire_time)
-        return ohlcv_list
+        candles = series.read(start, fetch_end)
+        if source != timeframe:
+            candles = resample(candles, step)
+        timestamps = candles["timestamp"]
+        lo = int(np.searchsorted(timestamps, since, "left"))
+        hi = int(np.searchsorted(timestamps, end, "left"))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return to_ohlcv_list(candles[lo:hi])
     except Exception as e:
         logger.error(f"Error fetching historical data: {e}")
-    finally:
-        await exchange.close()
     return None
 
 
 # Fetch real-time ticker data
+@single_flight()
 async def fetch_ticker(symbol="BTC/USD") -> Union[TickerData, None]:
+    ex_symbol = normalize_symbol(symbol)
+    cache_key = f"ticker:{ex_symbol}"
+    cached_data = await cache.get(cache_key)
+    if cached_data:
+        return TickerData.model_validate(cached_data)
+
     exchanges = await get_exchange_keys()
-    exchange = initialize_exchange(exchanges[0])
-    if exchange is not None:
-        try:
-            ex_symbol = normalize_symbol(symbol)
+    try:
+        async with exchange_registry.lease(exchanges[0]) as exchange:
             ticker = await exchange.fetch_ticker(ex_symbol)
-            return TickerData(
+            ticker_data = TickerData(
                 symbol=ticker["symbol"],
                 high=ticker["high"],
                 low=ticker["low"],
@@ -99,10 +129,11 @@ async def fetch_ticker(symbol="BTC/USD") -> Union[TickerData, None]:
                 last=ticker["last"],
                 datetime=ticker["datetime"],
             )
-        except ccxt.BaseError as e:
-            logger.error(f"Error fetching ticker: {e}")
-        finally:
-            await exchange.close()
+        await cache.set(cache_key, ticker_data, expire=Config.TICKER_CACHE_TTL)
+        encoded_cache.mark(ticker_data)
+        return ticker_data
+    except (ccxt.BaseError, ValueError) as e:
+        logger.error(f"Error fetching ticker: {e}")
     return None
 
 
@@ -112,18 +143,13 @@ def calculate_vwap(
 ) -> Union[float, None]:
     try:
         if order_book_side is not None:
-            total_volume = 0
-            weighted_price_sum = 0
-            for entry in order_book_side:
-                price, volume = entry[0], entry[1]
-                total_volume += volume
-                weighted_price_sum += price * volume
-            return None if total_volume == 0 else weighted_price_sum / total_volume
+            return vwap(order_book_side)
     except Exception as e:
         logger.error(f"Error calculate_vwap: {e}")
     return None
 
 
+@single_flight()
 async def fetch_order_book(
     exchange_name: str = "Kraken", symbol="BTC/USD"
 ) -> Union[OrderBookData, None]:
@@ -146,66 +172,41 @@ async def fetch_order_book(
             logger.error(f"Exchange {exchange_name} not found.")
             return None
 
-        # Initialize exchange connection
-        exchange = initialize_exchange(exchange_to_connect)
-        if not exchange:
-            logger.error(f"Failed to initialize exchange {exchange_name}")
-            return None
-
-        return await get_order_book_model(exchange, ex_symbol)
+        async with exchange_registry.lease(exchange_to_connect) as exchange:
+            return await get_order_book_model(exchange, ex_symbol)
     except Exception as e:
         logger.error(
             f"Error fetching order book for {symbol} from {exchange_name}: {e}"
         )
         return None
 
-    finally:
-        if exchange:
-            await exchange.close()
-
 
 async def get_order_book_model(
     exchange: Exchange, symbol
 ) -> Union[OrderBookData, None]:
     try:
         ex_symbol = normalize_symbol(symbol)
+        book = await order_book_engine.get_book(exchange.id, ex_symbol)
+        if book is not None:
+            return encoded_cache.mark(
+                book.memoize("order_book_data", _local_order_book_data)
+            )
         order_book = await exchange.fetch_order_book(ex_symbol)
-        sorted_bids = sorted(order_book["bids"], key=lambda x: x[0], reverse=True)
-        sorted_asks = sorted(order_book["asks"], key=lambda x: x[0])
+        return build_order_book_data(order_book)
+    except Exception as e:
+        logger.error(f"get_order_book_model {e}")
+        return None
 
-        top_ask = sorted_asks[0] if len(sorted_asks) > 0 else [None, None]
-        top_bid = sorted_bids[0] if len(sorted_bids) > 0 else [None, None]
-        spread = (
-            round(top_ask[0] - top_bid[0], 5) if top_bid[0] and top_ask[0] else None
-        )
 
-        total_bid_volume = sum(bid[1] for bid in sorted_bids)
-        total_ask_volume = sum(ask[1] for ask in sorted_asks)
-        vwap_bid = calculate_vwap(sorted_bids)
-        vwap_ask = calculate_vwap(sorted_asks)
+def _local_order_book_data(book: LocalOrderBook) -> OrderBookData:
+    return build_order_book_data(book.to_dict())
 
-        return OrderBookData(
-            top_bid=(
-                PriceVolumePair(price=top_bid[0], volume=top_bid[1])
-                if top_bid[0]
-                else None
-            ),
-            top_ask=(
-                PriceVolumePair(price=top_ask[0], volume=top_ask[1])
-                if top_ask[0]
-                else None
-            ),
-            spread=spread,
-            total_bid_volume=total_bid_volume,
-            total_ask_volume=total_ask_volume,
-            vwap_bid=vwap_bid,
-            vwap_ask=vwap_ask,
-            bid_count=len(sorted_bids),
-            ask_count=len(sorted_asks),
-            depth_of_book={"bids": sorted_bids, "asks": sorted_asks},
-        )
+
+def build_order_book_data(order_book: dict) -> Union[OrderBookData, None]:
+    try:
+        return order_book_data(order_book)
     except Exception as e:
-        logger.error(f"get_order_book_model {e}")
+        logger.error(f"build_order_book_data {e}")
         return None
 
 
@@ -223,7 +224,92 @@ async def fetch_ticker_depth(
     }
 
 
-async def aggregated_market_data(symbol="BTC/USD") -> PriceEngineData:
+async def _timed_order_book(
+    exchange_key: ExchangeKey, symbol: str
+) -> Tuple[OrderBookData, float]:
+    started = time.perf_counter()
+    async with exchange_registry.lease(exchange_key) as exchange:
+        book = await get_order_book_model(exchange, symbol)
+    if book is None:
+        raise ValueError(f"Order book unavailable for {symbol}")
+    return book, (time.perf_counter() - started) * 1000
+
+
+async def fan_out_order_books(
+    exchange_keys: List[ExchangeKey],
+    symbol: str,
+    timeout: Optional[float] = None,
+) -> List[Tuple[Optional[OrderBookData], VenueStatus]]:
+    """
+    Fetch the order book for ``symbol`` from every exchange concurrently.
+
+    All venues share one deadline of ``timeout`` seconds (defaults to
+    ``Config.AGGREGATION_TIMEOUT_SECONDS``). Venues that miss it are cancelled
+    and reported as ``timeout``; failed venues are reported as ``error``. The
+    result keeps the order of ``exchange_keys``.
+    """
+    timeout = Config.AGGREGATION_TIMEOUT_SECONDS if timeout is None else timeout
+    tasks = {
+        asyncio.create_task(_timed_order_book(exchange_key, symbol)): exchange_key
+        for exchange_key in exchange_keys
+    }
+    if not tasks:
+        return []
+
+    started = time.perf_counter()
+    finished: Dict[asyncio.Task, float] = {}
+    for task in tasks:
+        task.add_done_callback(
+            lambda done: finished.setdefault(done, time.perf_counter())
+        )
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for task in pending:
+        task.cancel()
+
+    results: List[Tuple[Optional[OrderBookData], VenueStatus]] = []
+    for task, exchange_key in tasks.items():
+        exchange_name = exchange_key.exchange_name
+        if task in pending:
+            logger.warning(f"Order book for {symbol} on {exchange_name} timed out")
+            results.append(
+                (
+                    None,
+                    VenueStatus(
+                        exchange=exchange_name, status="timeout", latency_ms=elapsed_ms
+                    ),
+                )
+            )
+        elif task.exception() is not None:
+            error = task.exception()
+            logger.error(f"Order book for {symbol} on {exchange_name} failed: {error}")
+            results.append(
+                (
+                    None,
+                    VenueStatus(
+                        exchange=exchange_name,
+                        status="error",
+                        latency_ms=(finished[task] - started) * 1000,
+                        error=str(error),
+                    ),
+                )
+            )
+        else:
+            book, latency_ms = task.result()
+            results.append(
+                (
+                    book,
+                    VenueStatus(
+                        exchange=exchange_name, status="ok", latency_ms=latency_ms
+                    ),
+                )
+            )
+    return results
+
+
+async def aggregated_market_data(
+    symbol="BTC/USD", timeout: Optional[float] = None
+) -> Union[PriceEngineData, None]:
     best_bid = None
     best_ask = None
     best_bid_exchange = None
@@ -232,116 +318,89 @@ async def aggregated_market_data(symbol="BTC/USD") -> PriceEngineData:
     try:
         exchanges = await get_exchange_keys()
         ex_symbol = normalize_symbol(symbol)
-        for api_keys in exchanges:
-            book = await fetch_order_book(api_keys.exchange_name, ex_symbol)
-            if book is not None:
-                if best_bid is None or book.top_bid.price > best_bid.price:
-                    best_bid = book.top_bid
-                    best_bid_exchange = api_keys.exchange_name
-
-                if best_ask is None or book.top_ask.price < best_ask.price:
-                    best_ask = book.top_ask
-                    best_ask_exchange = api_keys.exchange_name
-
-                exchange_data.append(book)
+        results = await fan_out_order_books(exchanges, ex_symbol, timeout)
+        for book, venue in results:
+            if book is None:
+                continue
+            if book.top_bid and (
+                best_bid is None or book.top_bid.price > best_bid.price
+            ):
+                best_bid = book.top_bid
+                best_bid_exchange = venue.exchange
+
+            if book.top_ask and (
+                best_ask is None or book.top_ask.price < best_ask.price
+            ):
+                best_ask = book.top_ask
+                best_ask_exchange = venue.exchange
+
+            exchange_data.append(book)
+        if best_bid is None or best_ask is None:
+            logger.warning(f"price_engine no venue returned a book for {ex_symbol}")
+            return None
         exchange_data = sorted(
-            exchange_data, key=lambda x: x.top_bid.price, reverse=True
+            exchange_data,
+            key=lambda x: x.top_bid.price if x.top_bid else 0,
+            reverse=True,
         )
         return PriceEngineData(
             best_bid=BestPriceData(**best_bid.model_dump(), exchange=best_bid_exchange),
             best_ask=BestPriceData(**best_ask.model_dump(), exchange=best_ask_exchange),
             exchange_data=exchange_data,
+            venues=[venue for _, venue in results],
         )
     except Exception as e:
         logger.error(f"price_engine {e}")
+        return None
 
 
 async def fetch_tickers(
     exchange_name: str = "Kraken",
-):
-    exchange = None
+) -> Union[List[TickerData], None]:
     try:
-        exchange = await get_exchange_by_exchange_name(exchange_name)
-        tickers = await exchange.fetch_tickers()
-        ticker_data_list = []
-        for symbol, ticker in tickers.items():
-            ticker_data = TickerData(
-                symbol=ticker["symbol"],
-                high=ticker["high"],
-                low=ticker["low"],
-                bid=ticker["bid"],
-                bidVolume=ticker["bidVolume"],
-                ask=ticker["ask"],
-                askVolume=ticker["askVolume"],
-                vwap=ticker["vwap"],
-                open=ticker["open"],
-                close=ticker["close"],
-                last=ticker["last"],
-                previousClose=ticker["previousClose"],
-                change=ticker["change"],
-                percentage=ticker["percentage"],
-                average=ticker["average"],
-                baseVolume=ticker["baseVolume"],
-                quoteVolume=ticker["quoteVolume"],
-                datetime=ticker["datetime"],
-            )
-            ticker_data_list.append(ticker_data)
-        return ticker_data_list
+        table = await ticker_tables.get_table(exchange_name)
+        if table is None:
+            return None
+        return [
+            TickerData.model_construct(**row)
+            for row in table.rows(table.select(sort="symbol"))
+        ]
     except Exception as e:
         logger.error(f"fetch_tickers {e}")
         return None
-    finally:
-        if exchange:
-            await exchange.close()
 
 
-async def load_markets(exchange_name: str = "Kraken", reload: bool = False):
-    exchange = None
+async def load_markets(
+    exchange_name: str = "Kraken", reload: bool = False
+) -> Union[List[MarketData], None]:
     try:
-        fee = await fetch_fees()
-        exchange: Exchange = await get_exchange_by_exchange_name(exchange_name)
-        markets = await exchange.load_markets(reload)
-        market_data = []
-        for symbol, entry in markets.items():
-            market = MarketData.model_construct(**entry)
-            market.taker = round(market.taker * (1 + fee.taker_fee_percent), 5)
-            market.maker = round(market.maker * (1 + fee.maker_fee_percent), 5)
-            market_data.append(market)
-        return market_data
+        entry = await markets_catalog.get(exchange_name, reload=reload)
+        return entry.markets
     except Exception as e:
         logger.error(f"load_markets {e}")
         return None
-    finally:
-        if exchange:
-            await exchange.close()
 
 
 async def fetch_market_summary(
     exchange_name: str = "Kraken",
 ) -> Union[dict, None]:
     try:
-        exchange = await get_exchange_by_exchange_name(exchange_name)
-        return await exchange.fetch_markets()
+        async with exchange_registry.lease_by_exchange_name(exchange_name) as exchange:
+            return await exchange.fetch_markets()
     except Exception as e:
         logger.error(f"Error fetching market summary: {e}")
         return None
-    finally:
-        if exchange:
-            await exchange.close()
 
 
 async def fetch_funding_rate(
     exchange_name: str = "Kraken", symbol: str = "BTC/USD"
 ) -> Union[dict, None]:
     try:
-        exchange = await get_exchange_by_exchange_name(exchange_name)
-        return await exchange.fetch_funding_rate(symbol)
+        async with exchange_registry.lease_by_exchange_name(exchange_name) as exchange:
+            return await exchange.fetch_funding_rate(symbol)
     except Exception as e:
         logger.error(f"Error fetching funding rate for {symbol}: {e}")
         return None
-    finally:
-        if exchange:
-            await exchange.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+import asyncio
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from src.models.ExchangeKeyModel import ExchangeKey
+from src.models.PriceEngineDataModel import VenueStatus
+from src.models.RfqModel import RfqQuote, VenueFill
+from src.services.connect_exchange_service import exchange_registry, get_exchange_keys
+from src.services.fee_service import fee_service
+from src.services.order_book_analytics import levels_to_arrays
+from src.services.quote_service import fan_out_order_books
+from src.utils.app_utils import normalize_symbol
+from src.utils.config import Config
+from src.utils.local_cache import LocalCache
+from src.utils.logger import setup_logger
+from src.utils.single_flight import single_flight
+
+logger = setup_logger("rfq_service", "logs/rfq_service.log")
+
+VenueLevels = Tuple[str, list, float]
+
+
+class _Fill:
+    def __init__(
+        self,
+        base: float,
+        raw_notional: float,
+        effective_notional: float,
+        venue_base: np.ndarray,
+        venue_raw_notional: np.ndarray,
+        complete: bool,
+    ):
+        self.base = base
+        self.raw_notional = raw_notional
+        self.effective_notional = effective_notional
+        self.venue_base = venue_base
+        self.venue_raw_notional = venue_raw_notional
+        self.complete = complete
+
+
+class ConsolidatedLadder:
+    """
+    One side of the consolidated book across exchanges, ordered by
+    fee-adjusted price.
+
+    For ``buy`` the ladder holds asks priced at ``price * (1 + fee)``; for
+    ``sell`` it holds bids priced at ``price * (1 - fee)``. Cumulative size and
+    notional arrays, overall and per exchange, are precomputed so filling an
+    amount is a binary search plus O(exchanges) work.
+    """
+
+    def __init__(self, side: str, venues: List[VenueLevels]):
+        self.side = side
+        self.exchanges = [exchange for exchange, _, _ in venues]
+        self.fee_rates = np.array([fee for _, _, fee in venues], dtype=float)
+        prices, sizes, venue_index = [], [], []
+        for index, (_, levels, _) in enumerate(venues):
+            if not levels:
+                continue
+            level_prices, level_sizes = levels_to_arrays(levels)
+            prices.append(level_prices)
+            sizes.append(level_sizes)
+            venue_index.append(np.full(len(levels), index))
+        raw_prices = np.concatenate(prices) if prices else np.empty(0)
+        level_sizes = np.concatenate(sizes) if sizes else np.empty(0)
+        level_venues = (
+            np.concatenate(venue_index) if venue_index else np.empty(0, dtype=int)
+        )
+
+        sign = 1 if side == "buy" else -1
+        effective_prices = raw_prices * (1 + sign * self.fee_rates[level_venues])
+        order = np.argsort(sign * effective_prices, kind="stable")
+        self.raw_prices = raw_prices[order]
+        self.effective_prices = effective_prices[order]
+        self.sizes = level_sizes[order]
+        self.venue_index = level_venues[order]
+
+        self.cum_sizes = np.cumsum(self.sizes)
+        self.cum_raw_notional = np.cumsum(self.sizes * self.raw_prices)
+        self.cum_effective_notional = np.cumsum(self.sizes * self.effective_prices)
+        one_hot = self.venue_index == np.arange(len(self.exchanges))[:, None]
+        self.venue_cum_sizes = np.cumsum(one_hot * self.sizes, axis=1)
+        self.venue_cum_raw_notional = np.cumsum(
+            one_hot * self.sizes * self.raw_prices, axis=1
+        )
+        if len(raw_prices):
+            self.reference_price = float(
+                raw_prices.min() if side == "buy" else raw_prices.max()
+            )
+        else:
+            self.reference_price = None
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def fill_base(self, amount: float) -> _Fill:
+        return self._fill(self.cum_sizes, amount)
+
+    def fill_effective_notional(self, notional: float) -> _Fill:
+        return self._fill(self.cum_effective_notional, notional)
+
+    def _fill(self, cumulative: np.ndarray, target: float) -> _Fill:
+        venue_count = len(self.exchanges)
+        if not len(self) or target <= 0:
+            return _Fill(
+                0.0, 0.0, 0.0, np.zeros(venue_count), np.zeros(venue_count), False
+            )
+        index = int(np.searchsorted(cumulative, target, side="left"))
+        if index >= len(self):
+            return _Fill(
+                float(self.cum_sizes[-1]),
+                float(self.cum_raw_notional[-1]),
+                float(self.cum_effective_notional[-1]),
+                self.venue_cum_sizes[:, -1].copy(),
+                self.venue_cum_raw_notional[:, -1].copy(),
+                False,
+            )
+
+        if index:
+            previous = cumulative[index - 1]
+            base = self.cum_sizes[index - 1]
+            raw_notional = self.cum_raw_notional[index - 1]
+            effective_notional = self.cum_effective_notional[index - 1]
+            venue_base = self.venue_cum_sizes[:, index - 1].copy()
+            venue_raw_notional = self.venue_cum_raw_notional[:, index - 1].copy()
+        else:
+            previous = base = raw_notional = effective_notional = 0.0
+            venue_base = np.zeros(venue_count)
+            venue_raw_notional = np.zeros(venue_count)
+
+        # Take the fraction of the crossing level needed to reach the target
+        partial = (
+            self.sizes[index] * (target - previous) / (cumulative[index] - previous)
+        )
+        venue = self.venue_index[index]
+        venue_base[venue] += partial
+        venue_raw_notional[venue] += partial * self.raw_prices[index]
+        return _Fill(
+            float(base + partial),
+            float(raw_notional + partial * self.raw_prices[index]),
+            float(effective_notional + partial * self.effective_prices[index]),
+            venue_base,
+            venue_raw_notional,
+            True,
+        )
+
+
+class _LadderSnapshot:
+    def __init__(
+        self, ladders: Dict[str, ConsolidatedLadder], venues: List[VenueStatus]
+    ):
+        self.ladders = ladders
+        self.venues = venues
+
+
+_ladder_cache = LocalCache(
+    max_size=Config.RFQ_LADDER_CACHE_SIZE, ttl=Config.RFQ_LADDER_TTL
+)
+
+
+async def _venue_fee_rate(exchange_key: ExchangeKey, symbol: str) -> float:
+    """
+    Exchange taker fee adjusted by the fee record, as in ``load_markets``.
+    Venues without a record get the default one built from
+    ``EXTRA_TAKER_FEE_PERCENTAGE``, so the extra fee is applied here only.
+    """
+    async with exchange_registry.lease(exchange_key) as exchange:
+        market = exchange.markets.get(symbol) or {}
+    rates = fee_service.table.rates(
+        exchange_key.exchange_name, [symbol], [market.get("taker") or 0.0]
+    )
+    return float(rates[0])
+
+
+async def get_consolidated_ladders(symbol: str) -> _LadderSnapshot:
+    snapshot = _ladder_cache.get(symbol)
+    if snapshot is None:
+        snapshot = await _build_ladders(symbol)
+        _ladder_cache.set(symbol, snapshot)
+    return snapshot
+
+
+@single_flight()
+async def _build_ladders(symbol: str) -> _LadderSnapshot:
+    exchange_keys = await get_exchange_keys()
+    results = await fan_out_order_books(exchange_keys, symbol)
+    books = [
+        (exchange_key, book)
+        for exchange_key, (book, _) in zip(exchange_keys, results)
+        if book is not None
+    ]
+    fee_rates = await asyncio.gather(
+        *(_venue_fee_rate(exchange_key, symbol) for exchange_key, _ in books),
+        return_exceptions=True,
+    )
+    venue_books = []
+    for (exchange_key, book), fee_rate in zip(books, fee_rates):
+        if isinstance(fee_rate, Exception):
+            logger.error(
+                f"Fee lookup failed for {exchange_key.exchange_name}: {fee_rate}"
+            )
+            fee_rate = 0.0
+        venue_books.append((exchange_key.exchange_name, book, fee_rate))
+
+    return _LadderSnapshot(
+        ladders={
+            "buy": ConsolidatedLadder(
+                "buy",
+                [
+                    (name, book.depth_of_book["asks"], fee)
+                    for name, book, fee in venue_books
+                ],
+            ),
+            "sell": ConsolidatedLadder(
+                "sell",
+                [
+                    (name, book.depth_of_book["bids"], fee)
+                    for name, book, fee in venue_books
+                ],
+            ),
+        },
+        venues=[venue for _, venue in results],
+    )
+
+
+def price_rfq(
+    ladder: ConsolidatedLadder,
+    symbol: str,
+    amount: float,
+    amount_type: str = "base",
+    markup_rate: float = 0.0,
+) -> RfqQuote:
+    side = ladder.side
+    markup_factor = 1 + markup_rate if side == "buy" else 1 - markup_rate
+    if amount_type == "quote":
+        # The client amount includes markup; walk the book with the net notional
+        fill = ladder.fill_effective_notional(amount / markup_factor)
+    else:
+        fill = ladder.fill_base(amount)
+
+    price = None
+    slippage_bps = None
+    if fill.base > 0:
+        price = fill.effective_notional / fill.base * markup_factor
+        raw_average = fill.raw_notional / fill.base
+        if ladder.reference_price:
+            ratio = raw_average / ladder.reference_price
+            slippage_bps = (ratio - 1 if side == "buy" else 1 - ratio) * 10_000
+
+    fills = [
+        VenueFill(
+            exchange=exchange,
+            base_amount=float(fill.venue_base[index]),
+            quote_amount=float(fill.venue_raw_notional[index]),
+            average_price=float(
+                fill.venue_raw_notional[index] / fill.venue_base[index]
+            ),
+            fee_rate=float(ladder.fee_rates[index]),
+        )
+        for index, exchange in enumerate(ladder.exchanges)
+        if fill.venue_base[index] > 0
+    ]
+    return RfqQuote(
+        symbol=symbol,
+        side=side,
+        amount=amount,
+        amount_type=amount_type,
+        price=price,
+        base_amount=fill.base,
+        quote_amount=fill.effective_notional * markup_factor,
+        fully_filled=fill.complete,
+        reference_price=ladder.reference_price,
+        slippage_bps=slippage_bps,
+        markup_rate=markup_rate,
+        fills=fills,
+    )
+
+
+async def quote_rfq(
+    symbol: str = "BTC/USD",
+    side: str = "buy",
+    amount: float = 1.0,
+    amount_type: str = "base",
+) -> Union[RfqQuote, None]:
+    try:
+        ex_symbol = normalize_symbol(symbol)
+        snapshot = await get_consolidated_ladders(ex_symbol)
+        ladder = snapshot.ladders[side]
+        if not len(ladder):
+            logger.warning(f"No consolidated depth for {ex_symbol}")
+            return None
+        quote = price_rfq(
+            ladder, ex_symbol, amount, amount_type, markup_rate=Config.RFQ_MARKUP_RATE
+        )
+        quote.venues = snapshot.venues
+        return quote
+    except Exception as e:
+        logger.error(f"quote_rfq {e}")
+        return None
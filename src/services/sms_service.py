@@ -1,23 +1,25 @@
 import re
+from functools import lru_cache
 from typing import Dict, List
 
-from clicksend_client import (
-    ApiClient,
-    Configuration,
-    SMSApi,
-    SmsMessage,
-    SmsMessageCollection,
-)
-
 from src.utils.config import Config
 from src.utils.logger import setup_logger
 
 logger = setup_logger("sms_service", "logs/sms_service.log")
-# Configure ClickSend API
-configuration = Configuration()
-configuration.username = Config.CLICK_SEND_USER_NAME
-configuration.password = Config.CLICK_SEND_PASSWORD
-api_instance = SMSApi(ApiClient(configuration))
+
+
+@lru_cache(maxsize=None)
+def get_sms_api():
+    """
+    ClickSend API client, created on first use so importing this module (and
+    the auth service with it) does not require the ClickSend SDK.
+    """
+    from clicksend_client import ApiClient, Configuration, SMSApi
+
+    configuration = Configuration()
+    configuration.username = Config.CLICK_SEND_USER_NAME
+    configuration.password = Config.CLICK_SEND_PASSWORD
+    return SMSApi(ApiClient(configuration))
 
 
 def validate_phone_number(phone_number: str) -> bool:
@@ -27,6 +29,8 @@ def validate_phone_number(phone_number: str) -> bool:
 
 async def send_sms_message_collection(collection: List[Dict[str, str]]):
     try:
+        from clicksend_client import SmsMessage, SmsMessageCollection
+
         # Prepare SMS messages for the API
         sms_collection = [
             SmsMessage(source="sdk", body=msg["message"], to=msg["to_phone_number"])
@@ -35,7 +39,7 @@ async def send_sms_message_collection(collection: List[Dict[str, str]]):
         sms_messages = SmsMessageCollection(messages=sms_collection)
 
         # Make asynchronous request using ClickSend's API
-        response_thread = api_instance.sms_send_post(sms_messages, async_req=True)
+        response_thread = get_sms_api().sms_send_post(sms_messages, async_req=True)
         response = response_thread.get()
 
         # Log the success response
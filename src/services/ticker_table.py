@@ -0,0 +1,348 @@
+import asyncio
+import json
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import ccxt.async_support as ccxt
+import numpy as np
+
+from src.services.connect_exchange_service import (
+    PRIORITY_BACKGROUND,
+    exchange_registry,
+    get_exchange_key_by_exchange_name,
+    request_priority,
+)
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = setup_logger("ticker_table", "logs/ticker_table.log")
+
+NUMERIC_FIELDS = (
+    "high",
+    "low",
+    "bid",
+    "bidVolume",
+    "ask",
+    "askVolume",
+    "vwap",
+    "open",
+    "close",
+    "last",
+    "previousClose",
+    "change",
+    "percentage",
+    "average",
+    "baseVolume",
+    "quoteVolume",
+)
+FIELDS = ("symbol",) + NUMERIC_FIELDS + ("datetime",)
+
+RenderKey = Tuple[Optional[str], Optional[float], Optional[str], tuple, Optional[int]]
+
+
+def _quote_currency(symbol: str) -> str:
+    # "BTC/USD" -> "USD", "BTC/USD:USD" (swap) -> "USD"
+    return symbol.split("/")[-1].split(":")[0]
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+class RenderedTickers:
+    """Encoded response body for one query on one table version."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{zlib.crc32(body):08x}-{len(body)}"'
+
+
+class TickerTable:
+    """
+    Immutable column-oriented snapshot of every ticker on an exchange.
+
+    Numeric fields are float arrays (NaN for missing values), so filtering and
+    sorting are vectorized. Encoded query results are memoized on the table,
+    which is replaced as a whole on refresh.
+    """
+
+    def __init__(self, exchange_name: str, tickers: dict):
+        self.exchange_name = exchange_name
+        rows = list(tickers.values())
+        self.symbols = np.array([ticker["symbol"] for ticker in rows], dtype=object)
+        self.quotes = np.array(
+            [_quote_currency(symbol) for symbol in self.symbols], dtype=object
+        )
+        self.datetimes = np.array(
+            [ticker.get("datetime") for ticker in rows], dtype=object
+        )
+        self.columns: Dict[str, np.ndarray] = {
+            field: np.array(
+                [
+                    np.nan if ticker.get(field) is None else ticker[field]
+                    for ticker in rows
+                ],
+                dtype=float,
+            )
+            for field in NUMERIC_FIELDS
+        }
+        self.updated_at = time.time()
+        self._rendered: Dict[RenderKey, RenderedTickers] = {}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def same_data(self, other: Optional["TickerTable"]) -> bool:
+        if other is None or len(other) != len(self):
+            return False
+        if not np.array_equal(self.symbols, other.symbols):
+            return False
+        if not np.array_equal(self.datetimes, other.datetimes):
+            return False
+        return all(
+            np.array_equal(self.columns[field], other.columns[field], equal_nan=True)
+            for field in NUMERIC_FIELDS
+        )
+
+    def column(self, field: str) -> np.ndarray:
+        if field == "symbol":
+            return self.symbols
+        if field == "datetime":
+            return self.datetimes
+        if field in self.columns:
+            return self.columns[field]
+        raise ValueError(f"Unknown ticker field {field}")
+
+    def select(
+        self,
+        quote: Optional[str] = None,
+        min_volume: Optional[float] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Return the row indices matching the filters, in ``sort`` order.
+
+        ``min_volume`` applies to ``quoteVolume``; prefix ``sort`` with ``-``
+        for descending order. Missing values sort last either way.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if quote:
+            mask &= self.quotes == quote.upper()
+        if min_volume is not None:
+            mask &= self.columns["quoteVolume"] >= min_volume
+        indices = np.flatnonzero(mask)
+        if sort:
+            descending = sort.startswith("-")
+            values = self.column(sort.lstrip("-"))[indices]
+            if values.dtype == object:
+                order = np.argsort(values.astype(str), kind="stable")
+                if descending:
+                    order = order[::-1]
+            else:
+                order = np.argsort(-values if descending else values, kind="stable")
+            indices = indices[order]
+        if limit is not None:
+            indices = indices[:limit]
+        return indices
+
+    def rows(self, indices: np.ndarray, fields: Sequence[str] = FIELDS) -> List[dict]:
+        columns = []
+        for field in fields:
+            values = self.column(field)[indices].tolist()
+            if field in self.columns:
+                values = [None if value != value else value for value in values]
+            columns.append(values)
+        return [dict(zip(fields, row)) for row in zip(*columns)]
+
+    def render(
+        self,
+        quote: Optional[str] = None,
+        min_volume: Optional[float] = None,
+        sort: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+    ) -> RenderedTickers:
+        fields = tuple(fields or FIELDS)
+        key = (quote, min_volume, sort, fields, limit)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            for field in fields:
+                self.column(field)  # validate before encoding
+            indices = self.select(quote, min_volume, sort, limit)
+            rendered = RenderedTickers(_dumps(self.rows(indices, fields)))
+            if len(self._rendered) < Config.TICKER_TABLE_RENDER_CACHE_SIZE:
+                self._rendered[key] = rendered
+        return rendered
+
+
+class _TickerSubscription:
+    def __init__(self, exchange_name: str):
+        self.exchange_name = exchange_name
+        self.table: Optional[TickerTable] = None
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.last_access = time.monotonic()
+        self.refreshes = 0
+        self.changes = 0
+        self.errors = 0
+
+
+class TickerTableService:
+    """
+    Keeps a ``TickerTable`` per exchange refreshed by a background poller.
+
+    Polling starts on the first request for an exchange and runs every
+    ``refresh_interval`` seconds at background priority. A new table is only
+    published when the data changed, so ETags stay stable between real
+    updates. Exchanges not read for ``idle_ttl`` seconds stop polling.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = 2.0,
+        idle_ttl: float = 300.0,
+        first_load_timeout: float = 10.0,
+        reap_interval: float = 30.0,
+    ):
+        self.refresh_interval = refresh_interval
+        self.idle_ttl = idle_ttl
+        self.first_load_timeout = first_load_timeout
+        self.reap_interval = reap_interval
+        self._subscriptions: Dict[str, _TickerSubscription] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    def subscribe(self, exchange_name: str) -> _TickerSubscription:
+        key = exchange_name.lower()
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            subscription = _TickerSubscription(exchange_name)
+            subscription.task = asyncio.create_task(self._run(subscription))
+            self._subscriptions[key] = subscription
+            logger.info(f"Started ticker polling for {exchange_name}")
+        subscription.last_access = time.monotonic()
+        return subscription
+
+    async def is_supported(self, exchange_name: str) -> bool:
+        """Whether ``exchange_name`` has configured keys and a ccxt class."""
+        try:
+            api = await get_exchange_key_by_exchange_name(exchange_name)
+        except ValueError:
+            return False
+        return api.exchange_name.lower() in ccxt.exchanges
+
+    async def get_table(self, exchange_name: str) -> Optional[TickerTable]:
+        """
+        Current table for ``exchange_name``, waiting for the first load if
+        needed, or None if the exchange is not supported or did not load.
+        """
+        if exchange_name.lower() not in self._subscriptions:
+            # Unknown names must not start a poller that only ever fails
+            if not await self.is_supported(exchange_name):
+                logger.warning(f"No ticker table for unknown exchange {exchange_name}")
+                return None
+        subscription = self.subscribe(exchange_name)
+        try:
+            await asyncio.wait_for(
+                subscription.ready.wait(), timeout=self.first_load_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"No tickers loaded yet for {exchange_name}")
+            return None
+        return subscription.table
+
+    async def refresh(self, subscription: _TickerSubscription):
+        async with exchange_registry.lease_by_exchange_name(
+            subscription.exchange_name
+        ) as exchange:
+            # The first load serves a waiting request, later ones are background
+            if subscription.ready.is_set():
+                with request_priority(PRIORITY_BACKGROUND):
+                    tickers = await exchange.fetch_tickers()
+            else:
+                tickers = await exchange.fetch_tickers()
+        table = TickerTable(subscription.exchange_name, tickers)
+        subscription.refreshes += 1
+        if not table.same_data(subscription.table):
+            subscription.table = table
+            subscription.changes += 1
+        subscription.ready.set()
+
+    async def _run(self, subscription: _TickerSubscription):
+        backoff = self.refresh_interval
+        while True:
+            try:
+                await self.refresh(subscription)
+                backoff = self.refresh_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                subscription.errors += 1
+                logger.error(
+                    f"Ticker refresh for {subscription.exchange_name} failed: {e}"
+                )
+                backoff = min(backoff * 2, 60.0)
+            await asyncio.sleep(backoff)
+
+    async def unsubscribe(self, exchange_name: str):
+        subscription = self._subscriptions.pop(exchange_name.lower(), None)
+        if subscription and subscription.task:
+            subscription.task.cancel()
+            try:
+                await subscription.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            logger.info(f"Stopped ticker polling for {exchange_name}")
+
+    async def evict_idle(self):
+        now = time.monotonic()
+        for key, subscription in list(self._subscriptions.items()):
+            if now - subscription.last_access > self.idle_ttl:
+                await self.unsubscribe(key)
+
+    async def _reap_forever(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"Ticker table reaper error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            exchange: {
+                "symbols": len(subscription.table) if subscription.table else 0,
+                "updated_at": (
+                    subscription.table.updated_at if subscription.table else None
+                ),
+                "refreshes": subscription.refreshes,
+                "changes": subscription.changes,
+                "errors": subscription.errors,
+            }
+            for exchange, subscription in self._subscriptions.items()
+        }
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for key in list(self._subscriptions):
+            await self.unsubscribe(key)
+
+
+ticker_tables = TickerTableService(
+    refresh_interval=Config.TICKER_TABLE_REFRESH_SECONDS,
+    idle_ttl=Config.TICKER_TABLE_IDLE_TTL,
+)
@@ -0,0 +1,81 @@
+import dataclasses
+import json
+import zlib
+from typing import Any
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+# First byte of every encoded value: codec id in the high bits, compression flag
+# in the lowest bit. orjson and stdlib json share an id as they produce JSON.
+_JSON = 0x00
+_MSGPACK = 0x02
+_COMPRESSED = 0x01
+
+
+def to_builtin(value: Any) -> Any:
+    """Convert models and dataclasses to plain structures for serialization."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, "tolist"):  # numpy arrays and scalars
+        return value.tolist()
+    raise TypeError(f"Type is not serializable: {type(value)}")
+
+
+class Codec:
+    """
+    Binary codec for cached values.
+
+    Uses orjson (or msgpack) when installed and falls back to stdlib json.
+    Pydantic models, dataclasses such as ``OHLCVData`` and numpy values are
+    supported. Payloads larger than ``compress_threshold`` bytes are zlib
+    compressed. Decoding reads the header byte, so values written with any
+    codec can be read back.
+    """
+
+    def __init__(self, name: str = "orjson", compress_threshold: int = 4096):
+        if name == "msgpack" and msgpack is None:
+            name = "orjson"
+        if name == "orjson" and orjson is None:
+            name = "json"
+        self.name = name
+        self.compress_threshold = compress_threshold
+
+    def dumps(self, value: Any) -> bytes:
+        if self.name == "msgpack":
+            header = _MSGPACK
+            payload = msgpack.packb(value, default=to_builtin)
+        else:
+            header = _JSON
+            payload = _json_dumps(value)
+        if self.compress_threshold and len(payload) > self.compress_threshold:
+            header |= _COMPRESSED
+            payload = zlib.compress(payload, 1)
+        return bytes((header,)) + payload
+
+    def loads(self, data: bytes) -> Any:
+        header, payload = data[0], data[1:]
+        if header & _COMPRESSED:
+            payload = zlib.decompress(payload)
+        if header & ~_COMPRESSED == _MSGPACK:
+            return msgpack.unpackb(payload)
+        return orjson.loads(payload) if orjson else json.loads(payload)
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            value, default=to_builtin, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(value, default=to_builtin, separators=(",", ":")).encode()
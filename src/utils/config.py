@@ -34,3 +34,99 @@ class Config:
     DEFAULT_PASSWORD = os.getenv("DEFAULT_PASSWORD")
     REGISTRATION_EMAIL_TEMPLATE_ID = os.getenv("REGISTRATION_EMAIL_TEMPLATE_ID")
     LOGIN_EMAIL_TEMPLATE_ID = os.getenv("LOGIN_EMAIL_TEMPLATE_ID")
+    EXCHANGE_REGISTRY_MAX_SIZE = int(os.getenv("EXCHANGE_REGISTRY_MAX_SIZE", "32"))
+    EXCHANGE_REGISTRY_IDLE_TTL = float(os.getenv("EXCHANGE_REGISTRY_IDLE_TTL", "600"))
+    EXCHANGE_KEY_CACHE_TTL = float(os.getenv("EXCHANGE_KEY_CACHE_TTL", "60"))
+    AGGREGATION_TIMEOUT_SECONDS = float(os.getenv("AGGREGATION_TIMEOUT_SECONDS", "2"))
+    AGGREGATION_MAX_TIMEOUT_SECONDS = float(
+        os.getenv("AGGREGATION_MAX_TIMEOUT_SECONDS", "10")
+    )
+    ORDER_BOOK_IDLE_TTL = float(os.getenv("ORDER_BOOK_IDLE_TTL", "120"))
+    ORDER_BOOK_SNAPSHOT_TIMEOUT = float(os.getenv("ORDER_BOOK_SNAPSHOT_TIMEOUT", "1"))
+    RFQ_LADDER_TTL = float(os.getenv("RFQ_LADDER_TTL", "0.5"))
+    RFQ_LADDER_CACHE_SIZE = int(os.getenv("RFQ_LADDER_CACHE_SIZE", "256"))
+    # Desk markup on RFQ prices as a fraction, on top of exchange fees
+    RFQ_MARKUP_RATE = float(os.getenv("RFQ_MARKUP_RATE", "0"))
+    CACHE_CODEC = os.getenv("CACHE_CODEC", "orjson")
+    CACHE_COMPRESS_THRESHOLD = int(os.getenv("CACHE_COMPRESS_THRESHOLD", "4096"))
+    CACHE_LOCAL_TTL = float(os.getenv("CACHE_LOCAL_TTL", "5"))
+    CACHE_LOCAL_SIZE = int(os.getenv("CACHE_LOCAL_SIZE", "4096"))
+    TICKER_CACHE_TTL = int(os.getenv("TICKER_CACHE_TTL", "1"))
+    CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR", "data/candles")
+    CANDLE_PAGE_LIMIT = int(os.getenv("CANDLE_PAGE_LIMIT", "720"))
+    CANDLE_DEFAULT_LIMIT = int(os.getenv("CANDLE_DEFAULT_LIMIT", "720"))
+    CANDLE_MAX_LIMIT = int(os.getenv("CANDLE_MAX_LIMIT", "5000"))
+    BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+    SCHEDULER_BURST = float(os.getenv("SCHEDULER_BURST", "0")) or None
+    SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "2000"))
+    CANDLE_BASE_TIMEFRAMES = os.getenv("CANDLE_BASE_TIMEFRAMES", "1m,1h,1d").split(",")
+    TICKER_TABLE_REFRESH_SECONDS = float(os.getenv("TICKER_TABLE_REFRESH_SECONDS", "2"))
+    TICKER_TABLE_IDLE_TTL = float(os.getenv("TICKER_TABLE_IDLE_TTL", "300"))
+    TICKER_TABLE_RENDER_CACHE_SIZE = int(
+        os.getenv("TICKER_TABLE_RENDER_CACHE_SIZE", "256")
+    )
+    ENCODED_CACHE_SIZE = int(os.getenv("ENCODED_CACHE_SIZE", "256"))
+    MARKETS_CATALOG_EXCHANGES = [
+        name
+        for name in os.getenv("MARKETS_CATALOG_EXCHANGES", "Kraken").split(",")
+        if name
+    ]
+    MARKETS_REFRESH_SECONDS = float(os.getenv("MARKETS_REFRESH_SECONDS", "3600"))
+    FEE_POLL_SECONDS = float(os.getenv("FEE_POLL_SECONDS", "30"))
+    WS_UPSTREAM_LINGER_SECONDS = float(os.getenv("WS_UPSTREAM_LINGER_SECONDS", "5"))
+    WS_CLIENT_QUEUE_SIZE = int(os.getenv("WS_CLIENT_QUEUE_SIZE", "256"))
+    # Slow consumer policy per channel: latest, drop or disconnect. Book
+    # deltas must not be conflated (a dropped delta makes the client resync)
+    WS_CONFLATION = dict(
+        item.split(":", 1)
+        for item in os.getenv(
+            "WS_CONFLATION", "ticker:latest,candles:latest,trades:drop,book:disconnect"
+        ).split(",")
+        if item
+    )
+    WS_MAX_BATCH = int(os.getenv("WS_MAX_BATCH", "100"))
+    WS_HEARTBEAT_SECONDS = float(os.getenv("WS_HEARTBEAT_SECONDS", "15"))
+    WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", "200"))
+    WS_BOOK_DEPTH = int(os.getenv("WS_BOOK_DEPTH", "25"))
+    # "redis" shares upstream watchers across workers and nodes
+    WS_FANOUT = os.getenv("WS_FANOUT", "local")
+    WS_LEADER_LEASE_SECONDS = float(os.getenv("WS_LEADER_LEASE_SECONDS", "5"))
+    # Rate limit policies per route group as name=path_prefix:limit/window_seconds:
+    # algorithm (sliding_window or token_bucket); the longest matching prefix wins
+    RATE_LIMIT_POLICIES = os.getenv(
+        "RATE_LIMIT_POLICIES",
+        "auth=/api/v1/auth:10/60:sliding_window,"
+        "quotes=/api/v1/quotes:300/60:token_bucket,"
+        "default=/:60/60:sliding_window",
+    )
+    # Limit multiplier per authenticated user tier
+    RATE_LIMIT_TIERS = {
+        tier: float(multiplier)
+        for tier, multiplier in (
+            item.split(":", 1)
+            for item in os.getenv("RATE_LIMIT_TIERS", "basic:1,pro:5,vip:20").split(",")
+            if item
+        )
+    }
+    # Number of proxies in front of the app whose X-Forwarded-For entries are
+    # trusted; 0 keys anonymous clients on the socket peer address
+    RATE_LIMIT_TRUSTED_HOPS = int(os.getenv("RATE_LIMIT_TRUSTED_HOPS", "0"))
+    # Authenticated users cached in-process between database reads
+    AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "10000"))
+    AUTH_PRINCIPAL_TTL = float(os.getenv("AUTH_PRINCIPAL_TTL", "60"))
+    # Process-wide logging: records are queued and written by a background
+    # thread as JSON lines (or "text"); records are dropped when the queue
+    # is full rather than blocking the event loop
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Connection pool of the process-wide MongoDB client
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_CONNECTING = int(os.getenv("MONGO_MAX_CONNECTING", "2"))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+        os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")
+    )
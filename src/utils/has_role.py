@@ -1,7 +1,15 @@
-from typing import List
+from typing import List, Union
 
 from src.models.AuthModel import User
 
 
-def has_role(user: User, required_roles: List[str]):
-    return bool(user.roles and any(role in required_roles for role in user.roles))
+def _role_name(role) -> str:
+    if isinstance(role, dict):
+        return role.get("role_name")
+    return getattr(role, "role_name", role)
+
+
+def has_role(user: Union[User, dict], required_roles: List[str]):
+    # Users come as models or as documents (``request.state.user``)
+    roles = user.get("roles") if isinstance(user, dict) else user.roles
+    return bool(roles and any(_role_name(role) in required_roles for role in roles))
@@ -1,15 +1,197 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
 from logging import Logger
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Hashable, List, Optional
 
+from src.utils.config import Config
 
-def setup_logger(name, log_file, level=logging.INFO) -> Logger:
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra`` fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """Enqueues without blocking; records are dropped when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback here so the record can be written
+        # later from the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _FileRouter(logging.Handler):
+    """Writes each record to the log file registered for its logger."""
+
+    def __init__(self, formatter: logging.Formatter):
+        super().__init__()
+        self.setFormatter(formatter)
+        self.routes: Dict[str, str] = {}
+        self._files: Dict[str, logging.FileHandler] = {}
+
+    def emit(self, record: logging.LogRecord):
+        log_file = self.routes.get(record.name)
+        if log_file is None:
+            return
+        handler = self._files.get(log_file)
+        if handler is None:
+            handler = self._files[log_file] = logging.FileHandler(log_file)
+            handler.setFormatter(self.formatter)
+        handler.emit(record)
+
+    def close(self):
+        for handler in self._files.values():
+            handler.close()
+        super().close()
+
+
+class _Pipeline:
+    def __init__(self, log_format: str, queue_size: int):
+        formatter = (
+            JSONFormatter()
+            if log_format == "json"
+            else logging.Formatter("%(asctime)s %(levelname)s %(message)s")
+        )
+        self.router = _FileRouter(formatter)
+        self.handler = _QueueHandler(queue.Queue(queue_size))
+        self.listener = QueueListener(self.handler.queue, self.router)
+        self.listener.start()
+
+    def restart(self):
+        # The writer thread does not survive a fork (pre-forking servers)
+        self.handler.queue = queue.Queue(self.handler.queue.maxsize)
+        self.listener = QueueListener(self.handler.queue, self.router)
+        self.listener.start()
+
+    def stop(self):
+        self.listener.stop()
+        self.router.close()
+
+
+_pipeline: Optional[_Pipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def configure_logging(
+    log_format: Optional[str] = None, queue_size: Optional[int] = None
+) -> _Pipeline:
+    """
+    Set up the process-wide logging pipeline (once): module loggers put
+    records on a bounded queue and a background thread formats them (JSON
+    lines by default) and writes them to each module's log file, so logging
+    never does disk I/O on the event loop.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = _Pipeline(
+                log_format or Config.LOG_FORMAT, queue_size or Config.LOG_QUEUE_SIZE
+            )
+            atexit.register(_pipeline.stop)
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=_pipeline.restart)
+    return _pipeline
+
+
+def setup_logger(name, log_file, level=None) -> Logger:
     """Function to setup a logger."""
-    handler = logging.FileHandler(log_file)
-    formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
-    handler.setFormatter(formatter)
+    pipeline = configure_logging()
+    pipeline.router.routes[name] = log_file
 
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    logger.addHandler(handler)
+    logger.setLevel(level or Config.LOG_LEVEL)
+    if pipeline.handler not in logger.handlers:
+        logger.addHandler(pipeline.handler)
 
     return logger
+
+
+class LogThrottle:
+    """
+    Rate limit for log messages emitted on hot paths (per tick, per send,
+    per request): at most one message per key every ``interval`` seconds,
+    reporting how many similar messages were suppressed in between.
+    """
+
+    def __init__(self, interval: float = 10.0, max_keys: int = 1024):
+        self.interval = interval
+        self.max_keys = max_keys
+        self.suppressed = 0
+        self._keys: Dict[Hashable, List] = {}
+
+    def log(self, logger: Logger, level: int, key: Hashable, message: str) -> bool:
+        now = time.monotonic()
+        state = self._keys.get(key)
+        if state is not None and now - state[0] < self.interval:
+            state[1] += 1
+            self.suppressed += 1
+            return False
+        if len(self._keys) >= self.max_keys:
+            self._keys.clear()
+        suppressed = state[1] if state is not None else 0
+        self._keys[key] = [now, 0]
+        if suppressed:
+            message = f"{message} ({suppressed} similar messages suppressed)"
+        logger.log(level, message, extra={"suppressed": suppressed})
+        return True
+
+    def error(self, logger: Logger, key: Hashable, message: str) -> bool:
+        return self.log(logger, logging.ERROR, key, message)
+
+    def warning(self, logger: Logger, key: Hashable, message: str) -> bool:
+        return self.log(logger, logging.WARNING, key, message)
+
+
+# Shared by the hot paths so suppressed counts show up in one place
+log_throttle = LogThrottle()
+
+
+def logging_stats() -> dict:
+    pipeline = configure_logging()
+    return {
+        "queued": pipeline.handler.queue.qsize(),
+        "dropped": pipeline.handler.dropped,
+        "throttled": log_throttle.suppressed,
+    }
@@ -1,6 +1,10 @@
+from collections import deque
+from typing import Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from pymongo.collection import Collection
 from pymongo.errors import ConnectionFailure
+from pymongo.monitoring import ConnectionPoolListener
 
 from src.utils.config import Config
 from src.utils.logger import setup_logger
@@ -8,15 +12,141 @@ from src.utils.logger import setup_logger
 logger = setup_logger("mongo", "logs/mongo.log")
 
 
+class PoolMetrics(ConnectionPoolListener):
+    """
+    Connection pool events of the shared client: connections open and in
+    use, checkouts, failed checkouts (e.g. wait queue timeouts) and how
+    long checkouts waited for a connection, to size the pool under load.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.failed = {}
+        self.cleared = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits = deque(maxlen=window)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.failed[event.reason] = self.failed.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        wait = event.duration or 0.0
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self._waits.append(wait)
+
+    def connection_checked_in(self, event):
+        self.checked_in += 1
+
+    def to_dict(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "connections": self.created - self.closed,
+            "in_use": self.checked_out - self.checked_in,
+            "checkouts": self.checked_out,
+            "checkout_failures": dict(self.failed),
+            "pool_cleared": self.cleared,
+            "avg_wait_ms": (
+                self.wait_total / self.checked_out * 1000 if self.checked_out else 0.0
+            ),
+            "p99_wait_ms": waits[int(len(waits) * 0.99)] * 1000 if waits else 0.0,
+            "max_wait_ms": self.wait_max * 1000,
+        }
+
+
+class MongoPool:
+    """
+    One Motor client (and so one connection pool) for the whole process,
+    created in the app lifespan or on first use and shared by request
+    handlers, middleware and background services.
+    """
+
+    def __init__(self, uri: Optional[str], database: Optional[str], **options):
+        self.uri = uri
+        self.database = database
+        self.options = options
+        self.metrics = PoolMetrics()
+        self.client: Optional[AsyncIOMotorClient] = None
+
+    def connect(self) -> AsyncIOMotorClient:
+        if self.client is None:
+            self.client = AsyncIOMotorClient(
+                self.uri, event_listeners=[self.metrics], **self.options
+            )
+            logger.info(f"Created MongoDB client with {self.options}")
+        return self.client
+
+    @property
+    def db(self) -> AsyncIOMotorDatabase:
+        return self.connect()[self.database]
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.client is not None,
+            "options": self.options,
+            **self.metrics.to_dict(),
+        }
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            logger.info("Closed MongoDB client")
+
+
+mongo_pool = MongoPool(
+    Config.MONGO_URI,
+    Config.MONGO_DATA_BASE,
+    maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+    minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+    maxConnecting=Config.MONGO_MAX_CONNECTING,
+    maxIdleTimeMS=Config.MONGO_MAX_IDLE_TIME_MS,
+    waitQueueTimeoutMS=Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    connectTimeoutMS=Config.MONGO_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    """The application database on the shared client."""
+    return mongo_pool.db
+
+
 async def get_db():
-    client = AsyncIOMotorClient(Config.MONGO_URI)
     try:
-        yield client[Config.MONGO_DATA_BASE]
+        yield mongo_pool.db
     except ConnectionFailure as e:
         logger.error(f"MongoDB Connection Error: {e}")
         raise ValueError("Cannot connect to MongoDB") from e
-    finally:
-        client.close()
 
 
 def get_otp_collection(db: AsyncIOMotorDatabase) -> Collection:
@@ -1,60 +1,234 @@
-import json
-from typing import Any, Optional
+import time
+from typing import Any, Dict, List, Optional
 
 import aioredis
 
+from src.utils.codec import Codec
 from src.utils.config import Config
+from src.utils.local_cache import LocalCache
 from src.utils.logger import setup_logger
 
 logger = setup_logger("redis_utils", "logs/redis_utils.log")
 
+_MISSING = object()
+
+
+class TierStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.latency = 0.0
+        self.requests = 0
+
+    def record(self, hits: int, misses: int, started: float):
+        self.hits += hits
+        self.misses += misses
+        self.requests += 1
+        self.latency += time.perf_counter() - started
+
+    def to_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "avg_latency_ms": (
+                self.latency / self.requests * 1000 if self.requests else 0.0
+            ),
+        }
+
 
 class RedisCache:
-    def __init__(self, expire: int = 60):
+    """
+    Two-tier cache: a bounded in-process LRU/TTL tier in front of Redis.
+
+    Reads are served from the local tier when possible and fall through to
+    Redis otherwise, filling the local tier on the way back for no longer
+    than the key has left to live in Redis. Values are serialized with a
+    binary ``Codec`` (orjson or msgpack, compressed when large), and both
+    tiers return them decoded (models and dataclasses come back as plain
+    dicts). ``local_ttl`` caps how long a value lives in-process; set
+    ``local_size=0`` to disable the local tier.
+    """
+
+    def __init__(
+        self,
+        expire: int = 60,
+        local_ttl: float = Config.CACHE_LOCAL_TTL,
+        local_size: int = Config.CACHE_LOCAL_SIZE,
+        codec: Optional[Codec] = None,
+    ):
         self.expire = expire
         self.redis = None
+        self.local = LocalCache(max_size=local_size, ttl=local_ttl)
+        self.codec = codec or Codec(
+            Config.CACHE_CODEC, compress_threshold=Config.CACHE_COMPRESS_THRESHOLD
+        )
+        self.local_stats = TierStats()
+        self.redis_stats = TierStats()
+        self._scripts: Dict[str, Any] = {}
 
     def connect(self):
         if not self.redis:
             try:
-                self.redis = aioredis.from_url(
-                    Config.REDIS_URI, encoding="utf-8", decode_responses=True
-                )
+                self.redis = aioredis.from_url(Config.REDIS_URI)
                 logger.info("Connected to Redis")
             except Exception as e:
                 logger.error(f"Failed to connect Redis {e}")
 
+    def _local_ttl(self, expire: int) -> float:
+        return min(expire, self.local.ttl)
+
+    def _fill_local(self, key: str, value: Any, pttl: int):
+        # PTTL is -1 for a key without expiry and -2 once it is gone
+        if pttl == -1:
+            self.local.set(key, value)
+        elif pttl > 0:
+            self.local.set(key, value, self._local_ttl(pttl / 1000))
+
+    def _set_local(self, key: str, value: Any, expire: int) -> bytes:
+        """Encode ``value`` and keep its decoded form in the local tier."""
+        encoded = self.codec.dumps(value)
+        if self.local.max_size > 0:
+            self.local.set(key, self.codec.loads(encoded), self._local_ttl(expire))
+        return encoded
+
     async def get(self, key: str) -> Optional[Any]:
+        started = time.perf_counter()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.local_stats.record(1, 0, started)
+            return value
+        self.local_stats.record(0, 1, started)
+
         try:
             if self.redis is None:
                 self.connect()
-            cache_data = await self.redis.get(key)
-            return json.load(cache_data) if cache_data else None
+            started = time.perf_counter()
+            async with self.redis.pipeline(transaction=False) as pipe:
+                cache_data, pttl = await pipe.get(key).pttl(key).execute()
+            self.redis_stats.record(
+                int(cache_data is not None), int(cache_data is None), started
+            )
+            if cache_data is None:
+                return None
+            value = self.codec.loads(cache_data)
+            self._fill_local(key, value, pttl)
+            return value
         except Exception as e:
             logger.error(f"Error retrieving key {key} from Redis: {e}")
             return None
 
-    async def set(self, key: str, value: Any, expire: Optional[int] = None):
+    async def mget(self, keys: List[str]) -> Dict[str, Any]:
+        """Return the cached values for ``keys`` (missing keys are omitted)."""
+        found: Dict[str, Any] = {}
+        remote_keys = []
+        started = time.perf_counter()
+        for key in keys:
+            value = self.local.get(key, _MISSING)
+            if value is _MISSING:
+                remote_keys.append(key)
+            else:
+                found[key] = value
+        self.local_stats.record(len(found), len(remote_keys), started)
+        if not remote_keys:
+            return found
+
+        try:
+            if self.redis is None:
+                self.connect()
+            started = time.perf_counter()
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.mget(remote_keys)
+                for key in remote_keys:
+                    pipe.pttl(key)
+                values, *pttls = await pipe.execute()
+            hits = sum(value is not None for value in values)
+            self.redis_stats.record(hits, len(values) - hits, started)
+            for key, cache_data, pttl in zip(remote_keys, values, pttls):
+                if cache_data is not None:
+                    found[key] = self.codec.loads(cache_data)
+                    self._fill_local(key, found[key], pttl)
+        except Exception as e:
+            logger.error(f"Error retrieving keys {remote_keys} from Redis: {e}")
+        return found
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        expire: Optional[int] = None,
+        local_only: bool = False,
+    ):
         try:
             if key is not None and value is not None:
+                expire_time = expire if expire is not None else self.expire
+                encoded = self._set_local(key, value, expire_time)
+                if local_only:
+                    return
                 if self.redis is None:
                     self.connect()
-                expire_time = expire if expire is not None else self.expire
-                serialized_value = json.dumps(value)
-                await self.redis.set(key, serialized_value, ex=expire_time)
-                logger.info(f"Key {key} stored in Redis with expiration {expire_time}s")
+                await self.redis.set(key, encoded, ex=expire_time)
         except Exception as e:
             logger.error(f"Error setting key {key} in Redis: {e}")
 
-    async def incr(self, key: str) -> int:
+    async def mset(self, values: Dict[str, Any], expire: Optional[int] = None):
+        """Store several values in one pipelined round trip."""
+        try:
+            expire_time = expire if expire is not None else self.expire
+            if self.redis is None:
+                self.connect()
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    if key is None or value is None:
+                        continue
+                    encoded = self._set_local(key, value, expire_time)
+                    pipe.set(key, encoded, ex=expire_time)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error setting keys {list(values)} in Redis: {e}")
+
+    async def delete(self, key: str):
+        self.local.delete(key)
         try:
             if self.redis is None:
                 self.connect()
-            return await self.redis.incr(key)
+            await self.redis.delete(key)
+        except Exception as e:
+            logger.error(f"Error deleting key {key} in Redis: {e}")
+
+    async def incr(self, key: str, expire: Optional[int] = None) -> int:
+        """Atomically increment a Redis counter, setting its expiry on creation."""
+        try:
+            if self.redis is None:
+                self.connect()
+            count = await self.redis.incr(key)
+            if count == 1 and expire is not None:
+                await self.redis.expire(key, expire)
+            return count
         except Exception as e:
             logger.error(f"Error incrementing key {key} in Redis: {e}")
             return 0
 
+    async def run_script(self, script: str, keys: List[str], args: List[Any]) -> Any:
+        """
+        Run a Lua script atomically in one round trip (EVALSHA, loading the
+        script on first use). Errors are raised to the caller.
+        """
+        if self.redis is None:
+            self.connect()
+        registered = self._scripts.get(script)
+        if registered is None:
+            registered = self._scripts[script] = self.redis.register_script(script)
+        return await registered(keys=keys, args=args)
+
+    def stats(self) -> dict:
+        return {
+            "codec": self.codec.name,
+            "local": {**self.local_stats.to_dict(), "size": len(self.local)},
+            "redis": self.redis_stats.to_dict(),
+        }
+
     async def close(self):
         if self.redis:
             await self.redis.close()
@@ -0,0 +1,113 @@
+import json
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from src.utils.codec import to_builtin
+from src.utils.config import Config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    # The plain models used for market data have no aliases or custom
+    # serializers, so their field dict encodes the same as model_dump()
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    return to_builtin(value)
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode a response body without FastAPI's validate-then-encode round trip.
+
+    Pydantic models, dataclasses such as ``OHLCVData`` and numpy values are
+    encoded by orjson in one pass. Without orjson, models are serialized by
+    pydantic-core. ``bytes`` are treated as already encoded.
+    """
+    if isinstance(content, bytes):
+        return content
+    if orjson is not None:
+        return orjson.dumps(
+            content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+    return json.dumps(content, default=to_builtin, separators=(",", ":")).encode()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches ``etag``, using the weak
+    comparison RFC 9110 requires for it: a list of tags, ``W/`` prefixes
+    ignored, or ``*`` for any.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+class EncodedCache:
+    """
+    Encoded bytes for long-lived shared objects, keyed by identity.
+
+    Services mark objects they hand out repeatedly (a memoized order book, a
+    cached ticker) and the first response that serializes one stores its
+    bytes, so later responses reuse them. Unmarked objects are encoded each
+    time. At most ``max_size`` objects are kept alive.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[Any, Optional[bytes]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def mark(self, obj: Any) -> Any:
+        if id(obj) not in self._entries:
+            self._entries[id(obj)] = (obj, None)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return obj
+
+    def encode(self, obj: Any) -> bytes:
+        entry = self._entries.get(id(obj))
+        if entry is None or entry[0] is not obj:
+            return encode_json(obj)
+        if entry[1] is not None:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        body = encode_json(obj)
+        self._entries[id(obj)] = (obj, body)
+        return body
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+encoded_cache = EncodedCache(max_size=Config.ENCODED_CACHE_SIZE)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with ``encode_json``.
+
+    Returning an instance from a route bypasses ``response_model`` validation
+    and serialization, which is kept on the route for the OpenAPI schema only.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return encoded_cache.encode(content)
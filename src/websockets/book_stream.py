@@ -0,0 +1,211 @@
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from src.services.order_book_engine import Level, order_book_engine
+from src.utils.config import Config
+from src.utils.logger import log_throttle, setup_logger
+from src.websockets.connection_manager import (
+    POLICY_DISCONNECT,
+    ConnectionManager,
+    Topic,
+    connection_manager,
+)
+
+logger = setup_logger("book_stream", "logs/book_stream.log")
+
+CHANNEL = "book"
+
+
+def is_book_topic(topic: Topic) -> bool:
+    return topic[0].split(":")[0] == CHANNEL
+
+
+def _side_deltas(old: Dict[float, float], new: Dict[float, float]) -> List[Level]:
+    deltas = [[price, size] for price, size in new.items() if old.get(price) != size]
+    deltas.extend([price, 0.0] for price in old if price not in new)
+    return deltas
+
+
+class _BookStream:
+    def __init__(self, topic: Topic, exchange_name: str, depth: int, interval: float):
+        self.topic = topic
+        self.exchange_name = exchange_name
+        self.symbol = topic[2]
+        self.depth = depth
+        self.interval = interval
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.timestamp: Optional[int] = None
+        self.seq = 0
+        self.version: Optional[int] = None
+        self.awaiting: Set[WebSocket] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.deltas = 0
+        self.snapshots = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "type": "snapshot",
+            "seq": self.seq,
+            "bids": [[price, size] for price, size in self.bids.items()],
+            "asks": [[price, size] for price, size in self.asks.items()],
+            "timestamp": self.timestamp,
+        }
+
+
+class BookStreams:
+    """
+    Order book channel: one snapshot per client followed by level deltas.
+
+    Clients choose the depth and the update interval, and clients with the
+    same (exchange, symbol, depth, interval) share a stream. Every interval
+    the stream compares the top ``depth`` levels of the ``order_book_engine``
+    book with what it last sent and broadcasts the changed levels (size 0
+    removes a level) as one delta with the next sequence number, so bursts
+    of upstream updates are conflated. A new or resyncing client receives a
+    snapshot at the current sequence number; it ignores deltas until then
+    and resyncs when it sees a gap.
+    """
+
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        default_depth: int = 25,
+        max_depth: int = 500,
+        default_interval_ms: int = 100,
+        min_interval_ms: int = 20,
+    ):
+        self.manager = manager
+        # Deltas build on each other and must never be conflated
+        manager.policies.setdefault(CHANNEL, POLICY_DISCONNECT)
+        self.default_depth = default_depth
+        self.max_depth = max_depth
+        self.default_interval_ms = default_interval_ms
+        self.min_interval_ms = min_interval_ms
+        self._streams: Dict[Topic, _BookStream] = {}
+
+    def make_topic(
+        self,
+        exchange_name: str,
+        symbol: str,
+        depth: Optional[int] = None,
+        interval_ms: Optional[int] = None,
+    ) -> Topic:
+        depth = int(depth or self.default_depth)
+        interval_ms = int(interval_ms or self.default_interval_ms)
+        if not order_book_engine.supports(exchange_name):
+            raise ValueError(f"Exchange {exchange_name} does not support streaming")
+        if not 0 < depth <= self.max_depth:
+            raise ValueError(f"depth must be between 1 and {self.max_depth}")
+        if interval_ms < self.min_interval_ms:
+            raise ValueError(f"interval_ms must be at least {self.min_interval_ms}")
+        return f"{CHANNEL}:{depth}:{interval_ms}", exchange_name.lower(), symbol
+
+    async def validate(self, topic: Topic):
+        """Refuse symbols the exchange does not list before subscribing."""
+        if topic not in self._streams and not await order_book_engine.lists(
+            topic[1], topic[2]
+        ):
+            raise ValueError(f"Unknown symbol {topic[2]} on {topic[1]}")
+
+    async def subscribe(self, websocket: WebSocket, topic: Topic):
+        self.manager.connect(websocket, topic)
+        stream = self._streams.get(topic)
+        if stream is None:
+            _, depth, interval_ms = topic[0].split(":")
+            stream = _BookStream(topic, topic[1], int(depth), int(interval_ms) / 1000)
+            stream.task = asyncio.create_task(self._run(stream))
+            self._streams[topic] = stream
+            logger.info(f"Started book stream {topic}")
+        stream.awaiting.add(websocket)
+
+    def resync(self, websocket: WebSocket, topic: Topic):
+        stream = self._streams.get(topic)
+        if stream is None or topic not in self.manager.client(websocket).topics:
+            raise ValueError(f"Not subscribed to {topic[0]} {topic[2]}")
+        stream.awaiting.add(websocket)
+
+    async def unsubscribe(self, websocket: WebSocket, topic: Topic):
+        self.manager.disconnect(websocket, topic)
+        await self.release(topic, websocket)
+
+    async def release(self, topic: Topic, websocket: Optional[WebSocket] = None):
+        stream = self._streams.get(topic)
+        if stream is None:
+            return
+        stream.awaiting.discard(websocket)
+        if self.manager.subscribers(topic):
+            return
+        self._streams.pop(topic)
+        stream.task.cancel()
+        try:
+            await stream.task
+        except (asyncio.CancelledError, Exception):
+            pass
+        logger.info(f"Stopped book stream {topic}")
+
+    def tick(self, stream: _BookStream):
+        # Reading through the engine also keeps its subscription alive
+        subscription = order_book_engine.subscribe(stream.exchange_name, stream.symbol)
+        if not subscription.ready.is_set():
+            return
+        book = subscription.book
+        if book.version != stream.version:
+            stream.version = book.version
+            bids = dict(book.bids.levels(stream.depth))
+            asks = dict(book.asks.levels(stream.depth))
+            delta = {
+                "bids": _side_deltas(stream.bids, bids),
+                "asks": _side_deltas(stream.asks, asks),
+            }
+            stream.bids, stream.asks = bids, asks
+            stream.timestamp = book.timestamp
+            if delta["bids"] or delta["asks"]:
+                stream.seq += 1
+                stream.deltas += 1
+                self.manager.broadcast(
+                    stream.topic,
+                    {
+                        "type": "delta",
+                        "seq": stream.seq,
+                        **delta,
+                        "timestamp": stream.timestamp,
+                    },
+                )
+        if stream.awaiting:
+            snapshot = stream.snapshot()
+            for websocket in stream.awaiting:
+                self.manager.send(websocket, snapshot, stream.topic)
+                stream.snapshots += 1
+            stream.awaiting.clear()
+
+    async def _run(self, stream: _BookStream):
+        while True:
+            try:
+                self.tick(stream)
+            except Exception as e:
+                log_throttle.error(
+                    logger, stream.topic, f"Book stream {stream.topic} failed: {e}"
+                )
+            await asyncio.sleep(stream.interval)
+
+    def stats(self) -> dict:
+        return {
+            ":".join(topic): {
+                "subscribers": self.manager.subscribers(topic),
+                "seq": stream.seq,
+                "deltas": stream.deltas,
+                "snapshots": stream.snapshots,
+            }
+            for topic, stream in self._streams.items()
+        }
+
+    async def close(self):
+        for topic in list(self._streams):
+            stream = self._streams.pop(topic)
+            stream.task.cancel()
+
+
+book_streams = BookStreams(connection_manager, default_depth=Config.WS_BOOK_DEPTH)
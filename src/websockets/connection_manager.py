@@ -1,39 +1,301 @@
-from typing import Dict, List
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 from fastapi import WebSocket
 
-from src.utils.logger import setup_logger
+from src.utils.config import Config
+from src.utils.logger import log_throttle, setup_logger
+from src.websockets.protocol import LEGACY_FORMAT, Payload, WireFormat
 
 logger = setup_logger("connection_manager", "logs/connection_manager.log")
 
+# (channel, exchange name in lower case, symbol)
+Topic = Tuple[str, str, str]
+
+# What to do with a message for a client that is falling behind
+POLICY_LATEST = "latest"  # replace its pending message on the same topic
+POLICY_DROP = "drop"  # drop the message once the queue is full
+POLICY_DISCONNECT = "disconnect"  # close the client once the queue is full
+POLICIES = (POLICY_LATEST, POLICY_DROP, POLICY_DISCONNECT)
+
+# Close code for clients disconnected for not keeping up ("try again later")
+CLOSE_SLOW_CONSUMER = 1013
+
+
+class _Outbound:
+    __slots__ = ("topic", "payload", "enqueued_at")
+
+    def __init__(self, topic: Optional[Topic], payload: Payload):
+        self.topic = topic
+        self.payload = payload
+        self.enqueued_at = time.monotonic()
+
+
+class Client:
+    """
+    One websocket connection with a bounded outbound queue drained by its own
+    writer task, so a slow client never delays the others.
+
+    With a batching wire format, everything queued since the last flush (up
+    to ``max_batch`` messages) is sent as one frame. With ``heartbeat``, a
+    heartbeat is sent whenever nothing else was for that many seconds.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int,
+        wire: WireFormat = LEGACY_FORMAT,
+        heartbeat: Optional[float] = None,
+        max_batch: int = 100,
+    ):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.wire = wire
+        self.heartbeat = heartbeat
+        self.max_batch = max_batch
+        self.topics: Set[Topic] = set()
+        self.closed = False
+        self._queue: Deque[_Outbound] = deque()
+        self._pending: Dict[Topic, _Outbound] = {}
+        self._ready = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_forever())
+        self.sent = 0
+        self.frames = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def name(self) -> str:
+        client = getattr(self.websocket, "client", None)
+        if client is None:
+            return str(id(self.websocket))
+        return f"{client.host}:{client.port}"
+
+    def enqueue(self, topic: Optional[Topic], payload: Payload, policy: str):
+        if self.closed:
+            return
+        if policy == POLICY_LATEST and topic in self._pending:
+            # Still unsent: the client only needs the newest value
+            self._pending[topic].payload = payload
+            self.conflated += 1
+            return
+        if len(self._queue) >= self.max_queue:
+            if policy == POLICY_DISCONNECT:
+                logger.warning(f"Disconnecting slow client {self.name}")
+                self.closed = True
+                asyncio.create_task(self._close(CLOSE_SLOW_CONSUMER))
+            else:
+                self.dropped += 1
+            return
+        message = _Outbound(topic, payload)
+        self._queue.append(message)
+        if policy == POLICY_LATEST:
+            self._pending[topic] = message
+        self._ready.set()
+
+    async def _wait(self):
+        if self.heartbeat is None:
+            await self._ready.wait()
+            return
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=self.heartbeat)
+        except asyncio.TimeoutError:
+            heartbeat = {"event": "heartbeat", "ts": int(time.time() * 1000)}
+            self.enqueue(None, self.wire.dumps(heartbeat), POLICY_DROP)
+
+    def _next_batch(self) -> List[_Outbound]:
+        count = min(len(self._queue), self.max_batch if self.wire.batch else 1)
+        batch = [self._queue.popleft() for _ in range(count)]
+        for message in batch:
+            if self._pending.get(message.topic) is message:
+                del self._pending[message.topic]
+        return batch
+
+    async def _write_forever(self):
+        while True:
+            await self._wait()
+            self._ready.clear()
+            while self._queue:
+                batch = self._next_batch()
+                payloads = [message.payload for message in batch]
+                try:
+                    await self.wire.send(
+                        self.websocket,
+                        self.wire.frame(payloads) if self.wire.batch else payloads[0],
+                    )
+                except Exception as e:
+                    log_throttle.error(
+                        logger, "client_send", f"Failed to send to {self.name}: {e}"
+                    )
+                    self.closed = True
+                    return
+                self.frames += 1
+                self.sent += len(batch)
+                self.lag = time.monotonic() - batch[0].enqueued_at
+                self.max_lag = max(self.max_lag, self.lag)
+
+    async def _close(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception as e:
+            logger.error(f"Failed to close client {self.name}: {e}")
+
+    async def stop(self):
+        self.closed = True
+        self._writer.cancel()
+        try:
+            await self._writer
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self.topics),
+            "queued": len(self._queue),
+            "format": self.wire.name,
+            "sent": self.sent,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "lag_ms": round(self.lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+        }
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, symbol: str, exchange_name: str):
-        await websocket.accept()
-        key = f"{exchange_name}:{symbol}"
-        if key not in self.active_connections:
-            self.active_connections[key] = []
-        self.active_connections[key].append(websocket)
-        logger.info(f"Client subscribed to {key}")
-
-    async def disconnect(self, websocket: WebSocket, symbol: str, exchange_name: str):
-        key = f"{exchange_name}:{symbol}"
-        self.active_connections[key].remove(websocket)
-        if len(self.active_connections[key]) == 0:
-            del self.active_connections[key]
-        logger.info(f"Client unsubscribed from {key}")
-
-    async def send_ticker(self, symbol: str, exchange_name: str, ticker_data: dict):
-        key = f"{exchange_name}:{symbol}"
-        if key in self.active_connections:
-            for connection in self.active_connections[key]:
-                await connection.send_json(ticker_data)
-                logger.info(f"Sent ticker data to client for {key}")
-
-    async def broadcast(self, message: str):
-        for symbol_connections in self.active_connections.values():
-            for connection in symbol_connections:
-                await connection.send_text(message)
+    """
+    Websocket clients subscribed to each topic.
+
+    A broadcast encodes its message once and only appends it to each
+    subscriber's queue. How a client that falls behind is treated depends on
+    the topic's channel (see ``POLICIES``); channels without a policy keep
+    the latest value.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 256,
+        policies: Optional[Dict[str, str]] = None,
+        max_batch: int = 100,
+    ):
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.policies = policies or {}
+        self.active_connections: Dict[Topic, Set[Client]] = {}
+        self._clients: Dict[WebSocket, Client] = {}
+
+    def policy(self, topic: Topic) -> str:
+        # Parameterized channels such as "candles:1m" share their base policy
+        return self.policies.get(topic[0].split(":")[0], POLICY_LATEST)
+
+    def register(
+        self,
+        websocket: WebSocket,
+        wire: WireFormat = LEGACY_FORMAT,
+        heartbeat: Optional[float] = None,
+    ) -> Client:
+        client = self._clients.get(websocket)
+        if client is None:
+            client = Client(
+                websocket,
+                self.max_queue,
+                wire=wire,
+                heartbeat=heartbeat,
+                max_batch=self.max_batch,
+            )
+            self._clients[websocket] = client
+        return client
+
+    def client(self, websocket: WebSocket) -> Client:
+        return self._clients.get(websocket) or self.register(websocket)
+
+    def connect(self, websocket: WebSocket, topic: Topic) -> int:
+        """Subscribe ``websocket`` to ``topic``; return the subscriber count."""
+        client = self.client(websocket)
+        client.topics.add(topic)
+        connections = self.active_connections.setdefault(topic, set())
+        connections.add(client)
+        logger.info(f"Client subscribed to {topic}")
+        return len(connections)
+
+    def disconnect(self, websocket: WebSocket, topic: Topic) -> int:
+        """Unsubscribe ``websocket`` from ``topic``; return the subscribers left."""
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._discard(client, topic)
+            logger.info(f"Client unsubscribed from {topic}")
+        return self.subscribers(topic)
+
+    def _discard(self, client: Client, topic: Topic):
+        client.topics.discard(topic)
+        connections = self.active_connections.get(topic)
+        if connections is not None:
+            connections.discard(client)
+            if not connections:
+                del self.active_connections[topic]
+
+    async def remove(self, websocket: WebSocket) -> List[Topic]:
+        """
+        Unsubscribe ``websocket`` from everything and stop its writer; return
+        the topics it was subscribed to.
+        """
+        client = self._clients.pop(websocket, None)
+        if client is None:
+            return []
+        topics = list(client.topics)
+        for topic in topics:
+            self._discard(client, topic)
+        await client.stop()
+        return topics
+
+    def subscribers(self, topic: Topic) -> int:
+        return len(self.active_connections.get(topic, ()))
+
+    def send(self, websocket: WebSocket, data: Any, topic: Topic):
+        """Queue a ``topic`` update for one client."""
+        client = self.client(websocket)
+        client.enqueue(topic, client.wire.message(topic, data), self.policy(topic))
+
+    def reply(self, websocket: WebSocket, message: dict):
+        """Queue a protocol message (not a topic update) for one client."""
+        client = self.client(websocket)
+        client.enqueue(None, client.wire.dumps(message), POLICY_DROP)
+
+    def broadcast(self, topic: Topic, data: Any):
+        """
+        Queue ``data`` for every subscriber of ``topic``, encoded once per
+        wire format in use.
+        """
+        connections = self.active_connections.get(topic)
+        if not connections:
+            return
+        payloads: Dict[Tuple[str, bool], Payload] = {}
+        policy = self.policy(topic)
+        for client in connections:
+            payload = payloads.get(client.wire.key)
+            if payload is None:
+                payload = payloads[client.wire.key] = client.wire.message(topic, data)
+            client.enqueue(topic, payload, policy)
+
+    def stats(self) -> dict:
+        clients = {client.name: client.stats() for client in self._clients.values()}
+        return {
+            "clients": len(clients),
+            "topics": len(self.active_connections),
+            "max_client_lag_ms": max(
+                (client["lag_ms"] for client in clients.values()), default=0.0
+            ),
+            "per_client": clients,
+        }
+
+
+connection_manager = ConnectionManager(
+    max_queue=Config.WS_CLIENT_QUEUE_SIZE,
+    policies=Config.WS_CONFLATION,
+    max_batch=Config.WS_MAX_BATCH,
+)
@@ -0,0 +1,226 @@
+import asyncio
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aioredis
+
+from src.utils.codec import Codec
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+from src.websockets.connection_manager import Topic
+
+logger = setup_logger("fanout", "logs/fanout.log")
+
+Publish = Callable[[Any], Awaitable[None]]
+
+# Extend or delete the lease only if this worker still holds it
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _Follow:
+    def __init__(self, deliver: Callable[[Any], None]):
+        self.deliver = deliver
+        self.leader = False
+        self.received = 0
+        self.published = 0
+        self.elections = 0
+
+
+class RedisFanout:
+    """
+    Cross-worker distribution of upstream market data through Redis.
+
+    Every worker with local subscribers for a topic follows it: it listens on
+    the topic's pub/sub channel (one shared connection per worker) and hands
+    each message to its local clients. One of the followers holds a lease
+    (``SET NX PX``, renewed every third of ``lease_ttl``) and is the only one
+    ingesting from the exchange; it publishes each update and keeps the last
+    value in Redis for new followers. A leader that loses its lease stops
+    ingesting, and when it stops following (or dies) another follower takes
+    the lease within ``retry_interval`` (or ``lease_ttl``) seconds, so
+    upstream connections scale with topics rather than workers.
+    """
+
+    def __init__(
+        self,
+        redis_uri: Optional[str] = None,
+        lease_ttl: float = 5.0,
+        retry_interval: float = 1.0,
+        last_ttl: int = 60,
+        prefix: str = "md",
+        codec: Optional[Codec] = None,
+    ):
+        self.redis_uri = redis_uri
+        self.lease_ttl = lease_ttl
+        self.retry_interval = retry_interval
+        self.last_ttl = last_ttl
+        self.prefix = prefix
+        self.codec = codec or Codec(Config.CACHE_CODEC, compress_threshold=0)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.redis = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._follows: Dict[str, _Follow] = {}
+
+    def _key(self, kind: str, topic: Topic) -> str:
+        return f"{self.prefix}:{kind}:" + ":".join(topic)
+
+    async def _connect(self):
+        if self.redis is None:
+            self.redis = aioredis.from_url(self.redis_uri)
+        if self._pubsub is None:
+            self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+
+    async def run(
+        self,
+        topic: Topic,
+        ingest: Callable[[Publish], Awaitable[None]],
+        deliver: Callable[[Any], None],
+    ):
+        """
+        Follow ``topic`` until cancelled: ``deliver`` every published update
+        and run ``ingest(publish)`` whenever this worker holds the lease.
+        """
+        await self._connect()
+        channel = self._key("updates", topic)
+        follow = self._follows[channel] = _Follow(deliver)
+        lease = self._key("lease", topic)
+        try:
+            await self._pubsub.subscribe(channel)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_forever())
+            last = await self.redis.get(self._key("last", topic))
+            if last is not None:
+                deliver(self.codec.loads(last))
+            await self._lead_when_elected(topic, lease, follow, ingest)
+        finally:
+            self._follows.pop(channel, None)
+            await self._cleanup(channel, lease)
+
+    async def _lead_when_elected(
+        self,
+        topic: Topic,
+        lease: str,
+        follow: _Follow,
+        ingest: Callable[[Publish], Awaitable[None]],
+    ):
+        ttl_ms = int(self.lease_ttl * 1000)
+        while True:
+            try:
+                acquired = await self.redis.set(
+                    lease, self.worker_id, nx=True, px=ttl_ms
+                )
+            except Exception as e:
+                logger.error(f"Lease for {topic} failed: {e}")
+                acquired = False
+            if acquired:
+                follow.leader = True
+                follow.elections += 1
+                logger.info(f"Leading ingestion of {topic}")
+                leader = asyncio.create_task(ingest(self._publisher(topic, follow)))
+                try:
+                    while not leader.done():
+                        await asyncio.sleep(self.lease_ttl / 3)
+                        if not await self._renew(lease, ttl_ms):
+                            logger.warning(f"Lost lease for {topic}")
+                            break
+                finally:
+                    follow.leader = False
+                    leader.cancel()
+                    try:
+                        await leader
+                    except (asyncio.CancelledError, Exception):
+                        pass
+            await asyncio.sleep(self.retry_interval)
+
+    async def _renew(self, lease: str, ttl_ms: int) -> bool:
+        try:
+            return bool(await self.redis.eval(_RENEW, 1, lease, self.worker_id, ttl_ms))
+        except Exception as e:
+            logger.error(f"Failed to renew {lease}: {e}")
+            return False
+
+    def _publisher(self, topic: Topic, follow: _Follow) -> Publish:
+        channel = self._key("updates", topic)
+        last = self._key("last", topic)
+
+        async def publish(data: Any):
+            payload = self.codec.dumps(data)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.publish(channel, payload)
+                pipe.set(last, payload, ex=self.last_ttl)
+                await pipe.execute()
+            follow.published += 1
+
+        return publish
+
+    async def _read_forever(self):
+        while True:
+            try:
+                if not self._follows:
+                    await asyncio.sleep(self.retry_interval)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None or message.get("type") != "message":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                follow = self._follows.get(channel)
+                if follow is not None:
+                    follow.received += 1
+                    follow.deliver(self.codec.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Fan-out reader error: {e}")
+                await asyncio.sleep(self.retry_interval)
+
+    async def _cleanup(self, channel: str, lease: str):
+        try:
+            await self._pubsub.unsubscribe(channel)
+            # Hand the topic over right away instead of waiting for expiry
+            await self.redis.eval(_RELEASE, 1, lease, self.worker_id)
+        except Exception as e:
+            logger.error(f"Fan-out cleanup of {channel} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "topics": {
+                channel: {
+                    "leader": follow.leader,
+                    "elections": follow.elections,
+                    "published": follow.published,
+                    "received": follow.received,
+                }
+                for channel, follow in self._follows.items()
+            },
+        }
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        try:
+            if self._pubsub is not None:
+                await self._pubsub.close()
+            if self.redis is not None:
+                await self.redis.close()
+        except Exception as e:
+            logger.error(f"Failed to close fan-out connections: {e}")
+        self._pubsub = None
+        self.redis = None
@@ -0,0 +1,114 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, List, Tuple, Union
+
+from fastapi import WebSocket
+
+from src.utils.codec import to_builtin
+from src.utils.responses import encode_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+Payload = Union[str, bytes]
+
+
+class WireFormat(ABC):
+    """
+    How messages are encoded and framed for a kind of client.
+
+    With ``envelope`` a topic update is sent as ``{"channel", "exchange",
+    "symbol", "data"}``, otherwise as the bare data. With ``batch`` every
+    frame is a list of the messages queued since the last flush. Encoded
+    payloads are shared by all clients with the same ``key``.
+    """
+
+    name = ""
+
+    def __init__(self, envelope: bool = True, batch: bool = True):
+        self.envelope = envelope
+        self.batch = batch
+
+    @property
+    def key(self) -> Tuple[str, bool]:
+        return self.name, self.envelope
+
+    def message(self, topic: tuple, data: Any) -> Payload:
+        if not self.envelope:
+            return self.dumps(data)
+        channel, exchange_name, symbol = topic
+        return self.dumps(
+            {
+                "channel": channel,
+                "exchange": exchange_name,
+                "symbol": symbol,
+                "data": data,
+            }
+        )
+
+    @abstractmethod
+    def dumps(self, value: Any) -> Payload:
+        """Encode one message."""
+
+    @abstractmethod
+    def loads(self, raw: Payload) -> Any:
+        """Decode one client frame."""
+
+    @abstractmethod
+    def frame(self, payloads: List[Payload]) -> Payload:
+        """Join already encoded messages into one list without re-encoding."""
+
+    @abstractmethod
+    async def send(self, websocket: WebSocket, payload: Payload):
+        """Send an encoded message or frame as a text or binary frame."""
+
+
+class JSONFormat(WireFormat):
+    name = "json"
+
+    def dumps(self, value: Any) -> str:
+        return encode_json(value).decode()
+
+    def loads(self, raw: Payload) -> Any:
+        return orjson.loads(raw) if orjson else json.loads(raw)
+
+    def frame(self, payloads: List[str]) -> str:
+        return "[" + ",".join(payloads) + "]"
+
+    async def send(self, websocket: WebSocket, payload: str):
+        await websocket.send_text(payload)
+
+
+class MsgpackFormat(WireFormat):
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=to_builtin)
+
+    def loads(self, raw: Payload) -> Any:
+        return msgpack.unpackb(raw)
+
+    def frame(self, payloads: List[bytes]) -> bytes:
+        return msgpack.Packer().pack_array_header(len(payloads)) + b"".join(payloads)
+
+    async def send(self, websocket: WebSocket, payload: bytes):
+        await websocket.send_bytes(payload)
+
+
+# Bare JSON updates, one per frame, as sent on /ws/subscribe/...
+LEGACY_FORMAT = JSONFormat(envelope=False, batch=False)
+
+
+def get_format(name: str) -> WireFormat:
+    if name == JSONFormat.name:
+        return JSONFormat()
+    if name == MsgpackFormat.name and msgpack is not None:
+        return MsgpackFormat()
+    raise ValueError(f"Unsupported format {name}")
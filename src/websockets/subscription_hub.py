@@ -0,0 +1,235 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import ccxt.pro as ccxtpro
+from ccxt.base.exchange import Exchange
+from fastapi import WebSocket
+
+from src.services.connect_exchange_service import (
+    exchange_registry,
+    get_exchange_key_by_exchange_name,
+)
+from src.services.order_book_engine import order_book_engine
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+from src.websockets.connection_manager import (
+    ConnectionManager,
+    Topic,
+    connection_manager,
+)
+from src.websockets.fanout import RedisFanout
+
+logger = setup_logger("subscription_hub", "logs/subscription_hub.log")
+
+# Called with the client, the symbol and the channel parameter, if any
+Watcher = Callable[[Exchange, str, Optional[str]], Awaitable[Any]]
+
+
+WATCHERS: Dict[str, Watcher] = {
+    "ticker": lambda exchange, symbol, _: exchange.watch_ticker(symbol),
+    "trades": lambda exchange, symbol, _: exchange.watch_trades(symbol),
+    "candles": lambda exchange, symbol, timeframe: exchange.watch_ohlcv(
+        symbol, timeframe
+    ),
+}
+# Channels that take a parameter, e.g. "candles:1m"
+PARAMETERIZED = {"candles"}
+
+
+class _Upstream:
+    def __init__(self, topic: Topic):
+        self.topic = topic
+        self.last: Any = None
+        self.last_update: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stopper: Optional[asyncio.Task] = None
+        self.updates = 0
+        self.errors = 0
+
+
+class SubscriptionHub:
+    """
+    One upstream ``ccxt.pro`` watcher per topic, shared by all its clients.
+
+    The watcher is started by the first subscriber and each update is stored
+    as the topic's last value and broadcast once through the
+    ``ConnectionManager``. New subscribers receive the last value right away.
+    When the last subscriber leaves, the watcher is stopped after ``linger``
+    seconds unless someone subscribes again in the meantime, so reconnecting
+    clients do not churn upstream connections.
+
+    With a ``fanout``, workers share upstreams through Redis: only the
+    elected leader for a topic watches the exchange and every worker
+    delivers the published updates to its own clients.
+    """
+
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        linger: float = 5.0,
+        fanout: Optional[RedisFanout] = None,
+    ):
+        self.manager = manager
+        self.linger = linger
+        self.fanout = fanout
+        self._upstreams: Dict[Topic, _Upstream] = {}
+
+    @staticmethod
+    def supports(exchange_name: str) -> bool:
+        return exchange_name.lower() in ccxtpro.exchanges
+
+    @staticmethod
+    def make_topic(
+        channel: str, exchange_name: str, symbol: str, param: Optional[str] = None
+    ) -> Topic:
+        if channel not in WATCHERS:
+            raise ValueError(f"Unknown channel {channel}")
+        if channel in PARAMETERIZED:
+            if not param:
+                raise ValueError(f"Channel {channel} needs a parameter")
+            channel = f"{channel}:{param}"
+        return channel, exchange_name.lower(), symbol
+
+    async def validate(self, topic: Topic):
+        """Refuse symbols the exchange does not list before subscribing."""
+        if topic not in self._upstreams and not await order_book_engine.lists(
+            topic[1], topic[2]
+        ):
+            raise ValueError(f"Unknown symbol {topic[2]} on {topic[1]}")
+
+    async def subscribe(self, websocket: WebSocket, topic: Topic):
+        self.manager.connect(websocket, topic)
+        upstream = self._upstreams.get(topic)
+        if upstream is None:
+            upstream = _Upstream(topic)
+            upstream.task = asyncio.create_task(self._run(upstream))
+            self._upstreams[topic] = upstream
+            logger.info(f"Started upstream watcher {topic}")
+        if upstream.stopper is not None:
+            upstream.stopper.cancel()
+            upstream.stopper = None
+        if upstream.last is not None:
+            self.manager.send(websocket, upstream.last, topic)
+
+    async def unsubscribe(self, websocket: WebSocket, topic: Topic):
+        self.manager.disconnect(websocket, topic)
+        await self.release(topic)
+
+    async def disconnect(self, websocket: WebSocket):
+        """Drop a closed client from every topic it was subscribed to."""
+        for topic in await self.manager.remove(websocket):
+            await self.release(topic)
+
+    async def release(self, topic: Topic):
+        upstream = self._upstreams.get(topic)
+        if self.manager.subscribers(topic) or upstream is None:
+            return
+        if upstream.stopper is not None:
+            return
+        if self.linger > 0:
+            upstream.stopper = asyncio.create_task(self._stop_later(upstream))
+        else:
+            await self._stop(topic)
+
+    async def _stop_later(self, upstream: _Upstream):
+        await asyncio.sleep(self.linger)
+        upstream.stopper = None
+        if not self.manager.subscribers(upstream.topic):
+            await self._stop(upstream.topic)
+
+    async def _stop(self, topic: Topic):
+        upstream = self._upstreams.pop(topic, None)
+        if upstream and upstream.task:
+            upstream.task.cancel()
+            try:
+                await upstream.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            logger.info(f"Stopped upstream watcher {topic}")
+
+    def _deliver(self, upstream: _Upstream, data: Any):
+        upstream.last = data
+        upstream.last_update = time.time()
+        upstream.updates += 1
+        self.manager.broadcast(upstream.topic, data)
+
+    async def _run(self, upstream: _Upstream):
+        if self.fanout is None:
+            await self._ingest(upstream, self._deliver_async(upstream))
+            return
+        backoff = 1.0
+        while True:
+            try:
+                await self.fanout.run(
+                    upstream.topic,
+                    ingest=lambda publish: self._ingest(upstream, publish),
+                    deliver=lambda data: self._deliver(upstream, data),
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                upstream.errors += 1
+                logger.error(f"Fan-out for {upstream.topic} failed: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _deliver_async(self, upstream: _Upstream) -> Callable[[Any], Awaitable[None]]:
+        async def deliver(data: Any):
+            self._deliver(upstream, data)
+
+        return deliver
+
+    async def _ingest(
+        self, upstream: _Upstream, emit: Callable[[Any], Awaitable[None]]
+    ):
+        channel, exchange_name, symbol = upstream.topic
+        channel, _, param = channel.partition(":")
+        watch = WATCHERS[channel]
+        backoff = 1.0
+        while True:
+            try:
+                api = await get_exchange_key_by_exchange_name(exchange_name)
+                async with exchange_registry.lease(api, ws=True) as exchange:
+                    while True:
+                        data = await watch(exchange, symbol, param or None)
+                        backoff = 1.0
+                        await emit(data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                upstream.errors += 1
+                logger.error(f"Upstream watcher {upstream.topic} failed: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def stats(self) -> dict:
+        return {
+            ":".join(topic): {
+                "subscribers": self.manager.subscribers(topic),
+                "updates": upstream.updates,
+                "errors": upstream.errors,
+                "last_update": upstream.last_update,
+            }
+            for topic, upstream in self._upstreams.items()
+        }
+
+    async def close(self):
+        for topic in list(self._upstreams):
+            upstream = self._upstreams[topic]
+            if upstream.stopper is not None:
+                upstream.stopper.cancel()
+            await self._stop(topic)
+        if self.fanout is not None:
+            await self.fanout.close()
+
+
+subscription_hub = SubscriptionHub(
+    connection_manager,
+    linger=Config.WS_UPSTREAM_LINGER_SECONDS,
+    fanout=(
+        RedisFanout(Config.REDIS_URI, lease_ttl=Config.WS_LEADER_LEASE_SECONDS)
+        if Config.WS_FANOUT == "redis"
+        else None
+    ),
+)
@@ -1,36 +1,195 @@
 # websocket_routes.py
 
-from fastapi import APIRouter, WebSocket
+from typing import Any, List
 
-from src.services.connect_exchange_service import get_exchange_by_exchange_name
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from src.data.candle_store import timeframe_ms
 from src.utils.app_utils import normalize_symbol
+from src.utils.config import Config
 from src.utils.logger import setup_logger
-from src.websockets.connection_manager import ConnectionManager
+from src.websockets.book_stream import book_streams, is_book_topic
+from src.websockets.connection_manager import Topic, connection_manager
+from src.websockets.protocol import WireFormat, get_format
+from src.websockets.subscription_hub import subscription_hub
 
 logger = setup_logger("websocket_routes", "logs/websocket_routes.log")
-manager = ConnectionManager()
 router = APIRouter()
 
 
 @router.websocket("/ws/subscribe/{exchange_name}/{symbol}")
 async def ws_subscribe_symbol(exchange_name: str, symbol: str, websocket: WebSocket):
-    exchange = None
     ex_symbol = normalize_symbol(symbol)
+    await websocket.accept()
+    if not subscription_hub.supports(exchange_name):
+        logger.error(f"Exchange not found: {exchange_name}")
+        await websocket.close(code=1008)
+        return
+    topic = subscription_hub.make_topic("ticker", exchange_name, ex_symbol)
+    try:
+        await subscription_hub.validate(topic)
+    except ValueError as e:
+        logger.error(str(e))
+        await websocket.close(code=1008)
+        return
     try:
-        await manager.connect(websocket, ex_symbol, exchange_name)
-        exchange = await get_exchange_by_exchange_name(exchange_name, ws=True)
-        if exchange is None:
-            logger.error(f"Exchange not found: {exchange_name}")
-            return
-        await exchange.load_markets()  # Load markets for the exchange
+        # Tickers are pushed by the shared upstream watcher; the loop only
+        # waits for the client to go away
+        await subscription_hub.subscribe(websocket, topic)
         while True:
-            ticker = await exchange.watch_ticker(ex_symbol)
-            logger.info(f"Received ticker data: {ticker}")
-            await manager.send_ticker(
-                ex_symbol, exchange_name, ticker
-            )  # Broadcast to connected clients
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         logger.error(f"Error subscribing to {ex_symbol} on {exchange_name}: {e}")
     finally:
-        if exchange:
-            await exchange.close()
+        await subscription_hub.disconnect(websocket)
+
+
+def _request_topics(request: dict) -> List[Topic]:
+    channel = request.get("channel")
+    exchange_name = request.get("exchange")
+    symbols = request.get("symbols") or []
+    if not isinstance(channel, str) or not isinstance(exchange_name, str):
+        raise ValueError("channel and exchange are required")
+    if not isinstance(symbols, list) or not symbols:
+        raise ValueError("symbols must be a non-empty list")
+    symbols = [normalize_symbol(symbol) for symbol in symbols]
+    if channel == "book":
+        return [
+            book_streams.make_topic(
+                exchange_name,
+                symbol,
+                depth=request.get("depth"),
+                interval_ms=request.get("interval_ms"),
+            )
+            for symbol in symbols
+        ]
+    if not subscription_hub.supports(exchange_name):
+        raise ValueError(f"Exchange {exchange_name} does not support streaming")
+    timeframe = request.get("timeframe")
+    if timeframe is not None:
+        timeframe_ms(timeframe)
+    return [
+        subscription_hub.make_topic(channel, exchange_name, symbol, timeframe)
+        for symbol in symbols
+    ]
+
+
+async def _validate(topic: Topic):
+    if is_book_topic(topic):
+        await book_streams.validate(topic)
+    else:
+        await subscription_hub.validate(topic)
+
+
+async def _subscribe(websocket: WebSocket, topic: Topic):
+    if is_book_topic(topic):
+        await book_streams.subscribe(websocket, topic)
+    else:
+        await subscription_hub.subscribe(websocket, topic)
+
+
+async def _unsubscribe(websocket: WebSocket, topic: Topic):
+    if is_book_topic(topic):
+        await book_streams.unsubscribe(websocket, topic)
+    else:
+        await subscription_hub.unsubscribe(websocket, topic)
+
+
+async def _disconnect(websocket: WebSocket):
+    for topic in await connection_manager.remove(websocket):
+        if is_book_topic(topic):
+            await book_streams.release(topic, websocket)
+        else:
+            await subscription_hub.release(topic)
+
+
+async def _handle_request(websocket: WebSocket, request: Any):
+    if not isinstance(request, dict):
+        raise ValueError("Requests must be objects")
+    op = request.get("op")
+    reply = {"id": request.get("id")}
+    if op == "ping":
+        connection_manager.reply(websocket, {"event": "pong", **reply})
+        return
+    if op not in ("subscribe", "unsubscribe", "resync"):
+        raise ValueError(f"Unknown op {op}")
+    topics = _request_topics(request)
+    reply.update(
+        channel=topics[0][0],
+        exchange=topics[0][1],
+        symbols=[topic[2] for topic in topics],
+    )
+    client = connection_manager.client(websocket)
+    if op == "resync":
+        if not is_book_topic(topics[0]):
+            raise ValueError("Only the book channel can be resynced")
+        for topic in topics:
+            book_streams.resync(websocket, topic)
+        return
+    if op == "unsubscribe":
+        for topic in topics:
+            await _unsubscribe(websocket, topic)
+        connection_manager.reply(websocket, {"event": "unsubscribed", **reply})
+        return
+    if len(client.topics | set(topics)) > Config.WS_MAX_SUBSCRIPTIONS:
+        raise ValueError(f"At most {Config.WS_MAX_SUBSCRIPTIONS} subscriptions")
+    for topic in topics:
+        await _validate(topic)
+    # Acknowledge first so the last known values follow the confirmation
+    connection_manager.reply(websocket, {"event": "subscribed", **reply})
+    for topic in topics:
+        await _subscribe(websocket, topic)
+
+
+@router.websocket("/ws")
+async def ws_multiplex(websocket: WebSocket, format: str = "json"):
+    """
+    Multiplexed market data stream.
+
+    Clients send ``{"op": "subscribe" | "unsubscribe", "channel": "ticker" |
+    "trades" | "candles" | "book", "exchange": ..., "symbols": [...],
+    "timeframe": ... (candles only), "id": ...}`` or ``{"op": "ping"}`` and
+    receive frames holding a list of messages: topic updates
+    ``{"channel", "exchange", "symbol", "data"}`` and events (``subscribed``,
+    ``unsubscribed``, ``pong``, ``heartbeat``, ``error``). ``format=msgpack``
+    switches both directions to binary msgpack frames.
+
+    Book subscriptions take optional ``depth`` and ``interval_ms`` and
+    stream a ``snapshot`` followed by ``delta`` updates numbered by ``seq``.
+    On a gap in ``seq``, clients send ``{"op": "resync", ...}`` with the
+    same channel parameters to get a fresh snapshot.
+    """
+    await websocket.accept()
+    try:
+        wire: WireFormat = get_format(format)
+    except ValueError as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+    connection_manager.register(
+        websocket, wire=wire, heartbeat=Config.WS_HEARTBEAT_SECONDS
+    )
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            raw = message.get("text")
+            if raw is None:
+                raw = message.get("bytes")
+            request = None
+            try:
+                request = wire.loads(raw)
+                await _handle_request(websocket, request)
+            except Exception as e:
+                request_id = request.get("id") if isinstance(request, dict) else None
+                connection_manager.reply(
+                    websocket, {"event": "error", "message": str(e), "id": request_id}
+                )
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Multiplexed websocket error: {e}")
+    finally:
+        await _disconnect(websocket)
@@ -0,0 +1,28 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def make_websocket():
+    """
+    Factory for fake server-side websockets. Frames passed to ``send_text``
+    are recorded in ``sent`` after ``delay`` seconds, and ``send_text`` is an
+    ``AsyncMock`` so awaits can be asserted too.
+    """
+
+    def make(delay: float = 0.0):
+        websocket = MagicMock()
+        websocket.client = None
+        websocket.sent = []
+
+        async def send_text(payload):
+            await asyncio.sleep(delay)
+            websocket.sent.append(payload)
+
+        websocket.send_text = AsyncMock(side_effect=send_text)
+        websocket.close = AsyncMock()
+        return websocket
+
+    return make
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.models.ExchangeKeyModel import ExchangeKey
+from src.models.OrderBookDataModel import OrderBookData, PriceVolumePair
+from src.services.quote_service import aggregated_market_data
+
+
+def make_key(name: str) -> ExchangeKey:
+    return ExchangeKey(
+        api_key="key", api_secret="secret", exchange_name=name, user_id=None
+    )
+
+
+def make_book(bid: float, ask: float) -> OrderBookData:
+    return OrderBookData(
+        top_bid=PriceVolumePair(price=bid, volume=1),
+        top_ask=PriceVolumePair(price=ask, volume=1),
+        spread=ask - bid,
+        total_bid_volume=1,
+        total_ask_volume=1,
+        bid_count=1,
+        ask_count=1,
+        depth_of_book={"bids": [[bid, 1]], "asks": [[ask, 1]]},
+    )
+
+
+async def fake_order_book(exchange_key: ExchangeKey, symbol: str):
+    if exchange_key.exchange_name == "Slow":
+        await asyncio.sleep(5)
+    if exchange_key.exchange_name == "Broken":
+        raise ValueError("boom")
+    if exchange_key.exchange_name == "Kraken":
+        return make_book(100, 101), 1.0
+    return make_book(99, 100.5), 2.0
+
+
+@pytest.mark.asyncio
+async def test_aggregated_market_data_returns_partial_results_within_deadline():
+    keys = [make_key(name) for name in ("Kraken", "Slow", "Broken", "Binance")]
+    with patch(
+        "src.services.quote_service.get_exchange_keys", AsyncMock(return_value=keys)
+    ), patch("src.services.quote_service._timed_order_book", fake_order_book):
+        started = time.perf_counter()
+        result = await aggregated_market_data("BTC/USD", timeout=0.2)
+        elapsed = time.perf_counter() - started
+
+    assert elapsed < 1
+    assert result.best_bid.exchange == "Kraken"
+    assert result.best_ask.exchange == "Binance"
+    assert len(result.exchange_data) == 2
+    statuses = {venue.exchange: venue.status for venue in result.venues}
+    assert statuses == {
+        "Kraken": "ok",
+        "Slow": "timeout",
+        "Broken": "error",
+        "Binance": "ok",
+    }
+    latencies = {venue.exchange: venue.latency_ms for venue in result.venues}
+    assert latencies["Broken"] < 100 <= latencies["Slow"]
+
+
+@pytest.mark.asyncio
+async def test_aggregated_market_data_returns_none_when_all_venues_fail():
+    keys = [make_key("Broken")]
+    with patch(
+        "src.services.quote_service.get_exchange_keys", AsyncMock(return_value=keys)
+    ), patch("src.services.quote_service._timed_order_book", fake_order_book):
+        assert await aggregated_market_data("BTC/USD", timeout=0.2) is None
@@ -0,0 +1,107 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.services.auth_sessions import AuthSessions, token_claims
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+def make_sessions():
+    sessions = AuthSessions()
+    sessions.redis = FakeRedis()
+    return sessions
+
+
+def test_token_claims_carry_roles_and_tier():
+    user = {
+        "_id": "u1",
+        "email": "a@b.c",
+        "user_tier": "pro",
+        "roles": [{"role_name": "trader", "permissions": []}],
+    }
+
+    claims = token_claims(user, version=3)
+
+    assert claims["sub"] == "u1"
+    assert claims["roles"] == ["trader"]
+    assert claims["tier"] == "pro"
+    assert claims["ver"] == 3
+    assert claims["jti"]
+
+
+@pytest.mark.asyncio
+async def test_principal_is_loaded_once_until_version_bump():
+    sessions = make_sessions()
+    load = AsyncMock(return_value={"_id": "u1"})
+
+    assert await sessions.principal({"sub": "u1", "ver": 0}, load) == {"_id": "u1"}
+    assert await sessions.principal({"sub": "u1", "ver": 0}, load) == {"_id": "u1"}
+    assert load.await_count == 1
+
+    await sessions.bump("u1")
+    assert await sessions.principal({"sub": "u1", "ver": 0}, load) is None
+    new_version = await sessions.version("u1")
+    assert await sessions.principal({"sub": "u1", "ver": new_version}, load)
+    assert load.await_count == 2
+    assert sessions.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_data_update_reloads_principal_in_every_worker():
+    redis = FakeRedis()
+    first, second = AuthSessions(), AuthSessions()
+    first.redis = second.redis = redis
+    load = AsyncMock(return_value={"_id": "u1"})
+    claims = {"sub": "u1", "ver": 0}
+
+    await first.principal(claims, load)
+    await second.principal(claims, load)
+    assert load.await_count == 2
+
+    await first.refresh("u1")
+    load.return_value = {"_id": "u1", "crypto_wallets": ["w1"]}
+    # The token stays valid and the other worker reloads the user too
+    assert await second.principal(claims, load) == load.return_value
+    assert await second.principal(claims, load) == load.return_value
+    assert load.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected():
+    sessions = make_sessions()
+    load = AsyncMock(return_value={"_id": "u1"})
+    claims = {"sub": "u1", "jti": "t1", "exp": 4_102_444_800}
+
+    await sessions.revoke(claims)
+
+    assert await sessions.principal(claims, load) is None
+    assert await sessions.principal({**claims, "jti": "t2"}, load)
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_falls_back_to_cache_and_database():
+    sessions = make_sessions()
+    sessions.redis.mget = AsyncMock(side_effect=ConnectionError("down"))
+    load = AsyncMock(return_value={"_id": "u1"})
+
+    assert await sessions.principal({"sub": "u1"}, load) == {"_id": "u1"}
+    assert await sessions.principal({"sub": "u1"}, load) == {"_id": "u1"}
+    assert load.await_count == 1
+    assert sessions.stats()["errors"] == 2
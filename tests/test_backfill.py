@@ -0,0 +1,163 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.data.backfill import BackfillEngine, clean_page, split_windows
+from src.data.candle_store import CandleStore
+from src.models.ExchangeKeyModel import ExchangeKey
+from src.services.connect_exchange_service import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    _request_priority,
+)
+from src.services.quote_service import fetch_historical_data
+
+HOUR = 3_600_000
+
+
+def candle(timestamp, close=1.0):
+    return [timestamp, close, close, close, close, 1.0]
+
+
+def make_exchange(last_candle, page_size=None, delays=None):
+    async def fetch_ohlcv(symbol, timeframe, since=None, limit=None):
+        # Later pages answer first to exercise in-order commits
+        await asyncio.sleep((delays or {}).get(since, 0))
+        rows = [candle(t) for t in range(since, last_candle, HOUR)]
+        return rows[: page_size or limit]
+
+    exchange = MagicMock()
+    exchange.id = "kraken"
+    exchange.fetch_ohlcv = AsyncMock(side_effect=fetch_ohlcv)
+    return exchange
+
+
+def test_split_windows_and_clean_page():
+    assert split_windows([(0, 5), (10, 12)], 2) == [
+        (0, 2),
+        (2, 4),
+        (4, 5),
+        (10, 12),
+    ]
+    rows = [candle(2 * HOUR), candle(HOUR), candle(HOUR, 2.0), candle(HOUR + 1)]
+    assert clean_page(rows, 0, 2 * HOUR, HOUR) == [candle(HOUR, 2.0)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_fetches_pages_concurrently_and_resumes(tmp_path):
+    series = CandleStore(str(tmp_path)).series("kraken", "BTC/USD", "1h")
+    engine = BackfillEngine(concurrency=4, page_limit=3)
+    exchange = make_exchange(9 * HOUR, delays={0: 0.02})
+
+    assert await engine.backfill_series(exchange, series, "BTC/USD", 0, 9 * HOUR) == 9
+    assert exchange.fetch_ohlcv.await_count == 3
+    assert series.read()["timestamp"].tolist() == [i * HOUR for i in range(9)]
+    assert series.coverage == [(0, 9 * HOUR)]
+
+    exchange.fetch_ohlcv.reset_mock()
+    assert await engine.backfill_series(exchange, series, "BTC/USD", 0, 12 * HOUR) == 0
+    assert [call.kwargs["since"] for call in exchange.fetch_ohlcv.call_args_list] == [
+        9 * HOUR
+    ]
+    assert series.missing_ranges(0, 12 * HOUR) == []
+
+
+@pytest.mark.asyncio
+async def test_backfill_paginates_short_pages_within_a_window(tmp_path):
+    series = CandleStore(str(tmp_path)).series("kraken", "BTC/USD", "1h")
+    engine = BackfillEngine(concurrency=2, page_limit=4)
+    exchange = make_exchange(8 * HOUR, page_size=3)
+
+    assert await engine.backfill_series(exchange, series, "BTC/USD", 0, 8 * HOUR) == 8
+    assert series.read()["timestamp"].tolist() == [i * HOUR for i in range(8)]
+
+
+@pytest.mark.asyncio
+async def test_failed_window_keeps_earlier_progress(tmp_path):
+    series = CandleStore(str(tmp_path)).series("kraken", "BTC/USD", "1h")
+    engine = BackfillEngine(concurrency=1, page_limit=2)
+    exchange = make_exchange(6 * HOUR)
+    ok = exchange.fetch_ohlcv.side_effect
+
+    async def flaky(symbol, timeframe, since=None, limit=None):
+        if since == 2 * HOUR:
+            raise RuntimeError("boom")
+        return await ok(symbol, timeframe, since=since, limit=limit)
+
+    exchange.fetch_ohlcv.side_effect = flaky
+    with pytest.raises(RuntimeError):
+        await engine.backfill_series(exchange, series, "BTC/USD", 0, 6 * HOUR)
+    assert series.coverage == [(0, 2 * HOUR)]
+    assert series.missing_ranges(0, 6 * HOUR) == [(2 * HOUR, 6 * HOUR)]
+
+
+@pytest.mark.asyncio
+async def test_ranges_without_candles_are_not_fetched_again(tmp_path):
+    series = CandleStore(str(tmp_path)).series("kraken", "BTC/USD", "1h")
+    engine = BackfillEngine(concurrency=2, page_limit=4)
+    exchange = make_exchange(0)
+
+    assert await engine.backfill_series(exchange, series, "BTC/USD", 0, 8 * HOUR) == 0
+    assert exchange.fetch_ohlcv.await_count == 2
+    assert series.coverage == [(0, 8 * HOUR)]
+
+    exchange.fetch_ohlcv.reset_mock()
+    assert await engine.backfill_series(exchange, series, "BTC/USD", 0, 8 * HOUR) == 0
+    exchange.fetch_ohlcv.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_backfill_never_covers_the_forming_candle(tmp_path):
+    series = CandleStore(str(tmp_path)).series("kraken", "BTC/USD", "1h")
+    engine = BackfillEngine(concurrency=1, page_limit=2)
+    exchange = make_exchange(2 * HOUR)
+
+    with patch("src.data.backfill.time.time", return_value=(HOUR + 5) / 1000):
+        await engine.backfill_series(exchange, series, "BTC/USD", 0, 2 * HOUR)
+    assert series.coverage == [(0, HOUR)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_runs_at_the_callers_priority(tmp_path):
+    series = CandleStore(str(tmp_path)).series("kraken", "BTC/USD", "1h")
+    engine = BackfillEngine(concurrency=1, page_limit=2)
+    exchange = make_exchange(4 * HOUR)
+    priorities = []
+    ok = exchange.fetch_ohlcv.side_effect
+
+    async def record_priority(*args, **kwargs):
+        priorities.append(_request_priority.get())
+        return await ok(*args, **kwargs)
+
+    exchange.fetch_ohlcv.side_effect = record_priority
+    await engine.backfill_series(exchange, series, "BTC/USD", 0, 2 * HOUR)
+    await engine.backfill_series(
+        exchange, series, "BTC/USD", 2 * HOUR, 4 * HOUR, priority=PRIORITY_INTERACTIVE
+    )
+    assert priorities == [PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE]
+
+
+@pytest.mark.asyncio
+async def test_historical_request_backfills_at_most_max_limit_candles(tmp_path):
+    store = CandleStore(str(tmp_path))
+    key = ExchangeKey(
+        api_key="key", api_secret="secret", exchange_name="Kraken", user_id=None
+    )
+    backfill = AsyncMock(return_value=0)
+    lease = MagicMock()
+    lease.return_value.__aenter__ = AsyncMock(return_value=make_exchange(0))
+    lease.return_value.__aexit__ = AsyncMock(return_value=False)
+    with (
+        patch("src.services.quote_service.candle_store", store),
+        patch(
+            "src.services.quote_service.get_exchange_keys",
+            AsyncMock(return_value=[key]),
+        ),
+        patch("src.services.quote_service.exchange_registry.lease", lease),
+        patch("src.services.quote_service.backfill_engine.backfill_series", backfill),
+        patch("src.services.quote_service.Config.CANDLE_MAX_LIMIT", 100),
+    ):
+        await fetch_historical_data("BTCUSD", "1h", since=0)
+        _, _, _, start, end = backfill.await_args.args
+        assert (start, end) == (0, 100 * HOUR)
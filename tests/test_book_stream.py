@@ -0,0 +1,84 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.services.order_book_engine import LocalOrderBook
+from src.websockets.book_stream import BookStreams
+from src.websockets.connection_manager import ConnectionManager
+from src.websockets.protocol import get_format
+
+
+def received(websocket):
+    return [
+        message["data"] for frame in websocket.sent for message in json.loads(frame)
+    ]
+
+
+def patch_engine(book):
+    subscription = MagicMock()
+    subscription.book = book
+    subscription.ready = asyncio.Event()
+    subscription.ready.set()
+    engine = MagicMock()
+    engine.subscribe.return_value = subscription
+    return patch("src.websockets.book_stream.order_book_engine", engine)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_then_deltas_within_depth_and_resync(make_websocket):
+    book = LocalOrderBook("Kraken", "BTC/USD")
+    book.apply_snapshot([[100, 1], [99, 2], [98, 3]], [[101, 1], [102, 2]])
+    manager = ConnectionManager()
+    streams = BookStreams(manager)
+    first, second = make_websocket(), make_websocket()
+    for websocket in (first, second):
+        manager.register(websocket, wire=get_format("json"))
+
+    with patch_engine(book):
+        topic = streams.make_topic("Kraken", "BTC/USD", depth=2, interval_ms=1000)
+        await streams.subscribe(first, topic)
+        stream = streams._streams[topic]
+        stream.task.cancel()  # tick by hand
+        streams.tick(stream)
+
+        # Both updates are conflated into one delta; level 98 is out of depth
+        book.apply_snapshot([[100, 5], [99, 2], [98, 7]], [[102, 2]])
+        book.apply_snapshot([[100, 5], [98, 7]], [[102, 2]])
+        await streams.subscribe(second, topic)
+        streams.tick(stream)
+        streams.tick(stream)  # nothing changed
+        streams.resync(first, topic)
+        streams.tick(stream)
+        await asyncio.sleep(0.01)
+
+        for websocket in (first, second):
+            await streams.unsubscribe(websocket, topic)
+            await manager.remove(websocket)
+
+    first_messages = received(first)
+    assert first_messages[0] == {
+        "type": "delta",
+        "seq": 1,
+        "bids": [[100, 1], [99, 2]],
+        "asks": [[101, 1], [102, 2]],
+        "timestamp": None,
+    }
+    assert first_messages[1]["type"] == "snapshot"
+    assert first_messages[1]["seq"] == 1
+    delta = first_messages[2]
+    assert delta["seq"] == 2
+    assert sorted(delta["bids"]) == [[98, 7], [99, 0.0], [100, 5]]
+    assert delta["asks"] == [[101, 0.0]]
+    assert first_messages[3] == {
+        "type": "snapshot",
+        "seq": 2,
+        "bids": [[100, 5], [98, 7]],
+        "asks": [[102, 2]],
+        "timestamp": None,
+    }
+    # The late subscriber ignores delta 2 and starts from snapshot 2
+    assert [m["type"] for m in received(second)] == ["delta", "snapshot"]
+    assert received(second)[1]["seq"] == 2
+    assert streams.stats() == {}
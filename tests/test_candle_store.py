@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from src.data.candle_store import CandleStore
+
+HOUR = 3_600_000
+
+
+def candle(timestamp, close=1.0):
+    return [timestamp, close, close, close, close, 1.0]
+
+
+def test_write_appends_and_merges_in_timestamp_order(tmp_path):
+    series = CandleStore(str(tmp_path)).series("Kraken", "BTC/USD", "1h")
+    series.write([candle(2 * HOUR), candle(3 * HOUR)])
+    series.write([candle(4 * HOUR)])
+    series.write([candle(0), candle(3 * HOUR, close=2.0)])
+
+    candles = series.read()
+    assert candles["timestamp"].tolist() == [0, 2 * HOUR, 3 * HOUR, 4 * HOUR]
+    assert candles["close"].tolist() == [1.0, 1.0, 2.0, 1.0]
+    assert series.read(HOUR, 4 * HOUR)["timestamp"].tolist() == [2 * HOUR, 3 * HOUR]
+    assert len(series.read(0, limit=2)) == 2
+
+
+def test_coverage_gaps_persist(tmp_path):
+    store = CandleStore(str(tmp_path))
+    series = store.series("Kraken", "BTC/USD", "1h")
+    series.mark_covered(0, 5 * HOUR)
+    series.mark_covered(8 * HOUR, 10 * HOUR)
+    series.mark_covered(5 * HOUR, 6 * HOUR)
+
+    reopened = CandleStore(str(tmp_path)).series("Kraken", "BTC/USD", "1h")
+    assert reopened.coverage == [(0, 6 * HOUR), (8 * HOUR, 10 * HOUR)]
+    assert reopened.missing_ranges(2 * HOUR, 12 * HOUR) == [
+        (6 * HOUR, 8 * HOUR),
+        (10 * HOUR, 12 * HOUR),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_commit_writes_and_covers_off_the_event_loop(tmp_path):
+    series = CandleStore(str(tmp_path)).series("Kraken", "BTC/USD", "1h")
+    loop_thread = threading.get_ident()
+    writer_threads = []
+    write = series.write
+
+    def record_thread(rows):
+        writer_threads.append(threading.get_ident())
+        write(rows)
+
+    series.write = record_thread
+    await series.commit([candle(0), candle(HOUR)], 0, 3 * HOUR)
+
+    assert writer_threads and writer_threads[0] != loop_thread
+    assert series.read()["timestamp"].tolist() == [0, HOUR]
+    assert series.coverage == [(0, 3 * HOUR)]
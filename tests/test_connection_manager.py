@@ -0,0 +1,116 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import msgpack
+import pytest
+
+from src.websockets.connection_manager import CLOSE_SLOW_CONSUMER, ConnectionManager
+from src.websockets.protocol import WireFormat, get_format
+
+TICKER = ("ticker", "kraken", "BTC/USD")
+TRADES = ("trades", "kraken", "BTC/USD")
+
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once_and_slow_clients_do_not_block_others(
+    make_websocket,
+):
+    manager = ConnectionManager()
+    fast, slow = make_websocket(), make_websocket(delay=1.0)
+    for websocket in (fast, slow):
+        manager.connect(websocket, TICKER)
+
+    with patch("src.websockets.protocol.encode_json", return_value=b"{}") as encode:
+        manager.broadcast(TICKER, {"last": 1})
+    await asyncio.sleep(0.01)
+
+    encode.assert_called_once()
+    assert fast.sent == ["{}"]
+    assert slow.sent == []
+    for websocket in (fast, slow):
+        await manager.remove(websocket)
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_policies(make_websocket):
+    manager = ConnectionManager(
+        max_queue=2, policies={"trades": "drop", "book": "disconnect"}
+    )
+    websocket = make_websocket(delay=0.05)
+    manager.connect(websocket, TICKER)
+    manager.connect(websocket, TRADES)
+    book = ("book", "kraken", "BTC/USD")
+    manager.connect(websocket, book)
+
+    # Pending ticker updates are replaced by the latest one
+    for last in range(3):
+        manager.broadcast(TICKER, {"last": last})
+    # The queue now holds the ticker and one trade; further trades are dropped
+    for trade in range(3):
+        manager.broadcast(TRADES, {"id": trade})
+    client = manager.client(websocket)
+    assert client.stats()["conflated"] == 2
+    assert client.stats()["dropped"] == 2
+
+    manager.broadcast(book, {"bids": []})
+    await asyncio.sleep(0.08)
+    websocket.close.assert_awaited_once_with(code=CLOSE_SLOW_CONSUMER)
+    assert client.closed
+
+    await manager.remove(websocket)
+    assert websocket.sent[0] == '{"last":2}'
+    assert manager.stats()["clients"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batched_frames_share_encoded_payloads_per_format(make_websocket):
+    manager = ConnectionManager()
+    legacy, multiplexed, binary = make_websocket(), make_websocket(), make_websocket()
+    binary.send_bytes = binary.send_text
+    manager.register(multiplexed, wire=get_format("json"))
+    manager.register(binary, wire=get_format("msgpack"))
+    for websocket in (legacy, multiplexed, binary):
+        manager.connect(websocket, TICKER)
+
+    manager.broadcast(TICKER, {"last": 1})
+    manager.broadcast(TRADES, {"id": 1})  # no subscribers
+    manager.connect(multiplexed, TRADES)
+    manager.broadcast(TRADES, {"id": 2})
+    await asyncio.sleep(0.01)
+
+    assert legacy.sent == ['{"last":1}']
+    assert json.loads(multiplexed.sent[0]) == [
+        {
+            "channel": "ticker",
+            "exchange": "kraken",
+            "symbol": "BTC/USD",
+            "data": {"last": 1},
+        },
+        {
+            "channel": "trades",
+            "exchange": "kraken",
+            "symbol": "BTC/USD",
+            "data": {"id": 2},
+        },
+    ]
+    assert msgpack.unpackb(binary.sent[0])[0]["data"] == {"last": 1}
+    for websocket in (legacy, multiplexed, binary):
+        await manager.remove(websocket)
+
+
+@pytest.mark.asyncio
+async def test_idle_clients_get_heartbeats(make_websocket):
+    manager = ConnectionManager()
+    websocket = make_websocket()
+    manager.register(websocket, wire=get_format("json"), heartbeat=0.01)
+    await asyncio.sleep(0.035)
+    await manager.remove(websocket)
+
+    assert len(websocket.sent) >= 2
+    assert json.loads(websocket.sent[0])[0]["event"] == "heartbeat"
+
+
+def test_wire_format_requires_the_codec_methods():
+    with pytest.raises(TypeError):
+        WireFormat()
@@ -0,0 +1,162 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.models.ExchangeKeyModel import ExchangeKey
+from src.services.connect_exchange_service import (
+    ExchangeRegistry,
+    get_exchange_key_by_exchange_name,
+    invalidate_exchange_keys,
+    update_exchange_key,
+)
+
+
+def make_key(name: str, api_key: str = "key") -> ExchangeKey:
+    return ExchangeKey(
+        api_key=api_key, api_secret="secret", exchange_name=name, user_id=None
+    )
+
+
+def make_exchange():
+    exchange = MagicMock()
+    exchange.load_markets = AsyncMock()
+    exchange.close = AsyncMock()
+    return exchange
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_warm_client():
+    registry = ExchangeRegistry(max_size=2)
+    with patch(
+        "src.services.connect_exchange_service.initialize_exchange",
+        side_effect=lambda api, ws=False: make_exchange(),
+    ) as init:
+        async with registry.lease(make_key("Kraken")) as first:
+            pass
+        async with registry.lease(make_key("kraken")) as second:
+            pass
+    assert first is second
+    assert init.call_count == 1
+    first.load_markets.assert_awaited_once()
+    assert registry.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_least_recently_used():
+    registry = ExchangeRegistry(max_size=2)
+    with patch(
+        "src.services.connect_exchange_service.initialize_exchange",
+        side_effect=lambda api, ws=False: make_exchange(),
+    ):
+        async with registry.lease(make_key("Kraken", "a")) as oldest:
+            pass
+        async with registry.lease(make_key("Kraken", "b")):
+            pass
+        async with registry.lease(make_key("Kraken", "c")):
+            pass
+    oldest.close.assert_awaited_once()
+    assert registry.stats()["size"] == 2
+    assert registry.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_registry_defers_close_while_leased():
+    registry = ExchangeRegistry(max_size=1)
+    with patch(
+        "src.services.connect_exchange_service.initialize_exchange",
+        side_effect=lambda api, ws=False: make_exchange(),
+    ):
+        async with registry.lease(make_key("Kraken", "a")) as leased:
+            async with registry.lease(make_key("Kraken", "b")):
+                pass
+            leased.close.assert_not_awaited()
+        leased.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_registry_closes_idle_and_all_clients():
+    registry = ExchangeRegistry(max_size=4, idle_ttl=0)
+    with patch(
+        "src.services.connect_exchange_service.initialize_exchange",
+        side_effect=lambda api, ws=False: make_exchange(),
+    ):
+        async with registry.lease(make_key("Kraken", "a")) as idle:
+            pass
+        await registry.evict_idle()
+        idle.close.assert_awaited_once()
+
+        async with registry.lease(make_key("Kraken", "b")) as other:
+            pass
+        await registry.close()
+        other.close.assert_awaited_once()
+    assert registry.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_registry_concurrent_checkouts_survive_eviction():
+    async def slow_close():
+        await asyncio.sleep(0.01)
+
+    def slow_exchange(api, ws=False):
+        exchange = make_exchange()
+        exchange.close = AsyncMock(side_effect=slow_close)
+        return exchange
+
+    registry = ExchangeRegistry(max_size=1)
+    with patch(
+        "src.services.connect_exchange_service.initialize_exchange",
+        side_effect=slow_exchange,
+    ):
+        async with registry.lease(make_key("Kraken", "a")):
+            pass
+
+        async def use(api_key):
+            async with registry.lease(make_key("Kraken", api_key)) as exchange:
+                exchange.close.assert_not_awaited()
+                return exchange
+
+        first, second = await asyncio.gather(use("b"), use("c"))
+    first.close.assert_awaited_once()
+    assert registry.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_registry_close_waits_for_leases():
+    registry = ExchangeRegistry()
+    with patch(
+        "src.services.connect_exchange_service.initialize_exchange",
+        side_effect=lambda api, ws=False: make_exchange(),
+    ):
+        async with registry.lease(make_key("Kraken")) as leased:
+            closing = asyncio.create_task(registry.close(drain_timeout=1))
+            await asyncio.sleep(0.01)
+            leased.close.assert_not_awaited()
+        await closing
+    leased.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_exchange_key_lookup_is_cached_until_keys_change():
+    invalidate_exchange_keys()
+    keys = AsyncMock(return_value=[make_key("Kraken")])
+    collection = MagicMock()
+    collection.update_one = AsyncMock()
+    with (
+        patch("src.services.connect_exchange_service.get_exchange_keys", keys),
+        patch(
+            "src.services.connect_exchange_service.get_api_keys_collection",
+            return_value=collection,
+        ),
+        patch("src.services.connect_exchange_service.get_database"),
+    ):
+        first = await get_exchange_key_by_exchange_name("Kraken")
+        assert await get_exchange_key_by_exchange_name("kraken") is first
+        assert keys.await_count == 1
+
+        keys.return_value = [make_key("Kraken", api_key="rotated")]
+        await update_exchange_key("0" * 24, {"api_key": "rotated"})
+        rotated = await get_exchange_key_by_exchange_name("Kraken")
+    assert rotated.api_key == "rotated"
+    assert keys.await_count == 2
+    invalidate_exchange_keys()
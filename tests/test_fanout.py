@@ -0,0 +1,156 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.websockets.connection_manager import ConnectionManager
+from src.websockets.fanout import RedisFanout
+from src.websockets.subscription_hub import SubscriptionHub
+
+TOPIC = ("ticker", "kraken", "BTC/USD")
+
+
+class FakePubSub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.broker.subscribers[channel].add(self)
+
+    async def unsubscribe(self, channel):
+        self.broker.subscribers[channel].discard(self)
+
+    async def get_message(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def publish(self, *args):
+        self.calls.append(self.redis.publish(*args))
+
+    def set(self, *args, **kwargs):
+        self.calls.append(self.redis.set(*args, **kwargs))
+
+    async def execute(self):
+        return [await call for call in self.calls]
+
+
+class FakeRedis:
+    """Just enough of one Redis server, shared by several workers."""
+
+    def __init__(self):
+        self.values = {}
+        self.subscribers = defaultdict(set)
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def eval(self, script, numkeys, key, owner, *args):
+        if self.values.get(key) != owner:
+            return 0
+        if "del" in script:
+            del self.values[key]
+        return 1
+
+    async def publish(self, channel, payload):
+        for pubsub in self.subscribers[channel]:
+            pubsub.queue.put_nowait(
+                {"type": "message", "channel": channel.encode(), "data": payload}
+            )
+        return len(self.subscribers[channel])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+    async def close(self):
+        pass
+
+
+def make_worker(redis):
+    fanout = RedisFanout(lease_ttl=0.3, retry_interval=0.05)
+    fanout.redis = redis
+    return SubscriptionHub(ConnectionManager(), linger=0, fanout=fanout)
+
+
+@pytest.mark.asyncio
+async def test_one_leader_ingests_and_every_worker_delivers(make_websocket):
+    ticks = asyncio.Queue()
+    watchers = []
+
+    async def watch_ticker(symbol):
+        watchers.append(asyncio.current_task())
+        return await ticks.get()
+
+    exchange = MagicMock()
+    exchange.watch_ticker = watch_ticker
+
+    @asynccontextmanager
+    async def lease(api, ws=False):
+        yield exchange
+
+    redis = FakeRedis()
+    first, second = make_worker(redis), make_worker(redis)
+    first_client, second_client = make_websocket(), make_websocket()
+    with (
+        patch(
+            "src.websockets.subscription_hub.get_exchange_key_by_exchange_name",
+            AsyncMock(),
+        ),
+        patch("src.websockets.subscription_hub.exchange_registry.lease", lease),
+    ):
+        await first.subscribe(first_client, TOPIC)
+        await asyncio.sleep(0.02)
+        await second.subscribe(second_client, TOPIC)
+        await asyncio.sleep(0.02)
+        await ticks.put({"last": 1})
+        await asyncio.sleep(0.05)
+
+        first_client.send_text.assert_awaited_once_with('{"last":1}')
+        second_client.send_text.assert_awaited_once_with('{"last":1}')
+        assert len(set(watchers)) == 1
+        assert first.fanout.stats()["topics"]["md:updates:ticker:kraken:BTC/USD"][
+            "leader"
+        ]
+
+        # The leader's last client leaves and the other worker takes over
+        await first.disconnect(first_client)
+        await asyncio.sleep(0.15)
+        second_stats = second.fanout.stats()["topics"]
+        assert second_stats["md:updates:ticker:kraken:BTC/USD"]["leader"]
+        await ticks.put({"last": 2})
+        await asyncio.sleep(0.05)
+        second_client.send_text.assert_awaited_with('{"last":2}')
+
+        await second.disconnect(second_client)
+        await first.close()
+        await second.close()
+    # Leases are released on the way out, the last value stays for late joiners
+    assert list(redis.values) == ["md:last:ticker:kraken:BTC/USD"]
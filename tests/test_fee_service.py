@@ -0,0 +1,77 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from src.services.fee_service import FeeService, FeeTable
+
+RECORDS = [
+    {"exchange_name": "Kraken", "taker_fee_percent": 0.5, "maker_fee_percent": 0.2},
+    {
+        "exchange_name": "Kraken",
+        "symbol": "BTC/USD",
+        "taker_fee_percent": 0.1,
+        "maker_fee_percent": 0.05,
+    },
+    {"exchange_name": "Binance", "taker_fee_percent": 0.3, "maker_fee_percent": 0.3},
+]
+
+
+def test_lookup_falls_back_to_exchange_then_default():
+    table = FeeTable(RECORDS)
+
+    assert table.get("kraken", "BTC/USD").taker_fee_percent == 0.1
+    assert table.get("Kraken", "ETH/USD").taker_fee_percent == 0.5
+    assert table.get("Kraken").maker_fee_percent == 0.2
+    assert table.get("Coinbase", "BTC/USD") is table.default
+
+
+def test_apply_adjusts_prices_per_symbol_in_one_call():
+    table = FeeTable(RECORDS)
+    prices = np.array([100.0, 200.0, 300.0])
+    symbols = ["BTC/USD", "ETH/USD", "BTC/USD"]
+    base_rates = [0.002, 0.002, 0.002]
+
+    np.testing.assert_allclose(
+        table.rates("Kraken", symbols, base_rates), [0.0022, 0.003, 0.0022]
+    )
+    buy = table.apply("Kraken", symbols, prices, base_rates, side="buy")
+    sell = table.apply("Kraken", symbols, prices, base_rates, side="sell", kind="maker")
+
+    np.testing.assert_allclose(buy, [100.22, 200.6, 300.66])
+    np.testing.assert_allclose(sell, [99.79, 199.52, 299.37])
+
+
+@pytest.mark.asyncio
+async def test_reload_publishes_only_changed_exchanges():
+    service = FeeService()
+    service._load_records = AsyncMock(return_value=RECORDS)
+    listener = MagicMock()
+    service.add_listener(listener)
+
+    assert await service.reload() == {"kraken", "binance"}
+    table = service.table
+    assert await service.reload() == set()
+    assert service.table is table
+
+    changed = [dict(record) for record in RECORDS]
+    changed[1]["taker_fee_percent"] = 0.2
+    service._load_records.return_value = changed
+    assert await service.reload() == {"kraken"}
+
+    assert listener.call_count == 2
+    listener.assert_called_with({"kraken"})
+    assert service.get("Kraken", "BTC/USD").taker_fee_percent == 0.2
+    assert service.stats()["version"] == 2
+
+
+@pytest.mark.asyncio
+async def test_watch_backs_off_and_retries_after_any_error():
+    service = FeeService(poll_interval=0)
+    service._watch = AsyncMock(
+        side_effect=[RuntimeError("boom"), asyncio.CancelledError()]
+    )
+    with pytest.raises(asyncio.CancelledError):
+        await service._watch_forever()
+    assert service._watch.await_count == 2
@@ -0,0 +1,106 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import jwt
+import pytest
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from src.middlewares.asgi import compile_path_matcher
+from src.middlewares.jwt_middleware import JWTAuthMiddleware
+from src.services.auth_sessions import AuthSessions
+
+SECRET = "test-secret-key-of-at-least-32-bytes"
+
+
+def make_token(sub="u1", exp=4_102_444_800):
+    return jwt.encode(
+        {"sub": sub, "exp": exp},
+        SECRET,
+        algorithm="HS256",
+    )
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/api/v1/me")
+    async def me(request: Request):
+        return {"user": request.state.user["_id"]}
+
+    @app.get("/api/v1/auth/login")
+    async def login():
+        return {"ok": True}
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_json(websocket.state.user)
+        await websocket.close()
+
+    app.add_middleware(JWTAuthMiddleware)
+    return TestClient(app)
+
+
+def make_sessions():
+    sessions = AuthSessions()
+    sessions.redis = MagicMock()
+    sessions.redis.mget = AsyncMock(return_value=[None, None])
+    return sessions
+
+
+def test_path_matcher_accepts_optional_prefix():
+    is_excluded = compile_path_matcher(["/", "/auth/login"], "/api/v1")
+
+    assert is_excluded("/")
+    assert is_excluded("/api/v1/auth/login")
+    assert is_excluded("/auth/login")
+    assert not is_excluded("/api/v1/auth/login/extra")
+    assert not is_excluded("/api/v1/quotes")
+
+
+@pytest.fixture
+def auth_patches():
+    with (
+        patch(
+            "src.middlewares.jwt_middleware.SECRET_KEY",
+            SECRET,
+        ),
+        patch("src.middlewares.jwt_middleware.ALGORITHM", "HS256"),
+        patch("src.middlewares.jwt_middleware.get_database", MagicMock()),
+        patch(
+            "src.middlewares.jwt_middleware.get_user_by_id",
+            AsyncMock(return_value={"_id": "u1"}),
+        ) as get_user,
+        patch("src.middlewares.jwt_middleware.auth_sessions", make_sessions()),
+    ):
+        yield get_user
+
+
+def test_http_requests_are_authenticated(auth_patches):
+    client = make_client()
+
+    assert client.get("/api/v1/auth/login").status_code == 200
+    assert client.get("/api/v1/me").status_code == 401
+    bad = client.get("/api/v1/me", headers={"Authorization": "Bearer nope"})
+    assert bad.json() == {"message": "Invalid token"}
+
+    response = client.get(
+        "/api/v1/me", headers={"Authorization": f"Bearer {make_token()}"}
+    )
+    assert response.json() == {"user": "u1"}
+
+    # The principal is cached; the database is not read again
+    client.get("/api/v1/me", headers={"Authorization": f"Bearer {make_token()}"})
+    assert auth_patches.await_count == 1
+
+
+def test_websocket_handshake_is_authenticated(auth_patches):
+    client = make_client()
+
+    with pytest.raises(WebSocketDisconnect) as rejected:
+        with client.websocket_connect("/ws"):
+            pass
+    assert rejected.value.code == 1008
+
+    with client.websocket_connect(f"/ws?token={make_token()}") as websocket:
+        assert websocket.receive_json() == {"_id": "u1"}
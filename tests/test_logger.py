@@ -0,0 +1,48 @@
+import json
+import logging
+
+from src.utils.logger import LogThrottle, configure_logging, setup_logger
+
+
+def read_records(path):
+    configure_logging().handler.queue.join()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_are_written_as_json_by_the_background_thread(tmp_path):
+    log_file = tmp_path / "structured.log"
+    logger = setup_logger("test_structured", str(log_file))
+
+    logger.info("hello %s", "world", extra={"topic": "ticker"})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+
+    first, second = read_records(log_file)
+    assert first["message"] == "hello world"
+    assert first["level"] == "INFO"
+    assert first["logger"] == "test_structured"
+    assert first["topic"] == "ticker"
+    assert "ValueError: boom" in second["exc_info"]
+
+
+def test_throttle_suppresses_repeats_within_interval(tmp_path):
+    log_file = tmp_path / "throttled.log"
+    logger = setup_logger("test_throttled", str(log_file))
+    throttle = LogThrottle(interval=60)
+
+    assert throttle.error(logger, "send", "send failed")
+    assert not throttle.error(logger, "send", "send failed")
+    assert not throttle.error(logger, "send", "send failed")
+    assert throttle.error(logger, "other", "other failed")
+    throttle._keys["send"][0] -= 60
+    assert throttle.log(logger, logging.ERROR, "send", "send failed")
+
+    messages = [record["message"] for record in read_records(log_file)]
+    assert messages == [
+        "send failed",
+        "other failed",
+        "send failed (2 similar messages suppressed)",
+    ]
+    assert throttle.suppressed == 2
@@ -0,0 +1,86 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.services.fee_service import FeeTable
+from src.services.markets_catalog import MarketsCatalog
+
+
+def make_fees(taker, maker=0.0):
+    return FeeTable(
+        [
+            {
+                "exchange_name": "Kraken",
+                "taker_fee_percent": taker,
+                "maker_fee_percent": maker,
+            }
+        ]
+    )
+
+
+MARKETS = {
+    "BTC/USD": {
+        "id": "XXBTZUSD",
+        "symbol": "BTC/USD",
+        "taker": 0.0026,
+        "maker": 0.0016,
+    },
+    "ETH/USD": {"id": "XETHZUSD", "symbol": "ETH/USD", "taker": 0.004, "maker": None},
+}
+
+
+def patch_exchange(markets):
+    exchange = MagicMock()
+    exchange.load_markets = AsyncMock(return_value=markets)
+    lease = MagicMock()
+    lease.return_value.__aenter__ = AsyncMock(return_value=exchange)
+    lease.return_value.__aexit__ = AsyncMock(return_value=False)
+    return exchange, patch(
+        "src.services.markets_catalog.exchange_registry.lease_by_exchange_name", lease
+    )
+
+
+@pytest.mark.asyncio
+async def test_markets_are_loaded_once_with_fees_applied():
+    catalog = MarketsCatalog(exchanges=["Kraken"])
+    exchange, lease = patch_exchange(MARKETS)
+    fee_service = MagicMock()
+    fee_service.table = make_fees(0.5, 1.0)
+    with lease, patch("src.services.markets_catalog.fee_service", fee_service):
+        await catalog.start()
+        entry = await catalog.get("kraken")
+        await catalog.get("Kraken")
+        await catalog.close()
+
+    exchange.load_markets.assert_awaited_once()
+    assert [market.taker for market in entry.markets] == [0.0039, 0.006]
+    assert [market.maker for market in entry.markets] == [0.0032, 0.0]
+    body = json.loads(entry.body)
+    assert body[0]["symbol"] == "BTC/USD"
+    assert body[0]["taker"] == 0.0039
+
+
+@pytest.mark.asyncio
+async def test_fee_change_only_recomputes_adjusted_rates():
+    catalog = MarketsCatalog()
+    exchange, lease = patch_exchange(MARKETS)
+    fee_service = MagicMock()
+    fee_service.table = make_fees(0.0)
+    with lease, patch("src.services.markets_catalog.fee_service", fee_service):
+        entry = await catalog.get("Kraken")
+        body = entry.body
+
+        catalog.on_fees_changed({"kraken"})
+        assert entry.body is body
+        assert catalog.fee_updates == 0
+
+        fee_service.table = make_fees(1.0)
+        catalog.on_fees_changed({"binance"})
+        assert catalog.fee_updates == 0
+        catalog.on_fees_changed({"kraken"})
+
+    exchange.load_markets.assert_awaited_once()
+    assert catalog.fee_updates == 1
+    assert entry.body is not body
+    assert entry.markets[0].taker == 0.0052
@@ -0,0 +1,31 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.routes.v1.metrics import router
+
+
+def make_client(user):
+    app = FastAPI()
+
+    class FakeAuth(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            request.state.user = user
+            return await call_next(request)
+
+    app.include_router(router, prefix="/metrics")
+    app.add_middleware(FakeAuth)
+    return TestClient(app)
+
+
+def test_metrics_require_admin_role():
+    trader = {"_id": "u1", "roles": [{"role_name": "trader", "permissions": []}]}
+    response = make_client(trader).get("/metrics/")
+    assert response.status_code == 403
+
+
+def test_metrics_served_to_admin():
+    admin = {"_id": "u2", "roles": [{"role_name": "admin", "permissions": []}]}
+    response = make_client(admin).get("/metrics/")
+    assert response.status_code == 200
+    assert "websocket_clients" in response.json()
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src.utils.mongo_utils import MongoPool, PoolMetrics
+
+ADDRESS = ("localhost", 27017)
+
+
+def test_pool_metrics_track_connections_and_checkout_waits():
+    metrics = PoolMetrics()
+
+    for connection_id in (1, 2):
+        metrics.connection_created(SimpleNamespace(address=ADDRESS))
+        metrics.connection_checked_out(
+            SimpleNamespace(address=ADDRESS, connection_id=connection_id, duration=0.01)
+        )
+    metrics.connection_checked_in(SimpleNamespace(address=ADDRESS, connection_id=1))
+    metrics.connection_check_out_failed(
+        SimpleNamespace(address=ADDRESS, reason="timeout")
+    )
+
+    stats = metrics.to_dict()
+    assert stats["connections"] == 2
+    assert stats["in_use"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["checkout_failures"] == {"timeout": 1}
+    assert round(stats["avg_wait_ms"], 3) == 10.0
+    assert round(stats["max_wait_ms"], 3) == 10.0
+
+
+def test_pool_creates_one_shared_client():
+    pool = MongoPool("mongodb://db", "otc", maxPoolSize=50)
+
+    with patch("src.utils.mongo_utils.AsyncIOMotorClient") as client_class:
+        first = pool.db
+        second = pool.db
+
+    client_class.assert_called_once_with(
+        "mongodb://db", event_listeners=[pool.metrics], maxPoolSize=50
+    )
+    assert first is second
+    assert pool.stats()["connected"]
+
+    pool.close()
+    client_class.return_value.close.assert_called_once()
+    assert not pool.stats()["connected"]
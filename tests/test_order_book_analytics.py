@@ -0,0 +1,47 @@
+import pytest
+
+from src.services.order_book_analytics import vwap
+from src.services.quote_service import build_order_book_data, calculate_vwap
+
+BOOK = {
+    "bids": [[99.0, 2.0, 1700000000], [100.0, 1.0, 1700000001], [98.5, 4.0, 2]],
+    "asks": [[101.5, 1.0, 3], [101.0, 3.0, 4], [103.0, 2.0, 5]],
+}
+
+
+def test_build_order_book_data_sorts_and_keeps_original_levels():
+    data = build_order_book_data(BOOK)
+    assert data.top_bid.price == 100.0
+    assert data.top_ask.price == 101.0
+    assert data.spread == 1.0
+    assert data.total_bid_volume == 7.0
+    assert data.total_ask_volume == 6.0
+    assert data.vwap_bid == pytest.approx((99 * 2 + 100 + 98.5 * 4) / 7)
+    assert data.vwap_ask == pytest.approx((101.5 + 101 * 3 + 103 * 2) / 6)
+    assert data.bid_count == 3
+    assert data.depth_of_book["bids"] == [
+        [100.0, 1.0, 1700000001],
+        [99.0, 2.0, 1700000000],
+        [98.5, 4.0, 2],
+    ]
+    assert data.depth_of_book["asks"][0] == [101.0, 3.0, 4]
+
+
+def test_build_order_book_data_handles_empty_sides():
+    data = build_order_book_data({"bids": [], "asks": [[101.0, 1.0]]})
+    assert data.top_bid is None
+    assert data.spread is None
+    assert data.total_bid_volume == 0
+    assert data.vwap_bid is None
+    assert data.ask_count == 1
+
+
+def test_calculate_vwap_matches_sequential_sum():
+    levels = [[100.1, 0.3], [100.2, 0.7], [100.3, 0.1]]
+    total = 0
+    weighted = 0
+    for price, volume in levels:
+        total += volume
+        weighted += price * volume
+    assert calculate_vwap(levels) == weighted / total
+    assert vwap([[1.0, 0.0]]) is None
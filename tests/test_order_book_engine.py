@@ -0,0 +1,113 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from ccxt.base.errors import InvalidNonce
+
+from src.services.order_book_engine import LocalOrderBook, OrderBookEngine
+
+
+def make_exchange():
+    exchange = MagicMock()
+    exchange.options = {}
+    exchange.markets = {"BTC/USD": {}}
+    return exchange
+
+
+def patch_registry(exchange):
+    @asynccontextmanager
+    async def lease(api, ws=False):
+        yield exchange
+
+    @asynccontextmanager
+    async def lease_by_exchange_name(exchange_name, ws=False):
+        yield exchange
+
+    registry = MagicMock()
+    registry.lease = lease
+    registry.lease_by_exchange_name = lease_by_exchange_name
+    return patch.multiple(
+        "src.services.order_book_engine",
+        exchange_registry=registry,
+        get_exchange_key_by_exchange_name=AsyncMock(),
+    )
+
+
+def test_local_order_book_snapshot_returns_level_deltas():
+    book = LocalOrderBook("Kraken", "BTC/USD")
+    book.apply_snapshot([[99, 1], [100, 2]], [[102, 1], [101, 3]], nonce=1)
+    assert book.to_dict()["bids"] == [[100, 2], [99, 1]]
+    assert book.to_dict()["asks"] == [[101, 3], [102, 1]]
+
+    deltas = book.apply_snapshot([[100, 2], [98, 4]], [[101, 1]], nonce=2)
+    assert sorted(deltas["bids"]) == [[98, 4], [99, 0.0]]
+    assert sorted(deltas["asks"]) == [[101, 1], [102, 0.0]]
+    assert book.to_dict(depth=1) == {
+        "bids": [[100, 2]],
+        "asks": [[101, 1]],
+        "nonce": 2,
+        "timestamp": None,
+    }
+
+
+def test_local_order_book_rejects_nonce_going_backwards():
+    book = LocalOrderBook("Binance", "BTC/USDT")
+    book.apply_snapshot([[100, 1]], [[101, 1]], nonce=10)
+    book.apply_snapshot([], [[101, 1], [101.5, 2]], nonce=11)
+    assert book.to_dict()["bids"] == []
+    assert book.to_dict()["asks"] == [[101, 1], [101.5, 2]]
+    with pytest.raises(InvalidNonce):
+        book.apply_snapshot([[99, 1]], [], nonce=10)
+
+
+def test_local_order_book_memoizes_per_version():
+    book = LocalOrderBook("Kraken", "BTC/USD")
+    builder = MagicMock(side_effect=lambda b: b.version)
+    assert book.memoize("model", builder) == 0
+    assert book.memoize("model", builder) == 0
+    book.apply_snapshot([[100, 1]], [])
+    assert book.memoize("model", builder) == 1
+    assert builder.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_engine_serves_book_from_watch_feed():
+    async def watch_order_book(symbol, limit=None):
+        await asyncio.sleep(0.01)
+        return {"bids": [[100, 1, 0]], "asks": [[101, 2, 0]], "nonce": 5}
+
+    exchange = make_exchange()
+    exchange.watch_order_book = watch_order_book
+
+    engine = OrderBookEngine(snapshot_timeout=1)
+    with patch_registry(exchange):
+        assert await engine.get_book("Kraken", "ETH/EUR") is None
+        assert engine.stats() == {}
+
+        book = await engine.get_book("Kraken", "BTC/USD")
+        assert book.to_dict(depth=1)["bids"] == [[100, 1]]
+        assert engine.stats()["kraken:BTC/USD"]["ready"]
+        await engine.close()
+    assert engine.stats() == {}
+    assert exchange.options["watchOrderBook"]["checksum"] is True
+
+
+@pytest.mark.asyncio
+async def test_engine_drops_venue_book_on_nonce_gap():
+    nonces = iter([5, 3, 6])
+
+    async def watch_order_book(symbol, limit=None):
+        await asyncio.sleep(0.01)
+        return {"bids": [[100, 1]], "asks": [[101, 2]], "nonce": next(nonces, 7)}
+
+    exchange = make_exchange()
+    exchange.watch_order_book = watch_order_book
+    exchange.un_watch_order_book = AsyncMock()
+
+    engine = OrderBookEngine(snapshot_timeout=1)
+    with patch_registry(exchange):
+        await engine.get_book("Kraken", "BTC/USD")
+        await asyncio.sleep(0.05)
+        await engine.close()
+    exchange.un_watch_order_book.assert_awaited_once_with("BTC/USD")
@@ -0,0 +1,181 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.middlewares.rate_limiter import (
+    TOKEN_BUCKET,
+    RateLimiter,
+    RateLimiterMiddleware,
+    parse_policies,
+)
+
+POLICIES = (
+    "auth=/api/v1/auth:10/60:sliding_window,"
+    "quotes=/api/v1/quotes:300/60:token_bucket,"
+    "default=/:60/60:sliding_window"
+)
+
+
+def make_request(path="/api/v1/orders", headers=None, user=None, host="10.0.0.1"):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [
+            (k.lower().encode(), v.encode()) for k, v in (headers or {}).items()
+        ],
+        "client": (host, 1234),
+        "query_string": b"",
+        "server": ("test", 80),
+        "scheme": "http",
+    }
+    request = Request(scope)
+    if user is not None:
+        request.state.user = user
+    return request
+
+
+def make_limiter(**kwargs):
+    limiter = RateLimiter(
+        parse_policies(POLICIES), tiers={"basic": 1, "vip": 20}, **kwargs
+    )
+    limiter.redis.run_script = AsyncMock(return_value=[1, 59, 0, 30_000])
+    return limiter
+
+
+def test_policy_for_picks_longest_prefix():
+    limiter = make_limiter()
+
+    assert limiter.policy_for("/api/v1/auth/login").name == "auth"
+    assert limiter.policy_for("/api/v1/quotes/ticker").algorithm == TOKEN_BUCKET
+    assert limiter.policy_for("/api/v1/orders").name == "default"
+
+
+def test_identity_uses_user_tier_or_forwarded_address():
+    limiter = make_limiter(trusted_hops=1)
+
+    vip = make_request(user={"_id": "u1", "user_tier": "vip"})
+    assert limiter.identity(vip) == ("user:u1", 20)
+
+    proxied = make_request(headers={"X-Forwarded-For": "6.6.6.6, 1.2.3.4"})
+    assert limiter.identity(proxied) == ("ip:1.2.3.4", 1.0)
+    assert make_limiter().identity(proxied) == ("ip:10.0.0.1", 1.0)
+
+
+@pytest.mark.asyncio
+async def test_hit_runs_one_script_with_scaled_limit():
+    limiter = make_limiter()
+
+    decision = await limiter.hit(make_request(user={"_id": "u1", "user_tier": "vip"}))
+
+    assert decision.allowed
+    keys, args = limiter.redis.run_script.await_args.args[1:]
+    assert keys[0].startswith("{rate_limit:default:user:u1}:")
+    assert args[0] == 1200
+    assert decision.headers()["RateLimit-Policy"] == "1200;w=60"
+
+
+@pytest.mark.asyncio
+async def test_rejected_client_is_turned_away_locally():
+    limiter = make_limiter()
+    limiter.redis.run_script.return_value = [0, 0, 5_000, 5_000]
+
+    first = await limiter.hit(make_request())
+    second = await limiter.hit(make_request())
+
+    assert not first.allowed and not second.allowed
+    assert limiter.redis.run_script.await_count == 1
+    assert second.headers()["Retry-After"] == "5"
+    assert limiter.stats()["rejected_locally"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_fails_open():
+    limiter = make_limiter()
+    limiter.redis.run_script.side_effect = ConnectionError("down")
+
+    assert await limiter.hit(make_request()) is None
+    assert limiter.stats()["errors"] == 1
+
+
+def test_middleware_sets_headers_and_rejects():
+    limiter = make_limiter()
+    app = FastAPI()
+
+    @app.get("/api/v1/orders")
+    async def orders():
+        return {"ok": True}
+
+    app.add_middleware(RateLimiterMiddleware, limiter=limiter)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/orders")
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Remaining"] == "59"
+    assert response.headers["RateLimit-Reset"] == "30"
+
+    limiter.redis.run_script.return_value = [0, 0, 2_000, 30_000]
+    response = client.get("/api/v1/orders")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+
+
+def test_middleware_limits_authenticated_user_after_jwt():
+    limiter = make_limiter()
+    app = FastAPI()
+
+    @app.get("/api/v1/orders")
+    async def orders():
+        return {"ok": True}
+
+    class FakeAuth(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            request.state.user = {"_id": "u1", "user_tier": "basic"}
+            return await call_next(request)
+
+    app.add_middleware(RateLimiterMiddleware, limiter=limiter)
+    app.add_middleware(FakeAuth)
+
+    TestClient(app).get("/api/v1/orders")
+
+    keys = limiter.redis.run_script.await_args.args[1]
+    assert "user:u1" in keys[0]
+
+
+def test_middleware_streams_and_rejects_websockets():
+    limiter = make_limiter()
+    app = FastAPI()
+
+    @app.get("/api/v1/stream")
+    async def stream():
+        async def chunks():
+            yield b"a"
+            yield b"b"
+
+        return StreamingResponse(chunks())
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_text("hello")
+        await websocket.close()
+
+    app.add_middleware(RateLimiterMiddleware, limiter=limiter)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/stream")
+    assert response.content == b"ab"
+    assert response.headers["RateLimit-Limit"] == "60"
+
+    with client.websocket_connect("/ws") as websocket:
+        assert websocket.receive_text() == "hello"
+
+    limiter.redis.run_script.return_value = [0, 0, 2_000, 30_000]
+    with pytest.raises(WebSocketDisconnect) as rejected:
+        with client.websocket_connect("/ws"):
+            pass
+    assert rejected.value.code == 1008
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from src.models.OHLCVDataModel import OHLCVData
+from src.models.OrderBookDataModel import PriceVolumePair
+from src.utils.codec import Codec
+from src.utils.redis_utils import RedisCache
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def get(self, key):
+        self.commands.append(lambda: self.redis.store.get(key))
+        return self
+
+    def mget(self, keys):
+        self.commands.append(lambda: [self.redis.store.get(key) for key in keys])
+        return self
+
+    def pttl(self, key):
+        self.commands.append(lambda: self.redis.ttls.get(key, -1))
+        return self
+
+    async def execute(self):
+        self.redis.gets += 1
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.gets = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+@pytest.mark.parametrize("name", ["orjson", "msgpack", "json"])
+def test_codec_round_trips_models_and_compresses(name):
+    codec = Codec(name, compress_threshold=64)
+    candles = [OHLCVData(1, 1.0, 2.0, 0.5, 1.5, 10.0)] * 20
+    encoded = codec.dumps(candles)
+    assert encoded[0] & 0x01  # compressed
+    assert codec.loads(encoded)[0] == {
+        "timestamp": 1,
+        "open": 1.0,
+        "high": 2.0,
+        "low": 0.5,
+        "close": 1.5,
+        "volume": 10.0,
+    }
+    pair = Codec(name).loads(Codec(name).dumps(PriceVolumePair(price=1, volume=2)))
+    assert pair == {"price": 1.0, "volume": 2.0}
+
+
+@pytest.mark.asyncio
+async def test_local_tier_serves_repeat_reads():
+    cache = RedisCache(expire=60, local_ttl=5)
+    cache.redis = FakeRedis()
+    cache.redis.store["ticker:BTC/USD"] = cache.codec.dumps({"last": 1.0})
+
+    assert await cache.get("ticker:BTC/USD") == {"last": 1.0}
+    assert await cache.get("ticker:BTC/USD") == {"last": 1.0}
+    assert cache.redis.gets == 1
+    stats = cache.stats()
+    assert stats["local"]["hits"] == 1
+    assert stats["redis"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_mget_only_fetches_missing_keys():
+    cache = RedisCache(expire=60)
+    cache.redis = FakeRedis()
+    await cache.set("a", 1)
+    cache.redis.store["b"] = cache.codec.dumps(2)
+    assert await cache.mget(["a", "b", "c"]) == {"a": 1, "b": 2}
+    assert cache.redis.gets == 1
+
+
+@pytest.mark.asyncio
+async def test_local_tier_can_be_disabled():
+    cache = RedisCache(expire=60, local_size=0)
+    cache.redis = FakeRedis()
+    await cache.set("a", 1)
+    await cache.get("a")
+    await cache.get("a")
+    assert cache.redis.gets == 2
+
+
+@pytest.mark.asyncio
+async def test_local_tier_never_outlives_redis_ttl():
+    cache = RedisCache(expire=60, local_ttl=5)
+    cache.redis = FakeRedis()
+    cache.redis.store["ticker:BTC/USD"] = cache.codec.dumps({"last": 1.0})
+    cache.redis.ttls["ticker:BTC/USD"] = 200
+
+    await cache.get("ticker:BTC/USD")
+    expires_at, _ = cache.local._entries["ticker:BTC/USD"]
+    assert expires_at - time.monotonic() <= 0.2
+
+
+@pytest.mark.asyncio
+async def test_both_tiers_return_decoded_values():
+    cache = RedisCache(expire=60)
+    cache.redis = FakeRedis()
+    pair = PriceVolumePair(price=1, volume=2)
+    await cache.set("pair", pair)
+
+    local = await cache.get("pair")
+    cache.local.clear()
+    remote = await cache.get("pair")
+    assert local == remote == {"price": 1.0, "volume": 2.0}
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from src.models.ExchangeKeyModel import ExchangeKey
+from src.services.connect_exchange_service import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_EXECUTION,
+    RequestScheduler,
+    TokenBucket,
+    initialize_exchange,
+    request_priority,
+    request_scheduler,
+)
+
+
+@pytest.mark.asyncio
+async def test_waiting_requests_are_granted_by_priority():
+    # 1 token per 10ms, the first request drains the bucket
+    bucket = TokenBucket(refill_rate=0.1, capacity=1)
+    await bucket.acquire()
+    order = []
+
+    async def request(name, priority):
+        await bucket.acquire(1, priority)
+        order.append(name)
+
+    await asyncio.gather(
+        request("background", PRIORITY_BACKGROUND),
+        request("quote", 1),
+        request("order", PRIORITY_EXECUTION),
+    )
+    assert order == ["order", "quote", "background"]
+    stats = bucket.stats()
+    assert stats["granted"] == {"execution": 1, "interactive": 2, "background": 1}
+    assert stats["max_queue_depth"] == 3
+    assert stats["queue_depth"] == {"execution": 0, "interactive": 0, "background": 0}
+
+
+@pytest.mark.asyncio
+async def test_bucket_enforces_rate():
+    bucket = TokenBucket(refill_rate=0.2, capacity=1)  # 200 requests/s
+    started = asyncio.get_running_loop().time()
+    await asyncio.gather(*(bucket.acquire() for _ in range(5)))
+    # First is immediate, the next four wait ~5ms each
+    assert asyncio.get_running_loop().time() - started >= 0.018
+
+
+@pytest.mark.asyncio
+async def test_clients_sharing_a_key_share_a_bucket():
+    api = ExchangeKey(
+        exchange_name="Kraken", api_key="key", api_secret="secret", user_id=None
+    )
+    first, second = initialize_exchange(api), initialize_exchange(api, ws=True)
+    try:
+        assert request_scheduler.bucket(first, "key") is request_scheduler.bucket(
+            second, "key"
+        )
+        bucket = request_scheduler.bucket(first, "key")
+        with request_priority(PRIORITY_BACKGROUND):
+            await first.throttle(1)
+        assert bucket.granted["background"] == 1
+    finally:
+        await first.close()
+        await second.close()
+
+
+def test_scheduler_uses_exchange_rate_limit():
+    exchange = initialize_exchange(
+        ExchangeKey(
+            exchange_name="Kraken", api_key="other", api_secret="s", user_id=None
+        )
+    )
+    bucket = RequestScheduler().bucket(exchange, "other")
+    assert bucket.refill_rate == pytest.approx(1 / exchange.rateLimit)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from src.data.candle_store import CANDLE_DTYPE
+from src.data.resample import resample, resample_source
+
+MINUTE = 60_000
+DAY = 86_400_000
+# 2024-01-01 00:00 UTC, a Monday
+MONDAY = 1_704_067_200_000
+
+
+def make_candles(timestamps):
+    candles = np.zeros(len(timestamps), dtype=CANDLE_DTYPE)
+    candles["timestamp"] = timestamps
+    index = np.arange(len(timestamps), dtype=float)
+    candles["open"] = 100 + index
+    candles["high"] = 101 + index
+    candles["low"] = 99 + index
+    candles["close"] = 100.5 + index
+    candles["volume"] = 1 + index
+    return candles
+
+
+def test_resample_aggregates_ohlcv_and_skips_empty_buckets():
+    # 0-4m fill the first 5m bucket, 5m-9m are missing, 10m/11m start the third
+    candles = make_candles([i * MINUTE for i in (0, 1, 2, 3, 4, 10, 11)])
+    result = resample(candles, 5 * MINUTE)
+
+    assert result["timestamp"].tolist() == [0, 10 * MINUTE]
+    assert result["open"].tolist() == [100, 105]
+    assert result["high"].tolist() == [105, 107]
+    assert result["low"].tolist() == [99, 104]
+    assert result["close"].tolist() == [104.5, 106.5]
+    assert result["volume"].tolist() == [15, 13]
+    assert len(resample(candles[:0], 5 * MINUTE)) == 0
+
+
+def test_weekly_buckets_open_on_monday():
+    # Saturday to the following Tuesday: two days of one week, two of the next
+    candles = make_candles([MONDAY + i * DAY for i in (-2, -1, 0, 1)])
+    result = resample(candles, 7 * DAY)
+
+    assert result["timestamp"].tolist() == [MONDAY - 7 * DAY, MONDAY]
+    assert result["open"].tolist() == [100, 102]
+    assert result["volume"].tolist() == [3, 7]
+
+
+@pytest.mark.parametrize(
+    "timeframe, source",
+    [
+        ("1m", "1m"),
+        ("5m", "1m"),
+        ("45m", "1m"),
+        ("1h", "1h"),
+        ("2h", "1h"),
+        ("1d", "1d"),
+        ("3d", "1d"),
+        ("1w", "1d"),
+        ("1M", None),
+        ("30s", None),
+    ],
+)
+def test_resample_source_picks_coarsest_dividing_base(timeframe, source):
+    assert resample_source(timeframe, ["1m", "1h", "1d"]) == source
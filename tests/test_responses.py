@@ -0,0 +1,48 @@
+import json
+
+from src.models.OHLCVDataModel import OHLCVData
+from src.models.OrderBookDataModel import OrderBookData, PriceVolumePair
+from src.models.PriceEngineDataModel import VenueStatus
+from src.utils.responses import EncodedCache, FastJSONResponse, encode_json
+
+
+def make_book():
+    return OrderBookData(
+        top_bid=PriceVolumePair(price=99, volume=1),
+        top_ask=None,
+        spread=None,
+        total_bid_volume=1,
+        total_ask_volume=0,
+        vwap_bid=99,
+        vwap_ask=None,
+        bid_count=1,
+        ask_count=0,
+        depth_of_book={"bids": [[99.0, 1.0]], "asks": []},
+    )
+
+
+def test_encode_json_matches_model_dump():
+    book = make_book()
+    assert json.loads(encode_json(book)) == book.model_dump(mode="json")
+    venues = [VenueStatus(exchange="kraken", status="ok", latency_ms=1.5)]
+    assert json.loads(encode_json(venues)) == [venues[0].model_dump(mode="json")]
+    candles = [OHLCVData(1, 1.0, 2.0, 0.5, 1.5, 10.0)]
+    assert json.loads(encode_json(candles))[0]["close"] == 1.5
+    assert encode_json(b"[]") == b"[]"
+
+
+def test_marked_objects_are_encoded_once():
+    cache = EncodedCache(max_size=1)
+    book = cache.mark(make_book())
+    first = cache.encode(book)
+    assert cache.encode(book) is first
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    cache.mark(make_book())  # evicts the first book
+    assert cache.encode(book) is not first
+
+
+def test_fast_response_renders_models():
+    response = FastJSONResponse(make_book())
+    assert response.media_type == "application/json"
+    assert json.loads(response.body)["top_bid"] == {"price": 99.0, "volume": 1.0}
@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.models.ExchangeKeyModel import ExchangeKey
+from src.models.PriceEngineDataModel import VenueStatus
+from src.services.fee_service import FeeTable, fee_service
+from src.services.quote_service import build_order_book_data
+from src.services.rfq_service import (
+    ConsolidatedLadder,
+    _ladder_cache,
+    price_rfq,
+    quote_rfq,
+)
+
+VENUES = [
+    ("Kraken", [[100.0, 1.0], [101.0, 2.0]], 0.0),
+    ("Binance", [[100.5, 1.0], [102.0, 5.0]], 0.01),
+]
+
+
+def test_buy_walks_fee_adjusted_asks_across_venues():
+    ladder = ConsolidatedLadder("buy", VENUES)
+    # Effective asks: 100 (K), 101 (K), 101.505 (B), 103.02 (B)
+    quote = price_rfq(ladder, "BTC/USD", 3.5)
+    assert quote.fully_filled
+    assert quote.base_amount == pytest.approx(3.5)
+    assert quote.quote_amount == pytest.approx(100 + 202 + 0.5 * 101.505)
+    assert quote.price == pytest.approx(quote.quote_amount / 3.5)
+    fills = {fill.exchange: fill for fill in quote.fills}
+    assert fills["Kraken"].base_amount == pytest.approx(3.0)
+    assert fills["Binance"].base_amount == pytest.approx(0.5)
+    assert fills["Binance"].average_price == pytest.approx(100.5)
+    raw_average = (100 + 202 + 0.5 * 100.5) / 3.5
+    assert quote.reference_price == 100.0
+    assert quote.slippage_bps == pytest.approx((raw_average / 100 - 1) * 10_000)
+
+
+def test_sell_with_markup_and_quote_notional():
+    ladder = ConsolidatedLadder("sell", VENUES)
+    # Effective bids: 100.5 * 0.99 = 99.495 (B) is worse than 101 (K)
+    quote = price_rfq(ladder, "BTC/USD", 198.0, amount_type="quote", markup_rate=0.01)
+    assert quote.fully_filled
+    # 198 / 0.99 = 200 effective notional, all from Kraken's 101 level
+    assert quote.base_amount == pytest.approx(200 / 101)
+    assert quote.quote_amount == pytest.approx(198.0)
+    assert quote.price == pytest.approx(101 * 0.99)
+
+
+def test_partial_fill_when_depth_is_exhausted():
+    ladder = ConsolidatedLadder("buy", VENUES)
+    quote = price_rfq(ladder, "BTC/USD", 50)
+    assert not quote.fully_filled
+    assert quote.base_amount == pytest.approx(9.0)
+    assert len(quote.fills) == 2
+
+
+def test_empty_ladder():
+    ladder = ConsolidatedLadder("buy", [("Kraken", [], 0.0)])
+    quote = price_rfq(ladder, "BTC/USD", 1)
+    assert quote.price is None
+    assert quote.fills == []
+
+
+@contextmanager
+def patch_kraken(fan_out: AsyncMock):
+    key = ExchangeKey(
+        api_key="key", api_secret="secret", exchange_name="Kraken", user_id=None
+    )
+    exchange = MagicMock()
+    exchange.markets = {"BTC/USD": {"taker": 0.0026}}
+
+    @asynccontextmanager
+    async def lease(api, ws=False):
+        yield exchange
+
+    with patch("src.data.fetch_fees.Config.EXTRA_TAKER_FEE_PERCENTAGE", "0.1"):
+        table = FeeTable()
+    _ladder_cache.clear()
+    with (
+        patch.object(fee_service, "table", table),
+        patch(
+            "src.services.rfq_service.get_exchange_keys", AsyncMock(return_value=[key])
+        ),
+        patch("src.services.rfq_service.fan_out_order_books", fan_out),
+        patch("src.services.rfq_service.exchange_registry.lease", lease),
+    ):
+        yield
+    _ladder_cache.clear()
+
+
+def kraken_books(*args):
+    book = build_order_book_data({"bids": [[99.0, 1.0]], "asks": [[100.0, 1.0]]})
+    venue = VenueStatus(exchange="Kraken", status="ok", latency_ms=1.0)
+    return [(book, venue)]
+
+
+@pytest.mark.asyncio
+async def test_extra_fee_applied_once_for_venue_without_fee_record():
+    with patch_kraken(AsyncMock(side_effect=kraken_books)):
+        quote = await quote_rfq("BTC/USD", "buy", 1.0)
+
+    # Kraken's 0.26% taker fee raised by the default 0.1 fee fraction, once
+    assert quote.fills[0].fee_rate == pytest.approx(0.0026 * 1.1)
+    assert quote.price == pytest.approx(100 * (1 + 0.0026 * 1.1))
+    assert quote.markup_rate == 0
+
+
+@pytest.mark.asyncio
+async def test_desk_markup_comes_from_config():
+    with (
+        patch_kraken(AsyncMock(side_effect=kraken_books)),
+        patch("src.services.rfq_service.Config.RFQ_MARKUP_RATE", 0.002),
+    ):
+        quote = await quote_rfq("BTC/USD", "buy", 1.0)
+
+    assert quote.markup_rate == 0.002
+    assert quote.price == pytest.approx(100 * (1 + 0.0026 * 1.1) * 1.002)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rfqs_share_one_ladder_build():
+    async def slow_books(*args):
+        await asyncio.sleep(0.01)
+        return kraken_books()
+
+    fan_out = AsyncMock(side_effect=slow_books)
+    with patch_kraken(fan_out):
+        quotes = await asyncio.gather(
+            *(quote_rfq("BTC/USD", "buy", 1.0) for _ in range(5))
+        )
+        await quote_rfq("BTC/USD", "sell", 1.0)
+
+    assert all(quote.price == quotes[0].price for quote in quotes)
+    assert fan_out.await_count == 1
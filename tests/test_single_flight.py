@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from src.utils.single_flight import SingleFlight, single_flight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    @single_flight("test_shared")
+    async def fetch(symbol="BTC/USD"):
+        calls.append(symbol)
+        await asyncio.sleep(0.01)
+        return {"symbol": symbol}
+
+    results = await asyncio.gather(
+        *[fetch("BTC/USD") for _ in range(9)], fetch(symbol="BTC/USD"), fetch()
+    )
+    assert calls == ["BTC/USD"]
+    assert all(result is results[0] for result in results)
+    stats = fetch.single_flight.stats()
+    assert stats["calls"] == 11
+    assert stats["executions"] == 1
+    assert stats["coalescing_ratio"] == pytest.approx(10 / 11)
+    assert stats["in_flight"] == 0
+
+    await fetch("ETH/USD")
+    assert calls == ["BTC/USD", "ETH/USD"]
+
+
+@pytest.mark.asyncio
+async def test_exception_propagates_and_cancelled_waiter_does_not_cancel_call():
+    group = SingleFlight("test_errors")
+    started = asyncio.Event()
+
+    async def failing():
+        started.set()
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    first = asyncio.create_task(group.do("key", failing))
+    await started.wait()
+    second = asyncio.create_task(group.do("key", failing))
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(ValueError):
+        await second
+    assert group.executions == 1
@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.websockets.connection_manager import ConnectionManager
+from src.websockets.subscription_hub import SubscriptionHub
+
+TOPIC = ("ticker", "kraken", "BTC/USD")
+
+
+def patch_upstream(exchange):
+    @asynccontextmanager
+    async def lease(api, ws=False):
+        yield exchange
+
+    return (
+        patch(
+            "src.websockets.subscription_hub.get_exchange_key_by_exchange_name",
+            AsyncMock(),
+        ),
+        patch("src.websockets.subscription_hub.exchange_registry.lease", lease),
+    )
+
+
+@pytest.mark.asyncio
+async def test_clients_share_one_upstream_and_get_each_update_once(make_websocket):
+    ticks = asyncio.Queue()
+    exchange = MagicMock()
+
+    async def watch_ticker(symbol):
+        return await ticks.get()
+
+    exchange.watch_ticker = watch_ticker
+    hub = SubscriptionHub(ConnectionManager(), linger=0)
+    first, second = make_websocket(), make_websocket()
+    key_patch, lease_patch = patch_upstream(exchange)
+    with key_patch, lease_patch:
+        await hub.subscribe(first, TOPIC)
+        await hub.subscribe(second, TOPIC)
+        await ticks.put({"last": 1})
+        await asyncio.sleep(0.01)
+
+        late = make_websocket()
+        await hub.subscribe(late, TOPIC)
+        await asyncio.sleep(0.01)
+
+        assert len(hub._upstreams) == 1
+        first.send_text.assert_awaited_once_with('{"last":1}')
+        second.send_text.assert_awaited_once_with('{"last":1}')
+        # Late subscribers start from the last known value
+        late.send_text.assert_awaited_once_with('{"last":1}')
+
+        await hub.unsubscribe(first, TOPIC)
+        for client in (first, second, late):
+            await hub.disconnect(client)
+        assert hub.stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_upstream_lingers_for_returning_subscribers(make_websocket):
+    exchange = MagicMock()
+
+    async def watch_ticker(symbol):
+        await asyncio.Future()
+
+    exchange.watch_ticker = watch_ticker
+    hub = SubscriptionHub(ConnectionManager(), linger=0.05)
+    client = make_websocket()
+    key_patch, lease_patch = patch_upstream(exchange)
+    with key_patch, lease_patch:
+        await hub.subscribe(client, TOPIC)
+        task = hub._upstreams[TOPIC].task
+        await hub.unsubscribe(client, TOPIC)
+        await hub.subscribe(client, TOPIC)
+        await asyncio.sleep(0.1)
+        assert hub._upstreams[TOPIC].task is task
+
+        await hub.unsubscribe(client, TOPIC)
+        await asyncio.sleep(0.1)
+        assert TOPIC not in hub._upstreams
+        assert task.cancelled()
+        await hub.disconnect(client)
@@ -0,0 +1,142 @@
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routes.v1.quotes import router
+from src.services.ticker_table import TickerTable, TickerTableService
+
+
+def make_ticker(symbol, last, quote_volume, bid_volume=1.0):
+    return {
+        "symbol": symbol,
+        "high": last * 1.1,
+        "low": last * 0.9,
+        "bid": last - 1,
+        "bidVolume": bid_volume,
+        "ask": last + 1,
+        "askVolume": None,
+        "vwap": last,
+        "open": last,
+        "close": last,
+        "last": last,
+        "previousClose": None,
+        "change": 0.0,
+        "percentage": 0.0,
+        "average": last,
+        "baseVolume": quote_volume / last,
+        "quoteVolume": quote_volume,
+        "datetime": "2024-01-01T00:00:00.000Z",
+    }
+
+
+TICKERS = {
+    "BTC/USD": make_ticker("BTC/USD", 60_000.0, 5_000_000.0),
+    "ETH/USD": make_ticker("ETH/USD", 3_000.0, 2_000_000.0),
+    "ETH/EUR": make_ticker("ETH/EUR", 2_800.0, 900_000.0),
+    "DOGE/USD": make_ticker("DOGE/USD", 0.1, 0.0),
+}
+
+
+def test_filter_sort_and_project():
+    table = TickerTable("Kraken", TICKERS)
+    rendered = table.render(
+        quote="usd", min_volume=1_000_000, sort="-quoteVolume", fields=["symbol"]
+    )
+    assert json.loads(rendered.body) == [{"symbol": "BTC/USD"}, {"symbol": "ETH/USD"}]
+
+    rows = json.loads(table.render(sort="symbol", limit=2).body)
+    assert [row["symbol"] for row in rows] == ["BTC/USD", "DOGE/USD"]
+    assert rows[0]["askVolume"] is None
+    assert rows[0]["last"] == 60_000.0
+
+    with pytest.raises(ValueError):
+        table.render(fields=["nope"])
+
+
+def test_render_is_memoized_with_stable_etag():
+    table = TickerTable("Kraken", TICKERS)
+    first = table.render(sort="-last")
+    assert table.render(sort="-last") is first
+    assert TickerTable("Kraken", TICKERS).render(sort="-last").etag == first.etag
+    assert table.render(sort="last").etag != first.etag
+
+
+def test_serving_a_thousand_symbols_is_cheap():
+    tickers = {
+        f"C{i}/USD": make_ticker(f"C{i}/USD", 1.0 + i, 1_000.0 * i) for i in range(1000)
+    }
+    table = TickerTable("Kraken", tickers)
+    table.render(sort="-quoteVolume")
+    started = time.perf_counter()
+    for _ in range(100):
+        table.render(sort="-quoteVolume")
+    assert (time.perf_counter() - started) / 100 < 0.001
+    assert len(table.select(min_volume=500_000)) == 500
+    assert np.isnan(table.columns["previousClose"]).all()
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_publishes_changed_tables():
+    service = TickerTableService()
+    exchange = MagicMock()
+    exchange.fetch_tickers = AsyncMock(return_value=TICKERS)
+    lease = MagicMock()
+    lease.return_value.__aenter__ = AsyncMock(return_value=exchange)
+    lease.return_value.__aexit__ = AsyncMock(return_value=False)
+    with patch(
+        "src.services.ticker_table.exchange_registry.lease_by_exchange_name", lease
+    ):
+        subscription = service.subscribe("Kraken")
+        table = await service.get_table("Kraken")
+        await service.refresh(subscription)
+        assert subscription.table is table
+        assert subscription.changes == 1
+
+        exchange.fetch_tickers.return_value = {
+            **TICKERS,
+            "BTC/USD": make_ticker("BTC/USD", 61_000.0, 5_000_000.0),
+        }
+        await service.refresh(subscription)
+        assert subscription.table is not table
+        assert subscription.changes == 2
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_unknown_exchange_is_rejected_without_polling():
+    service = TickerTableService()
+    with patch(
+        "src.services.ticker_table.get_exchange_key_by_exchange_name",
+        AsyncMock(side_effect=ValueError("Exchange nope not found")),
+    ):
+        started = time.monotonic()
+        assert await service.get_table("nope") is None
+    assert time.monotonic() - started < 1
+    assert service.stats() == {}
+
+
+def test_exchange_tickers_route_validates_limit_and_matches_etags():
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    table = TickerTable("Kraken", TICKERS)
+    etag = table.render().etag
+
+    assert client.get("/exchange_tickers/Kraken?limit=-1").status_code == 422
+    with patch(
+        "src.routes.v1.quotes.ticker_tables.get_table", AsyncMock(return_value=table)
+    ):
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = client.get(
+                "/exchange_tickers/Kraken", headers={"If-None-Match": header}
+            )
+            assert response.status_code == 304, header
+        response = client.get(
+            "/exchange_tickers/Kraken", headers={"If-None-Match": '"other"'}
+        )
+        assert response.status_code == 200
@@ -0,0 +1,124 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.websockets.subscription_hub import subscription_hub
+from src.websockets.websocket_routes import router
+
+
+def make_app():
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def patch_upstream():
+    async def watch_ticker(symbol):
+        if symbol in exchange.seen:
+            await asyncio.Future()
+        exchange.seen.add(symbol)
+        return {"symbol": symbol, "last": 1.0}
+
+    exchange = MagicMock()
+    exchange.seen = set()
+    exchange.watch_ticker = watch_ticker
+
+    @asynccontextmanager
+    async def lease(api, ws=False):
+        yield exchange
+
+    return (
+        patch(
+            "src.websockets.subscription_hub.get_exchange_key_by_exchange_name",
+            AsyncMock(),
+        ),
+        patch("src.websockets.subscription_hub.exchange_registry.lease", lease),
+    )
+
+
+def patch_markets(symbols):
+    async def lists(exchange_name, symbol):
+        return symbol in symbols
+
+    return patch("src.websockets.subscription_hub.order_book_engine.lists", lists)
+
+
+def receive_messages(websocket, count):
+    messages = []
+    while len(messages) < count:
+        messages.extend(websocket.receive_json())
+    return messages
+
+
+def test_multiplexed_subscribe_ping_and_errors():
+    key_patch, lease_patch = patch_upstream()
+    linger_patch = patch.object(subscription_hub, "linger", 0)
+    markets_patch = patch_markets({"BTC/USD", "ETH/USD"})
+    with (
+        key_patch,
+        lease_patch,
+        linger_patch,
+        markets_patch,
+        TestClient(make_app()) as client,
+    ):
+        with client.websocket_connect("/ws") as websocket:
+            websocket.send_json(
+                {
+                    "op": "subscribe",
+                    "channel": "ticker",
+                    "exchange": "Kraken",
+                    "symbols": ["BTCUSD", "ETH/USD"],
+                    "id": 1,
+                }
+            )
+            messages = receive_messages(websocket, 3)
+            assert messages[0] == {
+                "event": "subscribed",
+                "id": 1,
+                "channel": "ticker",
+                "exchange": "kraken",
+                "symbols": ["BTC/USD", "ETH/USD"],
+            }
+            updates = {m["symbol"]: m["data"]["last"] for m in messages[1:]}
+            assert updates == {"BTC/USD": 1.0, "ETH/USD": 1.0}
+
+            websocket.send_json({"op": "ping", "id": 2})
+            assert receive_messages(websocket, 1) == [{"event": "pong", "id": 2}]
+
+            websocket.send_json({"op": "subscribe", "channel": "candles", "id": 3})
+            error = receive_messages(websocket, 1)[0]
+            assert error["event"] == "error" and error["id"] == 3
+
+            websocket.send_text("not json")
+            assert receive_messages(websocket, 1)[0]["event"] == "error"
+
+
+def test_unlisted_symbols_are_refused_on_every_channel():
+    key_patch, lease_patch = patch_upstream()
+    with (
+        key_patch,
+        lease_patch,
+        patch_markets({"BTC/USD"}),
+        TestClient(make_app()) as client,
+    ):
+        with client.websocket_connect("/ws") as websocket:
+            for channel in ("ticker", "trades"):
+                websocket.send_json(
+                    {
+                        "op": "subscribe",
+                        "channel": channel,
+                        "exchange": "Kraken",
+                        "symbols": ["BTC/USD", "NOPE/USD"],
+                        "id": channel,
+                    }
+                )
+                error = receive_messages(websocket, 1)[0]
+                assert error == {
+                    "event": "error",
+                    "message": "Unknown symbol NOPE/USD on kraken",
+                    "id": channel,
+                }
+        assert not subscription_hub.stats()